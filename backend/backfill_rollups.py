@@ -0,0 +1,56 @@
+"""
+Rebuild the page view rollups from the raw pageviews collection
+
+Stop the API first: page views flushed while the rollups are rebuilt would
+be counted twice. The script refuses to run when page views were stored in
+the last few minutes, unless ``--allow-live-ingest`` is passed.
+"""
+import argparse
+import asyncio
+import sys
+from datetime import timedelta
+from dotenv import load_dotenv
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+from services.indexes import PAGEVIEW_RETENTION_DAYS
+from services.rollups import backfill, recent_ingest
+from storage.mongo import MongoStorage
+
+# No page view stored for this long is taken as ingest being stopped
+QUIET_PERIOD = timedelta(minutes=5)
+
+async def backfill_rollups(allow_live_ingest: bool = False):
+    """Drop and recompute every rollup document"""
+    storage = MongoStorage()
+    
+    if await recent_ingest(storage.pageviews, QUIET_PERIOD):
+        if not allow_live_ingest:
+            storage.close()
+            sys.exit(
+                "⚠️  Page views were stored in the last 5 minutes, so the API looks live. Views flushed during "
+                "the rebuild would be counted twice; stop the API or pass --allow-live-ingest."
+            )
+        print("⚠️  Page views are still being ingested; totals may count some of them twice")
+    
+    print("📊 Rebuilding page view rollups...")
+    processed = await backfill(storage.pageviews)
+    print(f"✅ Rolled up {processed} page views")
+    
+    storage.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild page view rollups from raw page views")
+    parser.add_argument("--allow-retention-loss", action="store_true",
+                        help="Rebuild even though expired page views will drop out of all-time totals")
+    parser.add_argument("--allow-live-ingest", action="store_true",
+                        help="Rebuild even though page views are being stored; some may be counted twice")
+    args = parser.parse_args()
+    if PAGEVIEW_RETENTION_DAYS and not args.allow_retention_loss:
+        sys.exit(
+            f"⚠️  PAGEVIEW_RETENTION_DAYS={PAGEVIEW_RETENTION_DAYS}: page views older than that have expired, "
+            "and rebuilding would drop them from all-time totals. Pass --allow-retention-loss to rebuild anyway."
+        )
+    asyncio.run(backfill_rollups(args.allow_live_ingest))
@@ -0,0 +1,199 @@
+"""
+Local latency and throughput benchmark for every API route.
+
+Runs the app in-process on the in-memory storage backend (no network, no
+database) and drives each endpoint with concurrent requests:
+
+    python benchmark.py                              # print a report
+    python benchmark.py --save-baseline base.json    # record a baseline
+    python benchmark.py --compare base.json          # fail on regressions
+    python benchmark.py --json-encoder stdlib        # compare JSON encoders
+
+Reported per route: throughput, p50/p95/p99 latency and the peak memory
+traced by tracemalloc while serving a single request.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+os.environ.setdefault('STORAGE_BACKEND', 'memory')
+# Flush page views continuously so the ingest path is part of the measurement
+os.environ.setdefault('PAGEVIEW_FLUSH_SECONDS', '0.05')
+# Export is admin-only; the client sends this token with every request
+os.environ.setdefault('ADMIN_TOKEN', 'benchmark')
+
+import httpx
+
+ROOT_DIR = Path(__file__).parent
+sys.path.insert(0, str(ROOT_DIR))
+
+# (name, method, path, json body)
+ROUTES = [
+    ("portfolio.projects", "GET", "/api/portfolio/projects", None),
+    ("portfolio.project", "GET", "/api/portfolio/projects/1", None),
+    ("portfolio.skills", "GET", "/api/portfolio/skills", None),
+    ("portfolio.experience", "GET", "/api/portfolio/experience", None),
+    ("portfolio.contact", "GET", "/api/portfolio/contact", None),
+    ("portfolio.bundle", "GET", "/api/portfolio/bundle", None),
+    ("portfolio.search", "GET", "/api/portfolio/search?q=fastapi+pipeline", None),
+    ("portfolio.semantic", "GET", "/api/portfolio/semantic-search?q=summarize+documents+with+llms", None),
+    ("analytics.pageview", "POST", "/api/analytics/pageview", {"path": "/", "userAgent": "bench"}),
+    ("analytics.stats", "GET", "/api/analytics/stats", None),
+    ("analytics.timeseries", "GET", "/api/analytics/timeseries?bucket=minute", None),
+    ("analytics.report", "GET", "/api/analytics/report?funnel=/,/projects", None),
+    ("analytics.export", "GET", "/api/analytics/export?limit=1000", None),
+    ("status.create", "POST", "/api/status", {"client_name": "bench"}),
+    ("status.list", "GET", "/api/status", None),
+]
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def measure_allocations(client, method, path, body, samples):
+    """Average peak traced memory (KiB) for one request at a time"""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(samples):
+            tracemalloc.reset_peak()
+            start, _ = tracemalloc.get_traced_memory()
+            await client.request(method, path, json=body)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - start)
+    finally:
+        tracemalloc.stop()
+    return statistics.mean(peaks) / 1024
+
+
+async def bench_route(client, route, requests, concurrency, warmup, alloc_samples):
+    name, method, path, body = route
+    for _ in range(warmup):
+        await client.request(method, path, json=body)
+
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "route": name,
+        "requests": requests,
+        "errors": errors,
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "alloc_kib": round(await measure_allocations(client, method, path, body, alloc_samples), 1),
+    }
+
+
+async def run(args):
+    # Read when the app is imported
+    os.environ['JSON_ENCODER'] = args.json_encoder
+    import server
+
+    # Per-request client logging would dominate the measurement
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    # ASGITransport does not send lifespan events; run the app's lifespan around the client
+    async with server.app.router.lifespan_context(server.app):
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", headers={"X-Admin-Token": os.environ['ADMIN_TOKEN']}
+        ) as client:
+            results = []
+            for route in ROUTES:
+                if args.routes and not any(route[0].startswith(prefix) for prefix in args.routes):
+                    continue
+                results.append(await bench_route(
+                    client, route, args.requests, args.concurrency, args.warmup, args.alloc_samples
+                ))
+    return results
+
+
+def print_report(results, baseline=None):
+    header = f"{'route':<24}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'KiB/req':>10}{'errors':>8}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        line = (f"{result['route']:<24}{result['rps']:>10}{result['p50_ms']:>10}"
+                f"{result['p95_ms']:>10}{result['p99_ms']:>10}{result['alloc_kib']:>10}{result['errors']:>8}")
+        base = (baseline or {}).get(result["route"])
+        if base:
+            line += f"   p95 {(result['p95_ms'] / base['p95_ms'] - 1) * 100:+.1f}%"
+        print(line)
+
+
+def regressions(results, baseline, threshold):
+    """Routes whose p95 latency or throughput is worse than baseline by > threshold"""
+    found = []
+    for result in results:
+        base = baseline.get(result["route"])
+        if not base:
+            continue
+        if result["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            found.append(f"{result['route']}: p95 {base['p95_ms']} -> {result['p95_ms']} ms")
+        if result["rps"] < base["rps"] * (1 - threshold):
+            found.append(f"{result['route']}: rps {base['rps']} -> {result['rps']}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--alloc-samples", type=int, default=50)
+    parser.add_argument("--routes", nargs="*", help="only routes whose name starts with one of these")
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--compare", metavar="PATH", help="baseline to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed regression ratio")
+    parser.add_argument("--json-encoder", choices=["orjson", "stdlib"], default=os.environ.get('JSON_ENCODER', 'orjson'))
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    baseline = None
+    if args.compare:
+        baseline = {entry["route"]: entry for entry in json.loads(Path(args.compare).read_text())["results"]}
+    print_report(results, baseline)
+
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps({"results": results}, indent=2))
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+    if baseline:
+        found = regressions(results, baseline, args.threshold)
+        if found:
+            print(f"\nRegressions beyond {args.threshold:.0%}:")
+            for line in found:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Build the content snapshot served with ``STORAGE_BACKEND=snapshot``.
+
+    python build_snapshot.py                    # from the seed data in seed_db.py
+    python build_snapshot.py --source mongo     # from the database (MONGO_URL, DB_NAME)
+    python build_snapshot.py --output path.json
+
+The snapshot is written atomically to ``CONTENT_SNAPSHOT_FILE`` (default
+``data/content_snapshot.json``), so a running server swaps to it on its next
+version check. The version is one more than the previous build's, and an
+unchanged build (same checksum) leaves the file alone. The semantic search
+index is rebuilt alongside.
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+sys.path.insert(0, str(ROOT_DIR))
+
+from services.embeddings import write_index
+from storage.shared import SNAPSHOT_FILE, load_content, read_snapshot, write_snapshot
+
+
+async def build_snapshot(source: str, output: Path, version: int = None):
+    print(f"📦 Loading content from {source}...")
+    if source == "mongo":
+        from storage.mongo import MongoStorage
+        storage = MongoStorage()
+    else:
+        from storage.memory import MemoryStorage
+        storage = MemoryStorage()
+    try:
+        document = await load_content(storage.content)
+    finally:
+        storage.close()
+    print(f"✅ Loaded {len(document['projects'])} projects, {len(document['skills'])} skill categories, "
+          f"{len(document['experience'])} experience items")
+
+    previous = None
+    if output.exists():
+        try:
+            previous = read_snapshot(output)
+        except (OSError, ValueError) as exc:
+            print(f"⚠️  Ignoring unreadable snapshot at {output}: {exc}")
+
+    if version is None:
+        if previous and previous.get("checksum") == document["checksum"]:
+            print(f"✨ Content unchanged, keeping version {previous['version']} at {output}")
+            return previous["version"]
+        version = previous["version"] + 1 if previous else 1
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    write_snapshot({"version": version, "builtAt": datetime.now(timezone.utc), **document}, output)
+    print(f"✅ Wrote content version {version} to {output}")
+
+    # Precompute the semantic search index for the projects in the snapshot
+    path = write_index(document["projects"])
+    print(f"🧠 Wrote {len(document['projects'])} project embeddings to {path}")
+    return version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the portfolio content snapshot")
+    parser.add_argument("--source", choices=["seed", "mongo"], default="seed")
+    parser.add_argument("--output", type=Path, default=Path(SNAPSHOT_FILE))
+    parser.add_argument("--version", type=int, help="Version to write, default previous + 1")
+    args = parser.parse_args()
+    asyncio.run(build_snapshot(args.source, args.output, args.version))
+
+
+if __name__ == "__main__":
+    main()
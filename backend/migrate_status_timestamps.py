@@ -0,0 +1,79 @@
+"""
+Online migration of status check timestamps from ISO strings to native dates.
+
+Converts documents in batches while the API keeps running. Each update is
+conditional on the old string value, so a document rewritten concurrently is
+left alone and simply retried in a later batch.
+
+    python migrate_status_timestamps.py [--batch-size 1000] [--pause 0.1] [--dry-run]
+"""
+import argparse
+import asyncio
+from datetime import datetime, timezone
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+import os
+from dotenv import load_dotenv
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+STRING_TIMESTAMP = {"timestamp": {"$type": "string"}}
+
+def parse_timestamp(value):
+    """ISO string as written by the old create_status_check, as aware UTC"""
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+async def migrate(batch_size, pause, dry_run):
+    """Convert string timestamps batch by batch until none are left"""
+    mongo_url = os.environ['MONGO_URL']
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[os.environ['DB_NAME']]
+
+    remaining = await db.status_checks.count_documents(STRING_TIMESTAMP)
+    print(f"🔎 {remaining} status checks with string timestamps")
+    if dry_run or not remaining:
+        client.close()
+        return
+
+    converted = 0
+    skipped = set()
+    while True:
+        query = {**STRING_TIMESTAMP, "_id": {"$nin": list(skipped)}} if skipped else STRING_TIMESTAMP
+        docs = await db.status_checks.find(query, {"timestamp": 1}).limit(batch_size).to_list(batch_size)
+        if not docs:
+            break
+
+        ops = []
+        for doc in docs:
+            try:
+                timestamp = parse_timestamp(doc['timestamp'])
+            except ValueError:
+                print(f"⚠️  Skipping {doc['_id']}: unparseable timestamp {doc['timestamp']!r}")
+                skipped.add(doc['_id'])
+                continue
+            ops.append(UpdateOne(
+                {"_id": doc['_id'], "timestamp": doc['timestamp']},
+                {"$set": {"timestamp": timestamp}}
+            ))
+
+        if ops:
+            result = await db.status_checks.bulk_write(ops, ordered=False)
+            converted += result.modified_count
+            print(f"✅ Converted {converted}/{remaining}")
+        await asyncio.sleep(pause)
+
+    print(f"\n✨ Migration finished: {converted} converted, {len(skipped)} skipped")
+    client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert status check timestamps to native dates")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--pause", type=float, default=0.1, help="seconds to sleep between batches")
+    parser.add_argument("--dry-run", action="store_true", help="only count documents to convert")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.batch_size, args.pause, args.dry_run))
@@ -1,43 +1,165 @@
-from fastapi import APIRouter, Request, Depends
+from fastapi import APIRouter, HTTPException, Request, Depends, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 from models.analytics import PageView
-from datetime import datetime
+from services import export
+from services.admin import require_admin
+from services.analytics_sketches import analytics_sketches
+from services.json_response import FastJSONResponse
+from services.live_analytics import live_analytics, live_events
+from services.pageview_buffer import pageview_buffer
+from services.report import window_report
+from services.worker_hub import ingest_stats
+from services.rollups import BUCKET_SIZES, read_stats, read_timeseries
+from datetime import datetime, timedelta, timezone
+from typing import Literal, Optional
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
-# Dependency to get database from server
-def get_db():
-    from server import db
-    return db
+# Default window per granularity, and the most buckets one query may return
+DEFAULT_SPANS = {"minute": timedelta(hours=1), "hour": timedelta(days=1), "day": timedelta(days=30)}
+MAX_POINTS = 10080
+REPORT_SPAN = timedelta(days=7)
+MAX_FUNNEL_STEPS = 10
+
+# Dependency to get storage from app state (set up by the lifespan handler)
+def get_storage(request: Request):
+    return request.app.state.storage
 
 @router.post("/pageview")
-async def log_pageview(pageview: PageView, request: Request, db = Depends(get_db)):
+async def log_pageview(pageview: PageView, request: Request):
     """Log page view for analytics"""
     # Add IP address from request
     pageview_data = pageview.model_dump()
     pageview_data['ip'] = request.client.host if request.client else None
     pageview_data['timestamp'] = datetime.utcnow()
     
-    await db.pageviews.insert_one(pageview_data)
+    # Written in batches by the background flusher
+    if not pageview_buffer.offer(pageview_data):
+        return JSONResponse(
+            status_code=503,
+            content={"success": False, "message": "Analytics queue is full"},
+            headers={"Retry-After": "1"}
+        )
+    analytics_sketches.observe(pageview_data)
+    live_analytics.observe(pageview_data)
     
-    return {"success": True, "message": "Page view logged"}
+    return FastJSONResponse({"success": True, "message": "Page view logged"})
 
 @router.get("/stats")
-async def get_stats(db = Depends(get_db)):
+async def get_stats(top: int = Query(10, ge=1, le=100), storage = Depends(get_storage)):
     """Get basic analytics stats"""
-    # Use estimated count for better performance
-    total_views = await db.pageviews.estimated_document_count()
-    
-    # Use aggregation with limit for unique paths
-    pipeline = [
-        {"$group": {"_id": "$path"}},
-        {"$limit": 100},
-        {"$project": {"_id": 0, "path": "$_id"}}
-    ]
-    unique_paths_cursor = db.pageviews.aggregate(pipeline)
-    unique_paths = [doc["path"] async for doc in unique_paths_cursor]
-    
-    return {
-        "total_views": total_views,
-        "unique_paths": len(unique_paths),
-        "paths": unique_paths
-    }
+    # Read from pre-aggregated rollups, never from the raw pageviews collection
+    stats = await read_stats(storage.pageviews)
+    # Approximate unique visitors and heavy-hitter paths from in-memory sketches
+    stats.update(analytics_sketches.stats(top))
+    stats["ingest"] = ingest_stats()
+    return FastJSONResponse(stats)
+
+@router.get("/live")
+async def live_stream():
+    """Server-Sent Events stream of per-second page views and top paths"""
+    # Fed from the ingest path; no query runs however many viewers connect
+    return live_events.response(first=live_analytics.snapshot())
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Stored timestamps are naive UTC; normalize aware query values to match"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+@router.get("/timeseries")
+async def get_timeseries(
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    bucket: Literal["minute", "hour", "day"] = "hour",
+    path: Optional[str] = None,
+    storage = Depends(get_storage)
+):
+    """Get page views per time bucket, optionally for a single path"""
+    end = _as_utc(end) or datetime.utcnow()
+    start = _as_utc(start) or end - DEFAULT_SPANS[bucket]
+    if start >= end:
+        raise HTTPException(status_code=400, detail="'from' must be before 'to'")
+    if (end - start) / BUCKET_SIZES[bucket] > MAX_POINTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range spans more than {MAX_POINTS} {bucket} buckets, use a coarser bucket"
+        )
+    
+    points = await read_timeseries(storage.pageviews, start, end, bucket, path)
+    
+    return FastJSONResponse({
+        "from": start,
+        "to": end,
+        "bucket": bucket,
+        "path": path,
+        "points": points,
+        "total": sum(point["views"] for point in points)
+    })
+
+@router.get("/report", dependencies=[Depends(require_admin)])
+async def get_report(
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    funnel: Optional[str] = Query(None, description="Comma-separated paths, e.g. /,/projects,/contact"),
+    top: int = Query(20, ge=1, le=200),
+    storage = Depends(get_storage)
+):
+    """Get sessions, hourly traffic, per-path and user agent breakdowns for a window (admin only)"""
+    # Round the default end down to the minute so refreshes share a cached window
+    end = _as_utc(end) or datetime.utcnow().replace(second=0, microsecond=0)
+    start = _as_utc(start) or end - REPORT_SPAN
+    if start >= end:
+        raise HTTPException(status_code=400, detail="'from' must be before 'to'")
+    steps = [step.strip() for step in funnel.split(",") if step.strip()] if funnel else []
+    if len(steps) > MAX_FUNNEL_STEPS:
+        raise HTTPException(status_code=400, detail=f"A funnel has at most {MAX_FUNNEL_STEPS} steps")
+    
+    report = await window_report(storage.pageviews, start, end, steps, top)
+    
+    return FastJSONResponse({"from": start, "to": end, **report})
+
+async def _export_batches(first, batches, limit):
+    """Re-attach the pre-fetched first batch and stop after ``limit`` rows"""
+    sent = 0
+    batch = first
+    while True:
+        if limit is not None and sent + len(batch) >= limit:
+            yield batch[:limit - sent]
+            return
+        sent += len(batch)
+        yield batch
+        try:
+            batch = await batches.__anext__()
+        except StopAsyncIteration:
+            return
+
+@router.get("/export", dependencies=[Depends(require_admin)])
+async def export_pageviews(
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    format: Literal["ndjson", "csv", "parquet", "arrow"] = "ndjson",
+    after_id: Optional[str] = Query(None, description="Resume after this row id; 'from' must be its timestamp"),
+    limit: Optional[int] = Query(None, ge=1),
+    storage = Depends(get_storage)
+):
+    """Stream raw page views in (timestamp, id) order (admin only: rows carry IPs and user agents)"""
+    if not export.available(format):
+        raise HTTPException(status_code=501, detail=f"{format} export needs pyarrow installed")
+    if after_id is not None and start is None:
+        raise HTTPException(status_code=400, detail="'after_id' needs 'from' set to the timestamp of that row")
+    
+    batches = storage.pageviews.iter_range(_as_utc(start), _as_utc(end), after_id)
+    # Fetch the first batch up front so bad input still gets a proper error status
+    try:
+        first = await batches.__anext__()
+    except StopAsyncIteration:
+        first = []
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    
+    return StreamingResponse(
+        export.ENCODERS[format](_export_batches(first, batches, limit)),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="pageviews.{format}"'}
+    )
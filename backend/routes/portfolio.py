@@ -1,77 +1,248 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Request, Query
+from typing import List, Optional
+import asyncio
+from models.contact import ContactInfo
+from models.experience import Experience
 from models.project import Project
+from services.admin import require_admin
+from services.cache import content_cache
+from services.content_watcher import content_events, content_watcher
+from services.embeddings import embedding_index
+from services.json_response import FastJSONResponse
+from services.search import search_index
+from services.worker_hub import hub_client
+from services.pubsub import encode_event
+from services.snapshot import ResponseSnapshot
 
 router = APIRouter(prefix="/portfolio", tags=["portfolio"])
 
-# Dependency to get database from server
-def get_db():
-    from server import db
-    return db
+# Dependency to get storage from app state (set up by the lifespan handler)
+def get_storage(request: Request):
+    return request.app.state.storage
+
+# Section loaders return raw content; it is cached under "data:<section>" and
+# shared by the single-section routes and the bundle
+
+async def load_skills(content):
+    skills_list = await content.list_skills()
+    
+    # Convert to grouped format
+    skills_dict = {}
+    for skill in skills_list:
+        skills_dict[skill['category']] = skill['skills']
+    return skills_dict
+
+SECTIONS = {
+    "projects": lambda content: content.list_projects(),
+    "skills": load_skills,
+    "experience": lambda content: content.list_experience(),
+    "contact": lambda content: content.get_contact(),
+}
+
+async def get_section(section, storage):
+    return await content_cache.get_or_load(f"data:{section}", lambda: SECTIONS[section](storage.content), pinned=True)
+
+# Fields a bundle section can be narrowed to, as served; skills are a
+# category -> list map and cannot be narrowed
+SELECTABLE_FIELDS = {
+    "projects": set(Project.model_fields) - {"createdAt", "updatedAt"},
+    "experience": set(Experience.model_fields),
+    "contact": set(ContactInfo.model_fields) - {"isActive"},
+}
+
+# Single-section responses, built from the section's raw content
+SNAPSHOTS = {
+    "projects": lambda projects: {"projects": projects, "count": len(projects)},
+    "skills": lambda skills: {"skills": skills},
+    "experience": lambda experience: {"experience": experience, "count": len(experience)},
+    "contact": lambda contact: contact,
+}
+
+async def get_snapshot(section, storage):
+    async def load():
+        body = SNAPSHOTS[section](await get_section(section, storage))
+        return ResponseSnapshot.build(body) if body else None
+
+    return await content_cache.get_or_load(section, load, pinned=True)
+
+def built_from(section):
+    """Match the cache keys of entries built from ``section``"""
+    def matches(key):
+        if key.startswith("bundle:"):
+            return section in key.split(":")[1].split(",")
+        return key in (section, f"data:{section}") or (section == "projects" and key.startswith("project:"))
+    return matches
+
+async def warm_sections(storage):
+    """Build every single-section snapshot ahead of the first request"""
+    await asyncio.gather(*(get_snapshot(section, storage) for section in SECTIONS))
+
+async def refresh_sections(storage, sections):
+    """Reload sections and rebuild the cached entries of those that changed"""
+    missing = object()
+    changed = []
+    for section in sections:
+        data = await SECTIONS[section](storage.content)
+        if data == content_cache.get(f"data:{section}", missing):
+            continue
+        content_cache.discard(built_from(section))
+        content_cache.set(f"data:{section}", data, pinned=True)
+        changed.append(section)
+    
+    # Rebuild now so the next request is a hit; bundles and single projects
+    # are rebuilt on demand
+    for section in changed:
+        await get_snapshot(section, storage)
+    if "projects" in changed or "skills" in changed:
+        await get_search_index(storage)
+    if "projects" in changed:
+        await get_embedding_index(storage)
+    return changed
+
+async def get_search_index(storage):
+    """The search index, synced with the current cached projects and skills"""
+    projects, skills = await asyncio.gather(get_section("projects", storage), get_section("skills", storage))
+    # Cache hits return the same objects, so this is a no-op until content changes
+    search_index.sync(projects, skills)
+    return search_index
+
+async def get_embedding_index(storage):
+    """The embedding index, synced with the current cached projects"""
+    embedding_index.sync(await get_section("projects", storage))
+    return embedding_index
+
+# Responses are cached as pre-encoded snapshots, rebuilt only when content changes
+
+@router.get("/bundle")
+async def get_bundle(
+    request: Request,
+    sections: Optional[str] = Query(None, description="Comma-separated sections, default all"),
+    fields: Optional[str] = Query(None, description="Comma-separated section.field selectors"),
+    storage = Depends(get_storage)
+):
+    """Get all portfolio sections in a single response"""
+    requested = {name.strip() for name in sections.split(",") if name.strip()} if sections else set()
+    names = sorted(requested) if requested else list(SECTIONS)
+    unknown = [name for name in names if name not in SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown sections: {', '.join(unknown)}")
+    
+    selectors = sorted({selector.strip() for selector in fields.split(",") if selector.strip()}) if fields else []
+    selected = {}
+    for selector in selectors:
+        section, _, field = selector.partition(".")
+        if section not in names or field not in SELECTABLE_FIELDS.get(section, ()):
+            raise HTTPException(status_code=400, detail=f"Invalid field selector: {selector}")
+        selected.setdefault(section, set()).add(field)
+
+    async def load():
+        results = await asyncio.gather(*(get_section(name, storage) for name in names))
+        bundle = {}
+        for name, data in zip(names, results):
+            keep = selected.get(name)
+            if keep and isinstance(data, list):
+                data = [{k: v for k, v in item.items() if k in keep} for item in data]
+            elif keep and isinstance(data, dict):
+                data = {k: v for k, v in data.items() if k in keep}
+            bundle[name] = data
+        # Narrowed variants are many and each rarely reused: compress them cheaply
+        return ResponseSnapshot.build(bundle, fast=bool(selectors))
+
+    key = f"bundle:{','.join(names)}:{','.join(selectors)}"
+    snapshot = await content_cache.get_or_load(key, load)
+    return snapshot.respond(request)
+
+@router.get("/search")
+async def search(
+    q: str = Query("", max_length=200),
+    tech: Optional[str] = Query(None, description="Comma-separated tech stack filters, all must match"),
+    limit: int = Query(20, ge=1, le=100),
+    storage = Depends(get_storage)
+):
+    """Search projects and skills, with tech stack facets"""
+    filters = [name.strip() for name in tech.split(",") if name.strip()] if tech else []
+    index = await get_search_index(storage)
+    
+    return FastJSONResponse({"query": q, "tech": filters, **index.search(q, filters, limit)})
+
+@router.get("/semantic-search")
+async def semantic_search(
+    q: str = Query(..., min_length=1, max_length=500),
+    k: int = Query(5, ge=1, le=50),
+    storage = Depends(get_storage)
+):
+    """Find the projects closest in meaning to a free-text query"""
+    index = await get_embedding_index(storage)
+    results = index.search(q, k)
+    
+    return FastJSONResponse({"query": q, "results": results, "count": len(results)})
 
 @router.get("/projects")
-async def get_projects(db = Depends(get_db)):
+async def get_projects(request: Request, storage = Depends(get_storage)):
     """Get all active projects"""
-    projects = await db.projects.find(
-        {"isActive": True},
-        {"_id": 0, "createdAt": 0, "updatedAt": 0}
-    ).sort("order", 1).to_list(100)
-    
-    return {
-        "projects": projects,
-        "count": len(projects)
-    }
+    snapshot = await get_snapshot("projects", storage)
+    return snapshot.respond(request)
 
 @router.get("/projects/{project_id}")
-async def get_project(project_id: int, db = Depends(get_db)):
+async def get_project(project_id: int, request: Request, storage = Depends(get_storage)):
     """Get single project by ID"""
-    project = await db.projects.find_one(
-        {"id": project_id, "isActive": True},
-        {"_id": 0, "createdAt": 0, "updatedAt": 0}
-    )
+    async def load():
+        project = await storage.content.get_project(project_id)
+        # Misses are cached too, so unknown IDs don't reach the database
+        return ResponseSnapshot.build(project) if project else None
+
+    snapshot = await content_cache.get_or_load(f"project:{project_id}", load)
     
-    if not project:
+    if not snapshot:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    return project
+    return snapshot.respond(request)
 
 @router.get("/skills")
-async def get_skills(db = Depends(get_db)):
+async def get_skills(request: Request, storage = Depends(get_storage)):
     """Get all skills grouped by category"""
-    skills_list = await db.skills.find(
-        {"isActive": True},
-        {"_id": 0}
-    ).sort("order", 1).to_list(100)
-    
-    # Convert to grouped format
-    skills_dict = {}
-    for skill in skills_list:
-        skills_dict[skill['category']] = skill['skills']
-    
-    return {"skills": skills_dict}
+    snapshot = await get_snapshot("skills", storage)
+    return snapshot.respond(request)
 
 @router.get("/experience")
-async def get_experience(db = Depends(get_db)):
+async def get_experience(request: Request, storage = Depends(get_storage)):
     """Get all experience/highlights"""
-    experience = await db.experience.find(
-        {"isActive": True},
-        {"_id": 0}
-    ).sort("order", 1).to_list(100)
-    
-    return {
-        "experience": experience,
-        "count": len(experience)
-    }
+    snapshot = await get_snapshot("experience", storage)
+    return snapshot.respond(request)
 
 @router.get("/contact")
-async def get_contact(db = Depends(get_db)):
+async def get_contact(request: Request, storage = Depends(get_storage)):
     """Get contact information"""
-    contact = await db.contact_info.find_one(
-        {"isActive": True},
-        {"_id": 0, "isActive": 0}
-    )
+    snapshot = await get_snapshot("contact", storage)
     
-    if not contact:
+    if not snapshot:
         raise HTTPException(status_code=404, detail="Contact info not found")
     
-    return contact
+    return snapshot.respond(request)
+
+@router.get("/events")
+async def content_updates():
+    """Server-Sent Events stream of ``content-updated`` events"""
+    # Sent first so a reconnecting client can tell whether it missed an update
+    hello = {"version": content_watcher.version, "watching": content_watcher.enabled()}
+    return content_events.response(first=encode_event("hello", hello))
+
+@router.post("/cache/invalidate", dependencies=[Depends(require_admin)])
+async def invalidate_cache(storage = Depends(get_storage)):
+    """Drop cached portfolio content after an out-of-band edit"""
+    # Bump the shared version so every other process drops its copy too
+    content_cache.invalidate(await storage.content.bump_version())
+    if hub_client:
+        # Have the launcher republish the shared snapshot right away
+        await hub_client.refresh_content()
+    return {"success": True, "cache": content_cache.stats()}
+
+@router.get("/cache/stats", dependencies=[Depends(require_admin)])
+async def get_cache_stats():
+    """Get portfolio content cache statistics"""
+    return {
+        **content_cache.stats(),
+        "search": search_index.stats(),
+        "embeddings": embedding_index.stats(),
+        "watcher": content_watcher.stats(),
+    }
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import PlainTextResponse, Response
+from typing import Literal
+from services.admin import require_admin
+from services.profiler import MAX_SAMPLE_SECONDS, ProfilerBusy, render_folded, request_profiles, sample_stacks
+
+router = APIRouter(prefix="/profile", tags=["profiling"], dependencies=[Depends(require_admin)])
+
+@router.get("/stacks")
+async def profile_stacks(
+    seconds: float = Query(10, gt=0, le=MAX_SAMPLE_SECONDS),
+    interval: float = Query(0.005, ge=0.001, le=1),
+    format: Literal["folded", "json"] = "folded"
+):
+    """Sample the event loop's stacks for a while, as folded stacks for flame graphs"""
+    try:
+        stacks = await sample_stacks(seconds, interval)
+    except ProfilerBusy:
+        raise HTTPException(status_code=409, detail="A capture is already running")
+    
+    if format == "json":
+        return {"seconds": seconds, "interval": interval, "samples": sum(stacks.values()), "stacks": stacks}
+    return PlainTextResponse(render_folded(stacks))
+
+@router.get("/requests")
+async def list_request_profiles():
+    """List the kept per-request profiles (send X-Profile: 1 with an admin token to record one)"""
+    return {"profiles": request_profiles.list()}
+
+@router.get("/requests/{profile_id}")
+async def get_request_profile(
+    profile_id: str,
+    format: Literal["text", "pstats"] = "text",
+    sort: Literal["cumulative", "tottime", "calls"] = "cumulative",
+    limit: int = Query(60, ge=1, le=1000)
+):
+    """Get one request's cProfile result, as a report or a .prof file"""
+    entry = request_profiles.get(profile_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    if format == "pstats":
+        return Response(
+            request_profiles.as_pstats(entry),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.prof"'}
+        )
+    return PlainTextResponse(request_profiles.as_text(entry, sort, limit))
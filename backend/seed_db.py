@@ -6,6 +6,9 @@ from motor.motor_asyncio import AsyncIOMotorClient
 import os
 from dotenv import load_dotenv
 from pathlib import Path
+from storage.mongo import bump_content_version
+from services.indexes import ensure_indexes
+from services.embeddings import write_index
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -215,6 +218,21 @@ async def seed_database():
     result = await db.contact_info.insert_one(contact_data)
     print(f"✅ Inserted contact info")
     
+    # Create indexes backing every route query
+    print("🗂️  Ensuring indexes...")
+    report = await ensure_indexes(db)
+    print(f"✅ Created {len(report['created'])} indexes")
+    
+    # Precompute the semantic search index for the active projects, as served
+    print("🧠 Embedding projects...")
+    active = sorted((p for p in projects_data if p.get("isActive")), key=lambda p: p.get("order", 0))
+    path = write_index(active)
+    print(f"✅ Wrote {len(active)} project embeddings to {path}")
+    
+    # Tell running servers to drop their cached content
+    version = await bump_content_version(db)
+    print(f"🔄 Content version bumped to {version}")
+    
     print("\\n✨ Database seeding completed successfully!")
     
     client.close()
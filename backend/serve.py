@@ -0,0 +1,93 @@
+"""
+Multi-worker launcher for the API.
+
+    python serve.py --workers 4 [--host 0.0.0.0] [--port 8001]
+
+Runs ``server:app`` in N uvicorn worker processes, plus a hub in this
+process (``services.worker_hub``) that:
+
+- publishes portfolio content to a snapshot file in shared memory that every
+  worker maps read-only (``storage.shared``)
+- merges the workers' visitor and top-path sketches, live traffic counts and
+  ingest counters over a Unix socket, and persists the sketches
+
+Raw page views and rollups are written by each worker to the database, so
+run multi-worker mode with the MongoDB backend: with ``STORAGE_BACKEND=memory``
+every worker keeps its own rollups.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import threading
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+sys.path.insert(0, str(ROOT_DIR))
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("serve")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with several worker processes")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8001)
+    args = parser.parse_args()
+
+    from storage.shared import default_snapshot_path
+
+    # Workers inherit these and switch to the shared snapshot and the hub
+    pid = os.getpid()
+    os.environ.setdefault('WORKER_HUB_SOCKET', str(default_snapshot_path(f"portfolio-hub-{pid}.sock")))
+    os.environ.setdefault('CONTENT_SNAPSHOT_PATH', str(default_snapshot_path(f"portfolio-content-{pid}.json")))
+    if os.environ.get('STORAGE_BACKEND', 'mongo').lower() == "memory" and args.workers > 1:
+        logger.warning("STORAGE_BACKEND=memory: page view rollups are not shared between workers")
+
+    import uvicorn
+    from services.worker_hub import HubServer
+
+    hub = HubServer(
+        os.environ['WORKER_HUB_SOCKET'],
+        Path(os.environ['CONTENT_SNAPSHOT_PATH']),
+        probe_interval=float(os.environ.get('CONTENT_CACHE_PROBE_SECONDS', '5')),
+    )
+    loop = asyncio.new_event_loop()
+    stop = asyncio.Event()
+    ready = threading.Event()
+    failed = []
+
+    def run_hub():
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(hub.run(ready.set, stop))
+        except Exception as exc:
+            failed.append(exc)
+            ready.set()
+            raise
+
+    thread = threading.Thread(target=run_hub, name="worker-hub", daemon=True)
+    thread.start()
+    ready.wait()
+    if failed:
+        sys.exit(f"Worker hub failed to start: {failed[0]}")
+    logger.info("Worker hub listening on %s", os.environ['WORKER_HUB_SOCKET'])
+
+    try:
+        uvicorn.run("server:app", host=args.host, port=args.port, workers=args.workers, app_dir=str(ROOT_DIR))
+    finally:
+        # Workers have flushed their sketches on shutdown; persist and clean up
+        loop.call_soon_threadsafe(stop.set)
+        thread.join(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
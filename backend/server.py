@@ -1,29 +1,85 @@
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List
+from pydantic import BaseModel, Field, ConfigDict, TypeAdapter, ValidationError, field_validator
+from typing import List, Literal, Optional
+import json
 import uuid
 from datetime import datetime, timezone
 
-# Import route modules
-from routes import portfolio, analytics
-
-
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Import route modules (after .env is loaded, they read settings at import)
+from routes import portfolio, analytics, profiling
+from services.cache import content_cache
+from services.content_watcher import content_events, content_watcher
+from services.cursors import decode_cursor, encode_cursor
+from services.json_response import DefaultJSONResponse, FastJSONResponse
+from services.live_analytics import live_analytics, live_events
+from services.admin import admin_enabled, require_admin
+from services.analytics_sketches import analytics_sketches
+from services.metrics import MetricsMiddleware, registry
+from services.pageview_buffer import pageview_buffer
+from services.profiler import RequestProfilerMiddleware
+from services.report import report_cache
+from services import worker_hub
+from storage.factory import create_storage
+from storage.shared import SharedContentRepository
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One storage backend (MongoDB unless STORAGE_BACKEND says otherwise) per
+    # process, created here and handed to routes through app state
+    storage = create_storage()
+    if worker_hub.enabled() and worker_hub.CONTENT_SNAPSHOT_PATH:
+        # Under serve.py content comes from the snapshot the launcher publishes
+        storage.content = SharedContentRepository(worker_hub.CONTENT_SNAPSHOT_PATH, storage.content)
+    app.state.storage = storage
+    await storage.prepare()
+    
+    # Keep cached content fresh from a background watcher, or else pick up
+    # reseeds from other processes by probing the content version
+    if content_watcher.enabled():
+        await content_watcher.start(storage.content, lambda sections: portfolio.refresh_sections(storage, sections))
+    else:
+        content_cache.set_version_probe(storage.content.get_version)
+    # Build snapshots and search indexes before the first request needs them
+    await portfolio.warm_sections(storage)
+    await portfolio.get_search_index(storage)
+    await portfolio.get_embedding_index(storage)
+    
+    pageview_buffer.start(storage.pageviews)
+    # Sketches and live counts are merged by the launcher in multi-worker mode
+    if worker_hub.hub_client:
+        await worker_hub.hub_client.start()
+    else:
+        await analytics_sketches.start(storage.pageviews)
+        live_analytics.start()
+    try:
+        yield
+    finally:
+        await content_watcher.stop()
+        await live_analytics.stop()
+        # Flush buffered page views before the client goes away
+        await pageview_buffer.stop()
+        if worker_hub.hub_client:
+            await worker_hub.hub_client.stop()
+        else:
+            await analytics_sketches.stop()
+        storage.close()
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=DefaultJSONResponse)
+
+# Dependency to get storage from app state
+def get_storage(request: Request):
+    return request.app.state.storage
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -37,41 +93,240 @@ class StatusCheck(BaseModel):
     client_name: str
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+    @field_validator("timestamp")
+    @classmethod
+    def _assume_utc(cls, value: datetime) -> datetime:
+        # Unmigrated string timestamps may lack an offset; they are UTC, as in migrate_status_timestamps.py
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+# Serializes a page of stored documents in one pydantic-core pass
+STATUS_CHECK_LIST = TypeAdapter(List[StatusCheck])
+
 class StatusCheckCreate(BaseModel):
     client_name: str
 
+class BulkStatusItemResult(BaseModel):
+    index: int
+    ok: bool
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkStatusResult(BaseModel):
+    inserted: int
+    failed: int
+    # Every stored item, but only the first BULK_MAX_ERRORS failures
+    results: List[BulkStatusItemResult]
+    # The NDJSON body went over BULK_MAX_ITEMS or BULK_MAX_BYTES; the rest was not read
+    truncated: bool = False
+
+# Limits for POST /status/bulk
+BULK_MAX_ITEMS = 10000
+BULK_MAX_ERRORS = 100
+BULK_CHUNK_SIZE = 1000
+BULK_MAX_BYTES = 16 * 1024 * 1024
+BULK_MAX_LINE_BYTES = 16 * 1024
+
+# Yielded by _iter_ndjson_items in place of a line over BULK_MAX_LINE_BYTES
+_LINE_TOO_LONG = object()
+
+class _BodyTooLarge(Exception):
+    pass
+
 # Add your routes to the router instead of directly to app
 @api_router.get("/")
 async def root():
     return {"message": "Hello World"}
 
 @api_router.post("/status", response_model=StatusCheck)
-async def create_status_check(input: StatusCheckCreate):
+async def create_status_check(input: StatusCheckCreate, storage = Depends(get_storage)):
     status_dict = input.model_dump()
     status_obj = StatusCheck(**status_dict)
     
-    # Convert to dict and serialize datetime to ISO string for MongoDB
+    # Timestamps are stored as native dates so they can be indexed and range-queried
     doc = status_obj.model_dump()
-    doc['timestamp'] = doc['timestamp'].isoformat()
     
-    _ = await db.status_checks.insert_one(doc)
-    return status_obj
+    _ = await storage.status.insert(doc)
+    return FastJSONResponse(status_obj)
+
+async def _iter_ndjson_items(request: Request):
+    """Parse an NDJSON body line by line as it arrives, with bounded buffering"""
+    buffer = b""
+    skipping = False  # inside a line that was too long, until its newline
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > BULK_MAX_BYTES:
+            raise _BodyTooLarge()
+        *lines, tail = chunk.split(b"\n")
+        for line in lines:
+            line, buffer = buffer + line, b""
+            if skipping:
+                skipping = False
+            elif len(line) > BULK_MAX_LINE_BYTES:
+                yield _LINE_TOO_LONG
+            elif line.strip():
+                yield line
+        if not skipping:
+            buffer += tail
+            if len(buffer) > BULK_MAX_LINE_BYTES:
+                yield _LINE_TOO_LONG
+                buffer, skipping = b"", True
+    if buffer.strip() and not skipping:
+        yield buffer
+
+async def _iter_json_items(request: Request):
+    # The whole array is read and counted before anything is inserted
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > BULK_MAX_BYTES:
+            raise HTTPException(status_code=413, detail=f"Request body exceeds {BULK_MAX_BYTES} bytes")
+    try:
+        items = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of status checks")
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} status checks per request")
+    for item in items:
+        yield item
+
+@api_router.post("/status/bulk", response_model=BulkStatusResult)
+async def create_status_checks_bulk(request: Request, storage = Depends(get_storage)):
+    """Create many status checks from a JSON array or an NDJSON stream.
+
+    Oversized JSON arrays are rejected before anything is stored. NDJSON is
+    stored as it streams in, so reading stops at ``BULK_MAX_ITEMS`` lines or
+    ``BULK_MAX_BYTES`` and the result is marked ``truncated``. Lines over
+    ``BULK_MAX_LINE_BYTES`` fail; only the first ``BULK_MAX_ERRORS`` failures
+    are listed in ``results``, all of them are counted in ``failed``.
+    """
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > BULK_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Request body exceeds {BULK_MAX_BYTES} bytes")
+    ndjson = "ndjson" in request.headers.get("content-type", "")
+    items = _iter_ndjson_items(request) if ndjson else _iter_json_items(request)
+    
+    results = []
+    chunk = []
+    received = 0
+    failed = 0
+    truncated = False
+    
+    def fail(index, error):
+        nonlocal failed
+        failed += 1
+        if failed <= BULK_MAX_ERRORS:
+            results.append(BulkStatusItemResult(index=index, ok=False, error=error))
+    
+    async def flush():
+        nonlocal failed
+        # One unordered insert per chunk; only failed positions come back
+        failed_positions = set(await storage.status.insert_many([doc for _, doc in chunk]))
+        for position, (result, _) in enumerate(chunk):
+            if position in failed_positions:
+                result.ok, result.id, result.error = False, None, "Insert failed"
+                failed += 1
+        chunk.clear()
+    
+    try:
+        async for item in items:
+            if received >= BULK_MAX_ITEMS:
+                # Only NDJSON gets here; JSON arrays are checked up front
+                truncated = True
+                break
+            index, received = received, received + 1
+            if item is _LINE_TOO_LONG:
+                fail(index, f"Line exceeds {BULK_MAX_LINE_BYTES} bytes")
+                continue
+            try:
+                if isinstance(item, bytes):
+                    item = json.loads(item)
+                status_obj = StatusCheck(**StatusCheckCreate.model_validate(item).model_dump())
+            except (ValueError, ValidationError) as exc:
+                fail(index, "; ".join(error["msg"] for error in exc.errors()) if isinstance(exc, ValidationError) else "Invalid JSON")
+                continue
+            
+            result = BulkStatusItemResult(index=index, ok=True, id=status_obj.id)
+            results.append(result)
+            chunk.append((result, status_obj.model_dump()))
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                await flush()
+    except _BodyTooLarge:
+        truncated = True
+    if chunk:
+        await flush()
+    
+    return FastJSONResponse(BulkStatusResult(
+        inserted=received - failed, failed=failed, results=results, truncated=truncated
+    ))
+
+async def _stream_status_checks(storage, after):
+    async for check in storage.status.iter_checks(after):
+        status_obj = StatusCheck.model_validate(check)
+        yield status_obj.__pydantic_serializer__.to_json(status_obj) + b"\n"
+
+def _status_cursor(check) -> str:
+    timestamp = check['timestamp']
+    if isinstance(timestamp, datetime):
+        return encode_cursor(timestamp.isoformat(), check['id'])
+    # Not yet converted by migrate_status_timestamps.py: keep the stored string
+    return encode_cursor({"raw": timestamp}, check['id'])
+
+def _decode_status_cursor(cursor: str):
+    timestamp, check_id = decode_cursor(cursor, 2)
+    if not isinstance(check_id, str):
+        raise ValueError("Malformed cursor")
+    if isinstance(timestamp, dict) and list(timestamp) == ["raw"] and isinstance(timestamp["raw"], str):
+        return timestamp["raw"], check_id
+    if not isinstance(timestamp, str):
+        raise ValueError("Malformed cursor")
+    timestamp = datetime.fromisoformat(timestamp)
+    # Stored timestamps are aware UTC; a naive one cannot be compared with them
+    if timestamp.tzinfo is None:
+        raise ValueError("Cursor timestamp has no timezone")
+    return timestamp, check_id
 
 @api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    # Exclude MongoDB's _id field from the query results
-    status_checks = await db.status_checks.find({}, {"_id": 0}).to_list(1000)
+async def get_status_checks(
+    request: Request,
+    limit: int = Query(1000, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    format: Optional[Literal["json", "ndjson"]] = None,
+    storage = Depends(get_storage),
+):
+    # Keyset pagination on (timestamp, id); the cursor is the last key returned
+    try:
+        after = _decode_status_cursor(cursor) if cursor else None
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     
-    # Convert ISO string timestamps back to datetime objects
-    for check in status_checks:
-        if isinstance(check['timestamp'], str):
-            check['timestamp'] = datetime.fromisoformat(check['timestamp'])
+    # NDJSON streams every check from the cursor on, without buffering
+    if format == "ndjson" or (format is None and "application/x-ndjson" in request.headers.get("accept", "")):
+        return StreamingResponse(_stream_status_checks(storage, after), media_type="application/x-ndjson")
     
-    return status_checks
+    status_checks = await storage.status.page(after, limit + 1)
+    headers = {}
+    if len(status_checks) > limit:
+        status_checks = status_checks[:limit]
+        next_cursor = _status_cursor(status_checks[-1])
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+    
+    # Validated so rows with unmigrated string timestamps come out like the others
+    body = STATUS_CHECK_LIST.dump_json(STATUS_CHECK_LIST.validate_python(status_checks))
+    return Response(body, media_type="application/json", headers=headers)
+
+@api_router.get("/storage/stats", dependencies=[Depends(require_admin)])
+async def get_storage_stats(storage = Depends(get_storage)):
+    """Get storage backend statistics (connection pool utilization for MongoDB)"""
+    return storage.stats()
 
 # Include portfolio and analytics routes
 api_router.include_router(portfolio.router)
 api_router.include_router(analytics.router)
+api_router.include_router(profiling.router)
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -84,13 +339,53 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request cProfile needs an admin token; without one it is not installed at all
+if admin_enabled():
+    app.add_middleware(RequestProfilerMiddleware)
+
+# Outermost, so latency includes every other middleware
+app.add_middleware(MetricsMiddleware)
+
+@registry.collect
+def collect_service_metrics():
+    for name, cache in (("content", content_cache), ("report", report_cache)):
+        stats = cache.stats()
+        labels = {"cache": name}
+        yield "cache_hits_total", "counter", "Cache lookups served from memory", labels, stats["hits"]
+        yield "cache_misses_total", "counter", "Cache lookups that loaded from storage", labels, stats["misses"]
+        yield "cache_hit_ratio", "gauge", "Cache hits over all lookups", labels, stats["hit_ratio"]
+        yield "cache_entries", "gauge", "Entries held in the cache", labels, stats["entries"]
+    
+    for name, broadcaster in (("content", content_events), ("live", live_events)):
+        events = broadcaster.stats()
+        labels = {"stream": name}
+        yield "sse_subscribers", "gauge", "Connected Server-Sent Events clients", labels, events["subscribers"]
+        yield "sse_events_total", "counter", "Events published to SSE clients", labels, events["published"]
+        yield "sse_dropped_total", "counter", "SSE clients dropped for falling behind", labels, events["dropped"]
+        yield "sse_rejected_total", "counter", "SSE connections refused at the subscriber limit", labels, events["rejected"]
+    
+    ingest = pageview_buffer.stats()
+    yield "pageview_buffer_depth", "gauge", "Page views waiting to be written", {}, ingest["queued"]
+    yield "pageview_buffer_capacity", "gauge", "Page view queue capacity", {}, ingest["capacity"]
+    for key in ("accepted", "dropped", "written", "failed"):
+        yield f"pageviews_{key}_total", "counter", f"Page views {key} by the ingest buffer", {}, ingest[key]
+    
+    pool = getattr(app.state, "storage", None) and app.state.storage.stats().get("pool")
+    if pool:
+        yield "db_pool_connections", "gauge", "Open connections in the database pool", {}, pool["open"]
+        yield "db_pool_in_use", "gauge", "Connections checked out of the pool", {}, pool["inUse"]
+        yield "db_pool_max_size", "gauge", "Maximum connections in the pool", {}, pool["maxPoolSize"]
+        yield "db_pool_checkouts_total", "counter", "Connection checkouts", {}, pool["checkouts"]
+        yield "db_pool_checkout_timeouts_total", "counter", "Checkouts that timed out waiting", {}, pool["checkoutTimeouts"]
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics (not under /api, so not routed through the public ingress)"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
@@ -0,0 +1,27 @@
+"""
+Guard for operational endpoints (cache control, profiling, ...).
+
+Admin endpoints are disabled unless ``ADMIN_TOKEN`` is configured, and then
+require the same value in the ``X-Admin-Token`` header.
+"""
+import hmac
+import os
+
+from fastapi import Header, HTTPException
+
+
+def admin_enabled() -> bool:
+    return bool(os.environ.get('ADMIN_TOKEN'))
+
+
+def is_admin_token(token: str) -> bool:
+    expected = os.environ.get('ADMIN_TOKEN')
+    return bool(expected) and hmac.compare_digest(token.encode(), expected.encode())
+
+
+def require_admin(x_admin_token: str = Header(default="")):
+    """Dependency rejecting requests without a valid admin token"""
+    if not admin_enabled():
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
@@ -0,0 +1,172 @@
+"""
+In-memory visitor and heavy-hitter sketches, persisted periodically.
+
+Every accepted page view updates a global HyperLogLog of visitors and a
+Space-Saving summary of paths. Both have a fixed memory footprint whatever
+the traffic. Per-path visitor sketches live in the path rollups
+(``services.rollups``) and are merged there on every flush.
+
+``persist()`` folds the local state into the storage backend (the
+``analytics_sketches`` collection in MongoDB): HLL registers through a
+per-register max and the top-paths summary through an optimistic
+read-merge-write, so several processes can share one copy.
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Optional
+
+from services.rollups import visitor_id
+from services.sketches import HyperLogLog, SpaceSaving
+
+logger = logging.getLogger(__name__)
+
+VISITOR_PRECISION = 12
+
+
+class AnalyticsSketches:
+    def __init__(self, top_capacity: int = 100, persist_interval: float = 10.0):
+        self.top_capacity = top_capacity
+        self.persist_interval = persist_interval
+        self.visitors = HyperLogLog(VISITOR_PRECISION)
+        # Only views since the last persist; the stored summary has the rest
+        self.top_delta = SpaceSaving(top_capacity)
+        self.stored_top = SpaceSaving(top_capacity)
+        self._dirty_registers: Dict[int, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._repo = None
+
+    def observe(self, pageview: Dict[str, Any]):
+        index, rank = self.visitors.position(visitor_id(pageview))
+        if rank > self.visitors.registers.get(index, 0):
+            self.visitors.registers[index] = rank
+            self._dirty_registers[index] = rank
+        self.top_delta.add(pageview["path"])
+
+    async def load(self):
+        await self._load_visitors()
+        await self._load_top()
+
+    async def _load_visitors(self):
+        self.visitors.merge(await self._repo.load_visitor_registers())
+
+    async def _load_top(self) -> int:
+        items, rev = await self._repo.load_top_paths()
+        self.stored_top = SpaceSaving(self.top_capacity)
+        self.stored_top.merge(
+            {item["path"]: item["views"] for item in items},
+            {item["path"]: item["error"] for item in items},
+        )
+        return rev
+
+    async def persist(self):
+        if self._dirty_registers:
+            registers, self._dirty_registers = self._dirty_registers, {}
+            try:
+                await self._repo.merge_visitor_registers(registers)
+            except Exception:
+                self._dirty_registers.update(registers)
+                raise
+        # Pick up what other processes persisted
+        await self._load_visitors()
+
+        if not self.top_delta.counts:
+            return
+        delta, self.top_delta = self.top_delta, SpaceSaving(self.top_capacity)
+        try:
+            if await self._persist_top(delta):
+                return
+        except Exception:
+            self.top_delta.merge(delta.counts, delta.errors)
+            raise
+        # Lost the race repeatedly; keep the delta for the next round
+        self.top_delta.merge(delta.counts, delta.errors)
+        logger.warning("Could not persist top paths summary, retrying later")
+
+    async def _persist_top(self, delta: SpaceSaving) -> bool:
+        for _ in range(5):
+            rev = await self._load_top()
+            self.stored_top.merge(delta.counts, delta.errors)
+            if await self._repo.save_top_paths(self.stored_top.top(self.top_capacity), rev):
+                return True
+        return False
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.persist_interval)
+            try:
+                await self.persist()
+            except Exception:
+                logger.exception("Failed to persist analytics sketches")
+
+    async def start(self, pageviews_repo):
+        self._repo = pageviews_repo
+        await self.load()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self.persist()
+
+    # Multi-worker mode (services.worker_hub): workers ship their deltas to the
+    # hub, which owns persistence, and adopt the hub's merged view in return
+
+    def drain_delta(self) -> Dict[str, Any]:
+        """Hand over everything observed since the last drain"""
+        delta = {
+            "registers": self._dirty_registers,
+            "counts": self.top_delta.counts,
+            "errors": self.top_delta.errors,
+        }
+        self._dirty_registers = {}
+        self.top_delta = SpaceSaving(self.top_capacity)
+        return delta
+
+    def merge_delta(self, delta: Dict[str, Any]):
+        """Fold a drained delta in (hub side, or back in after a failed send)"""
+        registers = {int(index): rank for index, rank in delta["registers"].items()}
+        for index, rank in registers.items():
+            if rank > self.visitors.registers.get(index, 0):
+                self.visitors.registers[index] = rank
+                self._dirty_registers[index] = rank
+        self.top_delta.merge(delta["counts"], delta["errors"])
+
+    def view(self) -> Dict[str, Any]:
+        """The merged state workers adopt"""
+        top = SpaceSaving(self.top_capacity)
+        top.merge(self.stored_top.counts, self.stored_top.errors)
+        top.merge(self.top_delta.counts, self.top_delta.errors)
+        return {"registers": self.visitors.registers, "top": top.top(self.top_capacity)}
+
+    def adopt_view(self, view: Dict[str, Any]):
+        """Replace local state with the hub's view, keeping undelivered observations"""
+        self.visitors = HyperLogLog(VISITOR_PRECISION)
+        self.visitors.merge({int(index): rank for index, rank in view["registers"].items()})
+        self.visitors.merge(self._dirty_registers)
+        self.stored_top = SpaceSaving(self.top_capacity)
+        self.stored_top.merge(
+            {item["path"]: item["views"] for item in view["top"]},
+            {item["path"]: item["error"] for item in view["top"]},
+        )
+
+    def stats(self, top_n: int = 10) -> Dict[str, Any]:
+        top = SpaceSaving(self.top_capacity)
+        top.merge(self.stored_top.counts, self.stored_top.errors)
+        top.merge(self.top_delta.counts, self.top_delta.errors)
+        return {
+            "unique_visitors": self.visitors.count(),
+            "top_paths": top.top(top_n),
+        }
+
+
+analytics_sketches = AnalyticsSketches(
+    top_capacity=int(os.environ.get('TOP_PATHS_CAPACITY', '100')),
+    persist_interval=float(os.environ.get('SKETCH_PERSIST_SECONDS', '10')),
+)
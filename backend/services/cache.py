@@ -0,0 +1,147 @@
+"""
+In-process read-through cache for portfolio content.
+
+Portfolio content only changes when it is reseeded or edited by an admin, so
+reads are served from memory and the database is only consulted on a miss.
+Entries expire after a TTL, the cache is bounded in size (least recently used
+entries are evicted first) and the whole cache can be dropped explicitly.
+Pinned entries (the raw sections and their single-section responses, a fixed
+handful) are never evicted, so many request variants cannot push them out.
+
+Writers bump the storage backend's content version (the ``meta`` collection in
+MongoDB). The cache probes that version at most once every ``probe_interval``
+seconds, so a reseed from another process (``seed_db.py``) becomes visible
+without a restart.
+
+With the content watcher running (``services.content_watcher``) the probe and
+the TTL are switched off: the watcher is told about every change and rebuilds
+only the entries built from the sections that changed (``discard``).
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class ContentCache:
+    """Versioned, TTL-bound, size-bound cache of loaded content"""
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        max_entries: int = 256,
+        probe_interval: float = 5.0,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.probe_interval = probe_interval
+        self.version = 0
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._pinned: Dict[str, tuple] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._version_probe: Optional[Callable[[], Awaitable[int]]] = None
+        self._next_probe = 0.0
+
+    def set_version_probe(self, probe: Optional[Callable[[], Awaitable[int]]]):
+        """Register a coroutine returning the authoritative content version"""
+        self._version_probe = probe
+        self._next_probe = 0.0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entries = self._pinned if key in self._pinned else self._entries
+        entry = entries.get(key)
+        if entry is None:
+            return default
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del entries[key]
+            return default
+        if entries is self._entries:
+            self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, pinned: bool = False):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        if pinned:
+            self._pinned[key] = (value, expires_at)
+            return
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, version: Optional[int] = None):
+        """Drop every entry; loads already in flight will not be stored"""
+        self._entries.clear()
+        self._pinned.clear()
+        self.version = version if version is not None else self.version + 1
+
+    def discard(self, matches: Callable[[str], bool]) -> int:
+        """Drop the entries whose key ``matches``; loads already in flight will not be stored"""
+        dropped = 0
+        for entries in (self._entries, self._pinned):
+            keys = [key for key in entries if matches(key)]
+            for key in keys:
+                del entries[key]
+            dropped += len(keys)
+        self.generation += 1
+        return dropped
+
+    async def _probe_version(self):
+        if self._version_probe is None or time.monotonic() < self._next_probe:
+            return
+        self._next_probe = time.monotonic() + self.probe_interval
+        version = await self._version_probe()
+        if version != self.version:
+            self.invalidate(version)
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]], pinned: bool = False) -> Any:
+        """Return the cached value for ``key``, loading it on a miss.
+
+        Concurrent misses for the same key share a single load. ``pinned``
+        entries are exempt from size-based eviction.
+        """
+        await self._probe_version()
+
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            self.hits += 1
+            return value
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            value = self.get(key, missing)
+            if value is not missing:
+                self.hits += 1
+                return value
+
+            self.misses += 1
+            state = (self.version, self.generation)
+            value = await loader()
+            if state == (self.version, self.generation):
+                self.set(key, value, pinned)
+        self._locks.pop(key, None)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "version": self.version,
+            "ttl": self.ttl or None,
+            "entries": len(self._entries) + len(self._pinned),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+content_cache = ContentCache(
+    ttl=float(os.environ.get('CONTENT_CACHE_TTL', '300')),
+    max_entries=int(os.environ.get('CONTENT_CACHE_MAX_ENTRIES', '256')),
+    probe_interval=float(os.environ.get('CONTENT_CACHE_PROBE_SECONDS', '5')),
+)
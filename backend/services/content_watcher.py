@@ -0,0 +1,172 @@
+"""
+Background watcher that keeps cached portfolio content fresh.
+
+Rather than expiring cached content on a TTL and probing the content version
+on the request path, the watcher learns about changes in the background:
+
+- from a MongoDB change stream on the ``projects``, ``skills``,
+  ``experience`` and ``contact_info`` collections, which also catches edits
+  made without bumping the content version
+- by polling the content version every ``CONTENT_WATCH_POLL_SECONDS`` when
+  change streams are unavailable (standalone MongoDB, the memory backend,
+  the shared snapshot in multi-worker mode)
+
+Changes are coalesced over a short debounce window (a reseed touches every
+collection) and handed to a refresh callback, which reloads the affected
+sections and rebuilds only the cached snapshots built from sections whose
+content actually changed. Sections that changed are announced to connected
+frontends as a ``content-updated`` event on ``content_events``.
+
+While the watcher runs, cached content has no TTL. ``CONTENT_WATCH=poll``
+skips change streams; ``CONTENT_WATCH=off`` keeps the TTL and version probe.
+"""
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, List, Optional, Set
+
+from services.cache import content_cache
+from services.pubsub import Broadcaster
+
+logger = logging.getLogger(__name__)
+
+WATCH_MODE = os.environ.get('CONTENT_WATCH', 'auto').lower()
+POLL_SECONDS = float(os.environ.get('CONTENT_WATCH_POLL_SECONDS', '2'))
+DEBOUNCE_SECONDS = float(os.environ.get('CONTENT_WATCH_DEBOUNCE_SECONDS', '0.25'))
+RETRY_SECONDS = 5.0
+
+# Content collection -> portfolio section
+COLLECTION_SECTIONS = {
+    "projects": "projects",
+    "skills": "skills",
+    "experience": "experience",
+    "contact_info": "contact",
+}
+ALL_SECTIONS = list(COLLECTION_SECTIONS.values())
+
+content_events = Broadcaster(queue_size=int(os.environ.get('CONTENT_EVENTS_QUEUE', '16')))
+
+
+class ContentWatcher:
+    def __init__(self, mode: str = "auto", poll_interval: float = 2.0, debounce: float = 0.25):
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.source: Optional[str] = None
+        self.version: Optional[int] = None
+        self.changes = 0
+        self.refreshes = 0
+        self.failures = 0
+        self.content = None
+        self._on_change = None
+        self._pending: Set[str] = set()
+        self._changed: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._saved = None
+
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    async def start(self, content, on_change: Callable[[List[str]], Awaitable[List[str]]]):
+        """Watch ``content``; ``on_change(sections)`` returns the sections that changed"""
+        self.content = content
+        self._on_change = on_change
+        self._changed = asyncio.Event()
+        self.version = await content.get_version()
+        self.source = "polling" if self.mode == "poll" else "change-stream"
+
+        # Every change is pushed to the cache now, so entries can live forever
+        self._saved = (content_cache.ttl, content_cache._version_probe)
+        content_cache.ttl = 0
+        content_cache.set_version_probe(None)
+        content_cache.version = self.version
+
+        watch = self._poll() if self.mode == "poll" else self._watch()
+        self._tasks = [asyncio.create_task(watch), asyncio.create_task(self._refresh_loop())]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        if self._saved is not None:
+            content_cache.ttl, probe = self._saved
+            content_cache.set_version_probe(probe)
+            self._saved = None
+
+    def _notify(self, sections):
+        self.changes += 1
+        self._pending.update(sections)
+        self._changed.set()
+
+    async def _watch(self):
+        while True:
+            try:
+                async for collection in self.content.watch():
+                    section = COLLECTION_SECTIONS.get(collection)
+                    if section:
+                        self._notify([section])
+            except NotImplementedError:
+                break
+            except Exception:
+                self.failures += 1
+                logger.warning("Content change stream failed, reopening in %ss", RETRY_SECONDS, exc_info=True)
+                await asyncio.sleep(RETRY_SECONDS)
+            # Changes made while no stream was open are unknown; compare everything
+            self._notify(ALL_SECTIONS)
+        logger.info("Change streams unavailable, polling the content version every %ss", self.poll_interval)
+        await self._poll()
+
+    async def _poll(self):
+        self.source = "polling"
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                version = await self.content.get_version()
+            except Exception:
+                self.failures += 1
+                logger.warning("Could not read the content version", exc_info=True)
+                continue
+            if version != self.version:
+                self.version = version
+                # The version does not say what changed; the refresh compares sections
+                self._notify(ALL_SECTIONS)
+
+    async def _refresh_loop(self):
+        while True:
+            await self._changed.wait()
+            await asyncio.sleep(self.debounce)
+            self._changed.clear()
+            sections, self._pending = sorted(self._pending), set()
+            try:
+                version = await self.content.get_version()
+                changed = await self._on_change(sections)
+            except Exception:
+                self.failures += 1
+                logger.exception("Failed to refresh cached content, retrying")
+                self._notify(sections)
+                await asyncio.sleep(RETRY_SECONDS)
+                continue
+            self.refreshes += 1
+            self.version = content_cache.version = version
+            if changed:
+                logger.info("Refreshed cached content for %s", ", ".join(changed))
+                content_events.publish("content-updated", {"sections": changed, "version": version})
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "source": self.source if self._tasks else None,
+            "version": self.version,
+            "changes": self.changes,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "events": content_events.stats(),
+        }
+
+
+content_watcher = ContentWatcher(WATCH_MODE, POLL_SECONDS, DEBOUNCE_SECONDS)
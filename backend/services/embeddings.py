@@ -0,0 +1,162 @@
+"""
+Semantic project search over a local embedding index.
+
+Projects are embedded from their title, description and details with a
+signed hashing vectorizer: word unigrams and bigrams plus character n-grams
+inside words (so "summaries" lands near "summary"), hashed with CRC32 into
+``EMBEDDING_DIM`` float32 dimensions and L2-normalized. It is deterministic,
+CPU-only and needs no model download.
+
+``seed_db.py`` precomputes the matrix into ``EMBEDDING_INDEX_PATH`` (``.npy``)
+with a JSON sidecar holding the project ids and a fingerprint of the embedded
+text. The server memory-maps the file when the fingerprint matches the served
+content and re-embeds in memory otherwise, so a stale file is never used.
+Queries are a single matrix-vector product and a partial sort.
+"""
+import hashlib
+import json
+import logging
+import os
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from services.search import tokenize
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = int(os.environ.get('EMBEDDING_DIM', '512'))
+EMBEDDING_INDEX_PATH = Path(os.environ.get(
+    'EMBEDDING_INDEX_PATH', str(Path(__file__).parent.parent / 'data' / 'project_embeddings.npy')
+))
+CHAR_NGRAMS = (3, 4, 5)
+# field -> weight
+EMBEDDED_FIELDS = {"title": 2.0, "description": 1.0, "details": 1.0}
+
+
+def _features(text: str):
+    """(feature, weight) pairs for one piece of text"""
+    words = tokenize(text)
+    for word in words:
+        yield "w:" + word, 1.0
+        padded = f"<{word}>"
+        for n in CHAR_NGRAMS:
+            for i in range(len(padded) - n + 1):
+                yield "c:" + padded[i:i + n], 0.3
+    for left, right in zip(words, words[1:]):
+        yield f"b:{left} {right}", 0.7
+
+
+def embed_text(text: str, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature, weight in _features(text):
+        digest = zlib.crc32(feature.encode("utf-8"))
+        # Low bits pick the dimension, one high bit the sign, so collisions cancel out on average
+        vector[digest % dim] += weight if digest & 0x80000000 else -weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def embed_project(project: Dict[str, Any], dim: int = EMBEDDING_DIM) -> np.ndarray:
+    vector = np.zeros(dim, dtype=np.float32)
+    for field, weight in EMBEDDED_FIELDS.items():
+        value = project.get(field)
+        vector += weight * embed_text(" ".join(value) if isinstance(value, list) else str(value or ""), dim)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def fingerprint(projects: Sequence[Dict[str, Any]], dim: int = EMBEDDING_DIM) -> str:
+    """Identifies the embedded text (and vectorizer settings) of these projects"""
+    payload = {
+        "dim": dim,
+        "ngrams": CHAR_NGRAMS,
+        "fields": EMBEDDED_FIELDS,
+        "projects": [[project["id"]] + [project.get(field) for field in EMBEDDED_FIELDS] for project in projects],
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _meta_path(path: Path) -> Path:
+    return path.with_suffix(".json")
+
+
+def write_index(projects: Sequence[Dict[str, Any]], path: Path = EMBEDDING_INDEX_PATH) -> Path:
+    """Embed ``projects`` and write the matrix and its sidecar atomically"""
+    matrix = np.stack([embed_project(project) for project in projects]) if projects else np.zeros((0, EMBEDDING_DIM), np.float32)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as handle:
+        np.save(handle, matrix.astype(np.float32))
+    meta = {"ids": [project["id"] for project in projects], "fingerprint": fingerprint(projects), "dim": EMBEDDING_DIM}
+    meta_tmp = _meta_path(path).with_name(_meta_path(path).name + ".tmp")
+    meta_tmp.write_text(json.dumps(meta))
+    # Matrix first: a reader pairing a new sidecar with an old matrix would see a fingerprint mismatch
+    os.replace(tmp, path)
+    os.replace(meta_tmp, _meta_path(path))
+    return path
+
+
+class EmbeddingIndex:
+    def __init__(self, path: Path = EMBEDDING_INDEX_PATH):
+        self.path = path
+        self.matrix: Optional[np.ndarray] = None
+        self.projects: List[Dict[str, Any]] = []
+        self.source = "empty"
+        # The list indexed last, kept alive so the identity check stays valid
+        self._synced: Optional[Sequence[Dict[str, Any]]] = None
+
+    def _load_file(self, expected: str) -> Optional[np.ndarray]:
+        try:
+            meta = json.loads(_meta_path(self.path).read_text())
+            if meta.get("fingerprint") != expected:
+                return None
+            matrix = np.load(self.path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        if matrix.shape != (len(meta["ids"]), EMBEDDING_DIM):
+            return None
+        return matrix
+
+    def sync(self, projects: Sequence[Dict[str, Any]]):
+        """Point the index at ``projects``; a no-op for the list indexed last time"""
+        if projects is self._synced:
+            return
+        expected = fingerprint(projects)
+        matrix = self._load_file(expected)
+        if matrix is not None:
+            self.source = "mmap"
+        else:
+            logger.info("Embedding index file missing or stale, embedding %d projects in memory", len(projects))
+            matrix = np.stack([embed_project(project) for project in projects]) if projects else None
+            self.source = "memory"
+        self.matrix = matrix
+        self.projects = list(projects)
+        self._synced = projects
+
+    def search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        if self.matrix is None or not len(self.projects) or not query.strip():
+            return []
+        scores = self.matrix @ embed_text(query)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        results = []
+        for row in top:
+            project = self.projects[row]
+            results.append({
+                "id": project["id"],
+                "title": project.get("title"),
+                "shortDesc": project.get("shortDesc"),
+                "techStack": project.get("techStack", []),
+                "score": round(float(scores[row]), 4),
+            })
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {"projects": len(self.projects), "dim": EMBEDDING_DIM, "source": self.source}
+
+
+embedding_index = EmbeddingIndex()
@@ -0,0 +1,144 @@
+"""
+Streaming page view export.
+
+Each format is an async generator turning batches from
+``PageViewRepository.iter_range`` into bytes, so memory stays bounded by one
+batch whatever the size of the export. Rows always carry ``id`` and
+``timestamp``; an interrupted export resumes with ``from=<timestamp>`` and
+``after_id=<id>`` of the last row received.
+
+Parquet and Arrow need ``pyarrow``; NDJSON and CSV have no dependencies.
+"""
+import csv
+import io
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List
+
+from services.json_response import dumps
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # columnar formats are optional
+    pa = None
+    pq = None
+
+COLUMNS = ["id", "timestamp", "path", "userAgent", "ip"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+Batches = AsyncIterator[List[Dict[str, Any]]]
+
+
+async def to_ndjson(batches: Batches):
+    async for batch in batches:
+        yield b"".join(dumps({column: row.get(column) for column in COLUMNS}) + b"\n" for row in batch)
+
+
+async def to_csv(batches: Batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    async for batch in batches:
+        for row in batch:
+            timestamp = row.get("timestamp")
+            writer.writerow([
+                row.get("id"),
+                timestamp.isoformat() if isinstance(timestamp, datetime) else timestamp,
+                row.get("path"),
+                row.get("userAgent"),
+                row.get("ip"),
+            ])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _Sink(io.RawIOBase):
+    """Write-only file object whose contents are drained after every batch"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+def _schema():
+    return pa.schema([
+        ("id", pa.string()),
+        ("timestamp", pa.timestamp("ms")),
+        ("path", pa.dictionary(pa.int32(), pa.string())),
+        ("userAgent", pa.dictionary(pa.int32(), pa.string())),
+        ("ip", pa.string()),
+    ])
+
+
+def _record_batch(batch, schema):
+    arrays = []
+    for field in schema:
+        values = [row.get(field.name) for row in batch]
+        if pa.types.is_dictionary(field.type):
+            # path and userAgent repeat heavily; store them dictionary-encoded
+            arrays.append(pa.array(values, type=field.type.value_type).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+async def to_parquet(batches: Batches):
+    """One row group per batch; the footer goes out with the last chunk"""
+    sink = _Sink()
+    schema = _schema()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        async for batch in batches:
+            writer.write_batch(_record_batch(batch, schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+async def to_arrow(batches: Batches):
+    """Arrow IPC stream, one record batch per storage batch"""
+    sink = _Sink()
+    schema = _schema()
+    writer = pa.ipc.new_stream(sink, schema)
+    async for batch in batches:
+        writer.write_batch(_record_batch(batch, schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+ENCODERS = {
+    "ndjson": to_ndjson,
+    "csv": to_csv,
+    "parquet": to_parquet,
+    "arrow": to_arrow,
+}
+
+
+def available(format: str) -> bool:
+    return format in ("ndjson", "csv") or pa is not None
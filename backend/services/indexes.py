@@ -0,0 +1,132 @@
+"""
+Declarative index registry.
+
+Every index a route query relies on is declared here once and applied
+idempotently at startup (``server.py``) and after seeding (``seed_db.py``).
+After applying, a report is logged listing indexes that had to be created,
+TTL indexes whose ``expireAfterSeconds`` was changed in place (``collMod``),
+declared indexes whose keys or other options drifted, and indexes present in
+the database that are not declared (flagging those with no recorded use as
+drop candidates).
+"""
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+logger = logging.getLogger(__name__)
+
+# Raw page views are kept forever unless set. Rollups are not affected by the
+# TTL, but backfill_rollups.py rebuilds them from the raw page views that are
+# left, so it refuses to run while retention is on
+PAGEVIEW_RETENTION_DAYS = int(os.environ.get('PAGEVIEW_RETENTION_DAYS', '0'))
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    collection: str
+    keys: Tuple[Tuple[str, int], ...]
+    name: str
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    def model(self) -> IndexModel:
+        return IndexModel(list(self.keys), name=self.name, **self.options)
+
+
+ACTIVE = {"partialFilterExpression": {"isActive": True}}
+
+INDEXES: List[IndexSpec] = [
+    # {"isActive": True} + sort("order") on every content collection
+    IndexSpec("projects", (("order", ASCENDING),), "active_order", ACTIVE),
+    IndexSpec("skills", (("order", ASCENDING),), "active_order", ACTIVE),
+    IndexSpec("experience", (("order", ASCENDING),), "active_order", ACTIVE),
+    IndexSpec("contact_info", (("isActive", ASCENDING),), "active", ACTIVE),
+    # {"id": project_id, "isActive": True}
+    IndexSpec("projects", (("id", ASCENDING),), "active_id", ACTIVE),
+    # Status checks are paged by (timestamp, id)
+    IndexSpec("status_checks", (("timestamp", ASCENDING), ("id", ASCENDING)), "timestamp_id"),
+    # Raw page views: per-path range scans and retention
+    IndexSpec("pageviews", (("path", ASCENDING), ("timestamp", ASCENDING)), "path_timestamp"),
+    # Exports walk pageviews in (timestamp, _id) order
+    IndexSpec("pageviews", (("timestamp", ASCENDING), ("_id", ASCENDING)), "timestamp_id"),
+    # Only with retention: range scans already use the timestamp_id prefix
+    *([IndexSpec("pageviews", (("timestamp", ASCENDING),), "timestamp_ttl",
+                 {"expireAfterSeconds": PAGEVIEW_RETENTION_DAYS * 86400})] if PAGEVIEW_RETENTION_DAYS else []),
+    # Rollups: stats sort paths by views, timeseries reads bucket ranges
+    IndexSpec("pageview_rollups", (("views", DESCENDING),), "path_views",
+              {"partialFilterExpression": {"kind": "path"}}),
+    IndexSpec("pageview_rollups", (("granularity", ASCENDING), ("path", ASCENDING), ("ts", ASCENDING)),
+              "bucket_range", {"partialFilterExpression": {"kind": "bucket"}}),
+    IndexSpec("pageview_rollups", (("expireAt", ASCENDING),), "bucket_expiry", {"expireAfterSeconds": 0}),
+]
+
+
+def _differs(spec: IndexSpec, existing: Dict[str, Any], ignore: Tuple[str, ...] = ()) -> bool:
+    if tuple((key, int(direction)) for key, direction in existing["key"]) != spec.keys:
+        return True
+    return any(
+        existing.get(option) != value for option, value in spec.options.items() if option not in ignore
+    ) or ("expireAfterSeconds" in existing and "expireAfterSeconds" not in spec.options)
+
+
+def _ttl_changed(spec: IndexSpec, existing: Dict[str, Any]) -> bool:
+    """Only ``expireAfterSeconds`` differs, which collMod can change in place"""
+    return (
+        "expireAfterSeconds" in spec.options
+        and existing.get("expireAfterSeconds") != spec.options["expireAfterSeconds"]
+        and not _differs(spec, existing, ignore=("expireAfterSeconds",))
+    )
+
+
+async def _unused(db, collection: str) -> List[str]:
+    names = []
+    async for stat in db[collection].aggregate([{"$indexStats": {}}]):
+        if stat["name"] != "_id_" and not stat["accesses"]["ops"]:
+            names.append(stat["name"])
+    return names
+
+
+async def ensure_indexes(db, specs: List[IndexSpec] = INDEXES) -> Dict[str, Any]:
+    """Create missing indexes and return (and log) a report"""
+    report = {"created": [], "modified": [], "drifted": [], "undeclared": [], "unused": []}
+    by_collection: Dict[str, List[IndexSpec]] = {}
+    for spec in specs:
+        by_collection.setdefault(spec.collection, []).append(spec)
+
+    for collection, collection_specs in by_collection.items():
+        existing = await db[collection].index_information()
+        missing = []
+        for spec in collection_specs:
+            if spec.name not in existing:
+                missing.append(spec)
+            elif _ttl_changed(spec, existing[spec.name]):
+                await db.command("collMod", collection, index={
+                    "name": spec.name, "expireAfterSeconds": spec.options["expireAfterSeconds"]
+                })
+                report["modified"].append(f"{collection}.{spec.name}")
+            elif _differs(spec, existing[spec.name]):
+                report["drifted"].append(f"{collection}.{spec.name}")
+        if missing:
+            await db[collection].create_indexes([spec.model() for spec in missing])
+            report["created"].extend(f"{collection}.{spec.name}" for spec in missing)
+
+        declared = {spec.name for spec in collection_specs} | {"_id_"}
+        undeclared = [name for name in existing if name not in declared]
+        report["undeclared"].extend(f"{collection}.{name}" for name in undeclared)
+        if undeclared:
+            try:
+                unused = await _unused(db, collection)
+            except Exception:
+                # $indexStats needs extra privileges on some deployments
+                unused = []
+            report["unused"].extend(f"{collection}.{name}" for name in undeclared if name in unused)
+
+    for kind, names in report.items():
+        if names:
+            logger.info("Indexes %s: %s", kind, ", ".join(names))
+    if report["drifted"]:
+        logger.warning("Declared indexes differ from the database, drop them to re-create: %s",
+                       ", ".join(report["drifted"]))
+    return report
@@ -0,0 +1,110 @@
+"""
+Fast JSON encoding for responses.
+
+``dumps`` serializes straight to bytes with orjson (datetimes, UUIDs, numpy
+values and Pydantic models included), and ``FastJSONResponse`` is the app's
+default response class. FastAPI still walks a returned dict with
+``jsonable_encoder`` before the response class sees it, so hot handlers return
+``FastJSONResponse(...)`` themselves to skip that pass. Pydantic models are
+serialized by pydantic-core directly to bytes.
+
+``JSON_ENCODER=stdlib`` restores the previous response path, to compare the
+two in benchmarks: ``FastJSONResponse`` runs ``jsonable_encoder`` and renders
+like Starlette's ``JSONResponse``, which is also the app's default response
+class then. ``dumps`` (SSE events, NDJSON streams) uses the standard library
+encoder. It is also the fallback when orjson is not installed.
+"""
+import datetime
+import json
+import logging
+import os
+import uuid
+from decimal import Decimal
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder always works
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+ENCODER = os.environ.get('JSON_ENCODER', 'orjson').lower()
+if ENCODER == "orjson" and orjson is None:
+    logger.warning("JSON_ENCODER=orjson but orjson is not installed, using the stdlib encoder")
+    ENCODER = "stdlib"
+
+
+def _isoformat(value, utc_z: bool) -> str:
+    text = value.isoformat()
+    return text[:-6] + "Z" if utc_z and text.endswith("+00:00") else text
+
+
+def _common_default(value):
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    # numpy scalars, bson ObjectId and the like
+    if hasattr(value, "item"):
+        return value.item()
+    if type(value).__name__ == "ObjectId":
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _stdlib_default(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return _isoformat(value, False)
+    return _common_default(value)
+
+
+def _stdlib_default_utc_z(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return _isoformat(value, True)
+    return _common_default(value)
+
+
+if ENCODER == "orjson":
+    OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(content: Any, utc_z: bool = False) -> bytes:
+        return orjson.dumps(content, default=_common_default, option=OPTIONS | (orjson.OPT_UTC_Z if utc_z else 0))
+else:
+    def dumps(content: Any, utc_z: bool = False) -> bytes:
+        return json.dumps(
+            content,
+            default=_stdlib_default_utc_z if utc_z else _stdlib_default,
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with ``dumps``.
+
+    ``utc_z`` writes UTC datetimes with a ``Z`` suffix, as Pydantic does.
+    """
+
+    def __init__(self, content: Any, *args, utc_z: bool = False, **kwargs):
+        self.utc_z = utc_z
+        super().__init__(content, *args, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        if ENCODER == "stdlib":
+            return super().render(jsonable_encoder(content))
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        return dumps(content, getattr(self, "utc_z", False))
+
+
+# The app's default response class; FastAPI has already run jsonable_encoder
+# on what a route returns, so stdlib mode renders it as is
+DefaultJSONResponse = FastJSONResponse if ENCODER == "orjson" else JSONResponse
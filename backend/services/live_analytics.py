@@ -0,0 +1,159 @@
+"""
+Live traffic for dashboards, streamed over Server-Sent Events.
+
+``observe`` is called from ``log_pageview`` and only bumps two in-memory
+counters. Once a second a ticker closes the current second, slides a rolling
+window of per-path counts (a minute by default), and publishes one ``pageviews`` frame
+on ``live_events``: the views of the second that just ended plus the top
+paths of the window. The frame is encoded once however many dashboards
+are connected, and frames are only built while at least one is.
+
+New subscribers first receive a ``snapshot`` event with the per-second counts
+of the whole window, so a chart can be drawn without waiting a minute.
+
+In multi-worker mode (``serve.py``) workers do not tick: each hub sync hands
+the paths observed since the last one (``drain``) to the worker hub, which
+keeps the cluster's window in its own ``LiveAnalytics``. The hub's window
+comes back in the sync reply (``view``), and each worker publishes the
+seconds it has not published yet (``adopt_view``), so every dashboard sees
+the whole cluster's traffic, up to ``WORKER_SYNC_SECONDS`` late.
+"""
+import asyncio
+import heapq
+import os
+import time
+from collections import Counter, deque
+from typing import Any, Dict, List, Optional
+
+from services.pubsub import Broadcaster, encode_event
+
+WINDOW_SECONDS = int(os.environ.get('LIVE_WINDOW_SECONDS', '60'))
+TOP_PATHS = int(os.environ.get('LIVE_TOP_PATHS', '10'))
+
+live_events = Broadcaster(
+    queue_size=int(os.environ.get('LIVE_EVENTS_QUEUE', '32')),
+    max_subscribers=int(os.environ.get('LIVE_MAX_SUBSCRIBERS', '1000')),
+)
+
+
+class LiveAnalytics:
+    def __init__(self, window: int = 60, top: int = 10, events: Optional[Broadcaster] = None):
+        self.window = window
+        self.top = top
+        self.events = events
+        self._current: Counter = Counter()
+        # (second, views, per-path counts) for each second in the window
+        self._seconds: deque = deque()
+        self._window_paths: Counter = Counter()
+        self._window_views = 0
+        # The hub's window, adopted in multi-worker mode
+        self._view: Optional[Dict[str, Any]] = None
+        self._published = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def observe(self, pageview: Dict[str, Any]):
+        self._current[pageview.get("path")] += 1
+
+    def drain(self) -> Dict[str, int]:
+        """Per-path views observed since the last drain, for the worker hub"""
+        paths, self._current = self._current, Counter()
+        return dict(paths)
+
+    def merge(self, paths: Dict[str, int]):
+        """Count views observed by another process (or handed back after a failed sync)"""
+        self._current.update(paths)
+
+    def view(self) -> Dict[str, Any]:
+        """The window in a JSON-serialisable form, sent by the hub to workers"""
+        return {
+            "seconds": [[second, views] for second, views, _ in self._seconds],
+            "windowViews": self._window_views,
+            "topPaths": self._top_paths(),
+        }
+
+    def adopt_view(self, view: Dict[str, Any]):
+        """Serve the hub's window and publish the seconds closed since the last view"""
+        first = self._view is None
+        self._view = view
+        latest = [(second, views) for second, views in view["seconds"] if second > self._published]
+        if not latest:
+            return
+        self._published = latest[-1][0]
+        # A worker's first view is history, which new subscribers get in their snapshot
+        if first or self.events is None or not self.events.subscribers:
+            return
+        for second, views in latest:
+            self.events.publish("pageviews", {
+                "ts": second,
+                "views": views,
+                "windowSeconds": self.window,
+                "windowViews": view["windowViews"],
+                "topPaths": view["topPaths"],
+            })
+
+    def _close_second(self, second: int):
+        paths, self._current = self._current, Counter()
+        views = sum(paths.values())
+        self._seconds.append((second, views, paths))
+        self._window_paths.update(paths)
+        self._window_views += views
+        while self._seconds and self._seconds[0][0] <= second - self.window:
+            _, expired_views, expired = self._seconds.popleft()
+            self._window_views -= expired_views
+            self._window_paths.subtract(expired)
+            for path in expired:
+                if self._window_paths[path] <= 0:
+                    del self._window_paths[path]
+        return views
+
+    def _top_paths(self) -> List[Dict[str, Any]]:
+        top = heapq.nlargest(self.top, self._window_paths.items(), key=lambda item: item[1])
+        return [{"path": path, "views": views} for path, views in top]
+
+    def frame(self, second: int, views: int) -> Dict[str, Any]:
+        return {
+            "ts": second,
+            "views": views,
+            "windowSeconds": self.window,
+            "windowViews": self._window_views,
+            "topPaths": self._top_paths(),
+        }
+
+    def snapshot(self) -> bytes:
+        """The ``snapshot`` event sent to a new subscriber"""
+        if self._view is not None:
+            return encode_event("snapshot", {
+                "windowSeconds": self.window,
+                "seconds": [{"ts": second, "views": views} for second, views in self._view["seconds"]],
+                "topPaths": self._view["topPaths"],
+            })
+        return encode_event("snapshot", {
+            "windowSeconds": self.window,
+            "seconds": [{"ts": second, "views": views} for second, views, _ in self._seconds],
+            "topPaths": self._top_paths(),
+        })
+
+    async def _run(self):
+        while True:
+            # Tick on second boundaries so frames line up with wall-clock seconds
+            await asyncio.sleep(1 - time.time() % 1)
+            second = int(time.time()) - 1
+            views = self._close_second(second)
+            if self.events is not None and self.events.subscribers:
+                self.events.publish("pageviews", self.frame(second, views))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+live_analytics = LiveAnalytics(WINDOW_SECONDS, TOP_PATHS, live_events)
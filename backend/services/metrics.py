@@ -0,0 +1,248 @@
+"""
+Prometheus metrics, rendered in the text exposition format at ``/metrics``.
+
+Kept dependency-free and cheap on the hot path: counters and histograms are
+plain dicts keyed by label values, and histogram observations are one bisect
+into the bucket bounds. Cumulative bucket counts are only computed on scrape.
+
+- ``MetricsMiddleware`` (pure ASGI) records per-route latency, request and
+  response sizes, status codes and in-flight requests. Routes are labelled by
+  their path template, so ``/projects/{project_id}`` is one series.
+- ``CommandMetrics`` is a MongoDB command listener timing every database
+  operation by collection and command, whichever code path issued it.
+- Gauges read at scrape time (caches, ingest buffer, connection pool) are
+  registered with ``registry.collect(...)``.
+"""
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        for labels, value in sorted(self.values.items()):
+            yield f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str):
+        self.values[labels] = value
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self.values: Dict[Labels, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def render(self) -> Iterable[str]:
+        for labels, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labels, labels)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Any] = []
+        self.collectors: List[Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]] = []
+        self.lock = threading.Lock()
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def collect(self, collector: Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]):
+        """Register a callable yielding ``(name, kind, help, labels, value)`` at scrape time"""
+        self.collectors.append(collector)
+        return collector
+
+    def render(self) -> str:
+        lines = []
+        with self.lock:
+            for metric in self.metrics:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                lines.extend(metric.render())
+        # Samples of one metric must be contiguous, whatever order collectors yield them in
+        families: Dict[str, list] = {}
+        for collector in self.collectors:
+            for name, kind, help, labels, value in collector():
+                family = families.setdefault(name, [f"# HELP {name} {help}", f"# TYPE {name} {kind}"])
+                family.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        for family in families.values():
+            lines.extend(family)
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route, method and status", ("method", "route", "status")))
+http_latency = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency until the last body chunk", ("method", "route")))
+http_request_size = registry.register(Histogram(
+    "http_request_size_bytes", "HTTP request body size", ("method", "route"), SIZE_BUCKETS))
+http_response_size = registry.register(Histogram(
+    "http_response_size_bytes", "HTTP response body size as sent (after compression)", ("method", "route"), SIZE_BUCKETS))
+http_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests being served"))
+db_latency = registry.register(Histogram(
+    "db_operation_duration_seconds", "Database operation latency by collection and command", ("collection", "operation")))
+db_errors = registry.register(Counter(
+    "db_operation_errors_total", "Failed database operations by collection and command", ("collection", "operation")))
+
+
+class MetricsMiddleware:
+    """Records HTTP metrics; skips lifespan and websocket traffic"""
+
+    def __init__(self, app, exclude: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.exclude = set(exclude)
+        self._routes: Dict[Any, str] = {}
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        route = self._routes.get(endpoint)
+        if route is None:
+            app = scope.get("app")
+            for candidate in getattr(app, "routes", ()):
+                if getattr(candidate, "endpoint", None) is endpoint:
+                    route = candidate.path
+                    break
+            route = self._routes[endpoint] = route or "unmatched"
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        sent = 0
+        received = 0
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            received += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            nonlocal status, sent
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            http_in_flight.dec()
+            method = scope["method"]
+            route = self._route(scope)
+            http_requests.inc(method, route, str(status))
+            http_latency.observe(time.perf_counter() - started, method, route)
+            http_request_size.observe(received, method, route)
+            http_response_size.observe(sent, method, route)
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """MongoDB command timings; driver callbacks run on executor threads"""
+
+    # Commands whose first value is not a collection name
+    ADMIN_COMMANDS = {"ping", "hello", "isMaster", "ismaster", "buildInfo", "endSessions", "saslStart", "saslContinue"}
+
+    def __init__(self):
+        self._collections: Dict[Tuple[Any, int], str] = {}
+
+    def started(self, event):
+        collection = "admin"
+        if event.command_name not in self.ADMIN_COMMANDS:
+            value = event.command.get(event.command_name)
+            if isinstance(value, str):
+                collection = value
+            elif event.command_name == "getMore":
+                collection = event.command.get("collection", "unknown")
+        self._collections[(event.connection_id, event.request_id)] = collection
+
+    def _finish(self, event) -> Optional[str]:
+        return self._collections.pop((event.connection_id, event.request_id), None)
+
+    def succeeded(self, event):
+        collection = self._finish(event)
+        if collection is not None:
+            with registry.lock:
+                db_latency.observe(event.duration_micros / 1e6, collection, event.command_name)
+
+    def failed(self, event):
+        collection = self._finish(event)
+        if collection is not None:
+            with registry.lock:
+                db_latency.observe(event.duration_micros / 1e6, collection, event.command_name)
+                db_errors.inc(collection, event.command_name)
+
+
+command_metrics = CommandMetrics()
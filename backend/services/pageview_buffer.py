@@ -0,0 +1,129 @@
+"""
+Write-behind buffer for page view ingestion.
+
+``POST /api/analytics/pageview`` only enqueues the document; a background task
+drains the queue and writes batches with a single unordered ``insert_many``.
+A batch is flushed when it reaches ``batch_size`` documents or when
+``flush_interval`` seconds have passed since its first document, whichever
+comes first. When the queue is full new page views are dropped and counted,
+which lets the endpoint push back on clients instead of piling up memory.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from services.rollups import apply_rollups
+
+logger = logging.getLogger(__name__)
+
+# Queued by stop() behind any pending page views to end the flusher
+_STOP = object()
+
+
+class PageViewBuffer:
+    def __init__(self, max_size: int = 10000, batch_size: int = 500, flush_interval: float = 1.0):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.accepted = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.rollup_failures = 0
+        self.batches = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._repo = None
+
+    def start(self, pageviews_repo):
+        """Start the background flusher on the running event loop"""
+        self._repo = pageviews_repo
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._task = asyncio.create_task(self._run())
+
+    def offer(self, doc: Dict[str, Any]) -> bool:
+        """Enqueue a page view; returns False if it was dropped"""
+        if self._queue is None:
+            self.dropped += 1
+            return False
+        try:
+            self._queue.put_nowait(doc)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.accepted += 1
+        return True
+
+    async def _next_batch(self) -> Optional[List[Dict[str, Any]]]:
+        """Collect up to ``batch_size`` documents; None once stop() was reached"""
+        item = await self._queue.get()
+        if item is _STOP:
+            return None
+        batch = [item]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is _STOP:
+                # Requeue so the loop exits after this final batch
+                self._queue.put_nowait(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    async def _write(self, batch: List[Dict[str, Any]]):
+        self.batches += 1
+        try:
+            await self._repo.insert_many(batch)
+            self.written += len(batch)
+        except Exception:
+            self.failed += len(batch)
+            logger.exception("Failed to write %d page views", len(batch))
+            return
+        try:
+            await apply_rollups(self._repo, batch)
+        except Exception:
+            # Raw page views are stored; rollups can be rebuilt with backfill_rollups.py
+            self.rollup_failures += 1
+            logger.exception("Failed to update rollups for %d page views", len(batch))
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            if batch is None:
+                return
+            await self._write(batch)
+
+    async def stop(self):
+        """Flush everything still queued, then stop the flusher"""
+        if self._task is None:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "capacity": self.max_size,
+            "accepted": self.accepted,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "rollup_failures": self.rollup_failures,
+            "batches": self.batches,
+        }
+
+
+pageview_buffer = PageViewBuffer(
+    max_size=int(os.environ.get('PAGEVIEW_QUEUE_SIZE', '10000')),
+    batch_size=int(os.environ.get('PAGEVIEW_BATCH_SIZE', '500')),
+    flush_interval=float(os.environ.get('PAGEVIEW_FLUSH_SECONDS', '1.0')),
+)
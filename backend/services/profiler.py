@@ -0,0 +1,178 @@
+"""
+On-demand profiling for production triage.
+
+Two tools, both admin-only and both idle unless asked for:
+
+- ``sample_stacks`` runs a sampling thread for N seconds that reads the event
+  loop thread's current stack (``sys._current_frames``) at a fixed interval
+  and aggregates the samples as folded stacks, the input format of
+  ``flamegraph.pl``, speedscope and most flame graph viewers. The loop keeps
+  serving while it is sampled; time spent waiting in the selector shows up as
+  an ``idle`` frame.
+- ``RequestProfilerMiddleware`` runs ``cProfile`` around a single request that
+  carries ``X-Profile: 1`` and a valid ``X-Admin-Token``. The result is kept
+  in a small ring buffer and its id returned in ``X-Profile-Id``. cProfile
+  sees everything on the loop thread while the request is in flight, including
+  concurrent requests, so it is best used on a quiet instance.
+
+With no ``ADMIN_TOKEN`` the middleware is not installed at all; otherwise it
+costs one header lookup per request.
+"""
+import asyncio
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Dict, Optional
+
+from services.admin import is_admin_token
+
+MAX_SAMPLE_SECONDS = float(os.environ.get('PROFILE_MAX_SECONDS', '60'))
+KEPT_REQUEST_PROFILES = int(os.environ.get('PROFILE_KEEP_REQUESTS', '20'))
+
+# Innermost frames of a loop waiting for I/O
+IDLE_FUNCTIONS = {"select", "poll", "epoll", "kqueue", "_run_once"}
+
+
+class ProfilerBusy(Exception):
+    """Another capture is already running"""
+
+
+_sampling = threading.Lock()
+
+
+def _fold(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    names.reverse()
+    if names and names[-1].split(" ", 1)[0] in IDLE_FUNCTIONS:
+        names.append("idle")
+    return ";".join(names)
+
+
+def _sample(thread_id: int, seconds: float, interval: float) -> Counter:
+    stacks: Counter = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None:
+            stacks[_fold(frame)] += 1
+        del frame
+        time.sleep(interval)
+    return stacks
+
+
+async def sample_stacks(seconds: float, interval: float = 0.005) -> Dict[str, int]:
+    """Sample the calling event loop's thread; folded stack -> sample count"""
+    if not _sampling.acquire(blocking=False):
+        raise ProfilerBusy()
+    try:
+        thread_id = threading.get_ident()
+        return dict(await asyncio.to_thread(_sample, thread_id, min(seconds, MAX_SAMPLE_SECONDS), interval))
+    finally:
+        _sampling.release()
+
+
+def render_folded(stacks: Dict[str, int]) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items(), key=lambda item: -item[1]))
+
+
+class RequestProfiles:
+    """The last few per-request cProfile results"""
+
+    def __init__(self, keep: int):
+        self.keep = keep
+        self.profiles: "OrderedDict[str, dict]" = OrderedDict()
+
+    def add(self, profile_id: str, profile: cProfile.Profile, method: str, path: str, seconds: float):
+        profile.create_stats()
+        self.profiles[profile_id] = {
+            "method": method,
+            "path": path,
+            "seconds": round(seconds, 6),
+            "stats": profile.stats,
+        }
+        while len(self.profiles) > self.keep:
+            self.profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        return self.profiles.get(profile_id)
+
+    def list(self):
+        return [
+            {"id": profile_id, "method": entry["method"], "path": entry["path"], "seconds": entry["seconds"]}
+            for profile_id, entry in reversed(self.profiles.items())
+        ]
+
+    @staticmethod
+    def as_text(entry: dict, sort: str = "cumulative", limit: int = 60) -> str:
+        stream = io.StringIO()
+        stats = pstats.Stats(_StatsSource(entry["stats"]), stream=stream)
+        stats.sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    @staticmethod
+    def as_pstats(entry: dict) -> bytes:
+        """The ``.prof`` file format read by pstats, snakeviz and friends"""
+        return marshal.dumps(entry["stats"])
+
+
+class _StatsSource:
+    """Lets pstats.Stats load a stats dict without a file"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+request_profiles = RequestProfiles(KEPT_REQUEST_PROFILES)
+
+
+class RequestProfilerMiddleware:
+    """cProfile requests that ask for it with ``X-Profile`` and an admin token"""
+
+    def __init__(self, app):
+        self.app = app
+        self._busy = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if self._busy or not any(name == b"x-profile" and value in (b"1", b"true") for name, value in scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+        token = next((value for name, value in scope["headers"] if name == b"x-admin-token"), b"")
+        if not is_admin_token(token.decode("latin-1")):
+            await self.app(scope, receive, send)
+            return
+
+        # cProfile cannot nest on one thread, so one profiled request at a time
+        self._busy = True
+        profile = cProfile.Profile()
+        profile_id = uuid.uuid4().hex[:12]
+        started = time.perf_counter()
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        profile.enable()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile.disable()
+            self._busy = False
+            request_profiles.add(profile_id, profile, scope["method"], scope["path"], time.perf_counter() - started)
@@ -0,0 +1,120 @@
+"""
+In-process publish/subscribe for Server-Sent Events.
+
+A ``Broadcaster`` fans events out to every connected SSE client. Each event is
+encoded once, at publish time, and the same bytes are queued for every
+subscriber. Subscriber queues are bounded: a client that cannot keep up (its
+queue is full) is disconnected rather than allowed to grow memory or slow
+the publisher down. Browsers' ``EventSource`` reconnects on its own after the
+``retry`` delay sent at the start of each stream.
+
+Subscribers only see events published by their own process; in multi-worker
+mode each worker publishes what it observes.
+"""
+import asyncio
+import os
+from typing import Any, Optional, Set
+
+from fastapi.responses import StreamingResponse
+
+from services.json_response import dumps
+
+HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', '15'))
+RETRY_MS = int(os.environ.get('SSE_RETRY_MS', '3000'))
+
+# Queued for a subscriber that has been dropped, ending its stream
+_DROPPED = None
+
+
+def encode_event(event: str, data: Any) -> bytes:
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+class Subscription:
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+
+    def drop(self):
+        """Discard queued events and end the stream"""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(_DROPPED)
+
+
+class Broadcaster:
+    """Fan events out to subscribers through bounded queues"""
+
+    def __init__(self, queue_size: int = 64, max_subscribers: int = 1000):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.subscribers: Set[Subscription] = set()
+        self.published = 0
+        self.dropped = 0
+        self.rejected = 0
+
+    def subscribe(self) -> Optional[Subscription]:
+        """A new subscription, or None when the subscriber limit is reached"""
+        if len(self.subscribers) >= self.max_subscribers:
+            self.rejected += 1
+            return None
+        subscription = Subscription(self.queue_size)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscribers.discard(subscription)
+
+    def publish(self, event: str, data: Any):
+        if not self.subscribers:
+            return
+        message = encode_event(event, data)
+        self.published += 1
+        for subscription in list(self.subscribers):
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # A slow consumer must not hold up the publisher or the others
+                self.unsubscribe(subscription)
+                subscription.drop()
+                self.dropped += 1
+
+    async def stream(self, first: bytes = b""):
+        # Subscribed here rather than by the caller so a stream that never
+        # starts cannot leave a subscription behind
+        subscription = self.subscribe()
+        if subscription is None:
+            return
+        try:
+            yield f"retry: {RETRY_MS}\n\n".encode() + first
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle connection
+                    yield b": keepalive\n\n"
+                    continue
+                if message is _DROPPED:
+                    break
+                yield message
+        finally:
+            # Also runs when the client disconnects and the stream is cancelled
+            self.unsubscribe(subscription)
+
+    def response(self, first: bytes = b"") -> StreamingResponse:
+        """An SSE response streaming this broadcaster's events, 503 when full"""
+        if len(self.subscribers) >= self.max_subscribers:
+            self.rejected += 1
+            return StreamingResponse(iter(()), status_code=503, headers={"Retry-After": str(RETRY_MS // 1000 or 1)})
+        return StreamingResponse(
+            self.stream(first),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    def stats(self):
+        return {
+            "subscribers": len(self.subscribers),
+            "published": self.published,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,257 @@
+"""
+Vectorized analytics reports over a window of raw page views.
+
+A window is loaded batch by batch from ``PageViewRepository.iter_range`` into
+columnar arrays: timestamps as ``datetime64[ms]`` and ``path``, ``userAgent``
+and the visitor key as pandas categoricals, so every metric below is computed
+on integer codes with NumPy instead of looping over documents:
+
+- hour-of-day histogram (UTC)
+- sessions: a visitor (IP + user agent) starts a new session after
+  ``SESSION_GAP`` of inactivity; bounces are single-page-view sessions
+- per path: views, visitors, entries, bounce rate as entry page and dwell
+  time percentiles (time until the visitor's next page view in the session)
+- user agent family breakdown, classifying each distinct user agent once
+- ordered funnels: sessions reaching each step after the previous one
+
+Reports are cached per window in a ``ContentCache`` so dashboard refreshes do
+not reload the window. Column building and the report itself run in worker
+threads (NumPy and pandas release the GIL for most of it), so a large window
+does not stall the event loop.
+"""
+import asyncio
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from services.cache import ContentCache
+
+SESSION_GAP = timedelta(minutes=int(os.environ.get('REPORT_SESSION_GAP_MINUTES', '30')))
+MAX_ROWS = int(os.environ.get('REPORT_MAX_ROWS', '2000000'))
+DWELL_PERCENTILES = (50, 90, 99)
+
+# First match wins, so more specific families come first
+UA_FAMILIES = [
+    ("bot", re.compile(r"bot|crawl|spider|slurp|curl|wget|python|httpx|headless", re.I)),
+    ("edge", re.compile(r"Edg/", re.I)),
+    ("opera", re.compile(r"OPR/|Opera", re.I)),
+    ("samsung", re.compile(r"SamsungBrowser", re.I)),
+    ("chrome", re.compile(r"Chrome/|CriOS/", re.I)),
+    ("firefox", re.compile(r"Firefox/|FxiOS/", re.I)),
+    ("safari", re.compile(r"Safari/", re.I)),
+]
+
+
+def ua_family(user_agent: Optional[str]) -> str:
+    if not user_agent:
+        return "unknown"
+    for family, pattern in UA_FAMILIES:
+        if pattern.search(user_agent):
+            return family
+    return "other"
+
+
+async def load_window(repo, start: datetime, end: datetime, max_rows: int = MAX_ROWS):
+    """Page views with ``start <= timestamp < end`` as a columnar DataFrame.
+
+    Returns ``(frame, truncated)``; at most ``max_rows`` rows are loaded.
+    """
+    timestamps: List[np.ndarray] = []
+    paths: List[Any] = []
+    agents: List[Any] = []
+    visitors: List[Any] = []
+    loaded = 0
+    truncated = False
+    async for batch in repo.iter_range(start, end):
+        if loaded + len(batch) > max_rows:
+            batch = batch[:max_rows - loaded]
+            truncated = True
+        await asyncio.to_thread(_append_columns, batch, timestamps, paths, agents, visitors)
+        loaded += len(batch)
+        if truncated:
+            break
+
+    frame = await asyncio.to_thread(_frame, timestamps, paths, agents, visitors)
+    return frame, truncated
+
+
+def _append_columns(batch, timestamps, paths, agents, visitors):
+    timestamps.append(np.array([row["timestamp"] for row in batch], dtype="datetime64[ms]"))
+    paths.extend(row.get("path") for row in batch)
+    agents.extend(row.get("userAgent") or "" for row in batch)
+    visitors.extend(f"{row.get('ip') or ''}|{row.get('userAgent') or ''}" for row in batch)
+
+
+def _frame(timestamps, paths, agents, visitors):
+    return pd.DataFrame({
+        "timestamp": np.concatenate(timestamps) if timestamps else np.array([], dtype="datetime64[ms]"),
+        "path": pd.Categorical(paths),
+        "userAgent": pd.Categorical(agents),
+        "visitor": pd.Categorical(visitors),
+    })
+
+
+def _hourly(ts_ms: np.ndarray) -> List[int]:
+    hours = (ts_ms // 3_600_000) % 24
+    return np.bincount(hours, minlength=24).tolist()
+
+
+def _sessions(visitor: np.ndarray, ts_ms: np.ndarray, gap_ms: int):
+    """Sort by (visitor, timestamp) and label sessions.
+
+    Returns ``(order, session, first, last)``: the sort order, the session
+    number of every sorted row and masks of each session's first/last row.
+    """
+    order = np.lexsort((ts_ms, visitor))
+    visitor, ts_ms = visitor[order], ts_ms[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = (visitor[1:] != visitor[:-1]) | (np.diff(ts_ms) > gap_ms)
+    session = np.cumsum(first) - 1
+    last = np.ones(len(order), dtype=bool)
+    last[:-1] = first[1:]
+    return order, session, first, last
+
+
+def _paths(frame, order, first, last, ts_ms, top: int) -> List[Dict[str, Any]]:
+    names = frame["path"].cat.categories
+    codes = frame["path"].cat.codes.to_numpy()
+    n_paths = len(names)
+    views = np.bincount(codes, minlength=n_paths)
+
+    # Distinct visitors per path: unique (path, visitor) pairs
+    n_visitors = len(frame["visitor"].cat.categories)
+    pairs = np.unique(codes.astype(np.int64) * n_visitors + frame["visitor"].cat.codes.to_numpy())
+    visitors = np.bincount(pairs // n_visitors, minlength=n_paths)
+
+    sorted_codes = codes[order]
+    entries = np.bincount(sorted_codes[first], minlength=n_paths)
+    bounces = np.bincount(sorted_codes[first & last], minlength=n_paths)
+
+    # Dwell time: gap to the next view of the same session, unknown for the last view
+    sorted_ts = ts_ms[order]
+    has_next = ~last
+    dwell_codes = sorted_codes[has_next]
+    dwell = (sorted_ts[1:] - sorted_ts[:-1])[has_next[:-1]] / 1000.0
+
+    ranked = np.argsort(-views, kind="stable")[:top]
+    dwell_by_path = {}
+    if len(dwell):
+        by_code = np.argsort(dwell_codes, kind="stable")
+        bounds = np.searchsorted(dwell_codes[by_code], ranked)
+        ends = np.searchsorted(dwell_codes[by_code], ranked, side="right")
+        for code, lo, hi in zip(ranked, bounds, ends):
+            if hi > lo:
+                values = np.percentile(dwell[by_code[lo:hi]], DWELL_PERCENTILES)
+                dwell_by_path[code] = {f"p{p}": round(float(v), 3) for p, v in zip(DWELL_PERCENTILES, values)}
+
+    return [
+        {
+            "path": names[code],
+            "views": int(views[code]),
+            "visitors": int(visitors[code]),
+            "entries": int(entries[code]),
+            "bounceRate": round(float(bounces[code] / entries[code]), 4) if entries[code] else None,
+            "dwellSeconds": dwell_by_path.get(code),
+        }
+        for code in ranked if views[code]
+    ]
+
+
+def _user_agents(frame) -> List[Dict[str, Any]]:
+    column = frame["userAgent"]
+    # Classify distinct user agents only, then count through their codes
+    families = pd.Categorical([ua_family(agent) for agent in column.cat.categories])
+    per_agent = np.bincount(column.cat.codes.to_numpy(), minlength=len(column.cat.categories))
+    per_family = np.bincount(families.codes, weights=per_agent, minlength=len(families.categories))
+    total = per_agent.sum()
+    return sorted(
+        (
+            {"family": family, "views": int(views), "share": round(float(views / total), 4)}
+            for family, views in zip(families.categories, per_family) if views
+        ),
+        key=lambda item: -item["views"],
+    )
+
+
+def _funnel(frame, order, session, ts_ms, steps: Sequence[str]) -> List[Dict[str, Any]]:
+    """Sessions that hit every step in order, each at or after the previous one"""
+    n_sessions = int(session[-1]) + 1
+    categories = frame["path"].cat.categories
+    sorted_codes = frame["path"].cat.codes.to_numpy()[order]
+    sorted_ts = ts_ms[order]
+
+    never = np.iinfo(np.int64).max
+    reached_at = np.full(n_sessions, np.iinfo(np.int64).min)
+    counts = []
+    for step in steps:
+        hit_at = np.full(n_sessions, never)
+        if step in categories:
+            mask = (sorted_codes == categories.get_loc(step)) & (sorted_ts >= reached_at[session])
+            np.minimum.at(hit_at, session[mask], sorted_ts[mask])
+        counts.append(int((hit_at != never).sum()))
+        # Sessions that missed this step keep ``never`` and cannot reach the next one
+        reached_at = hit_at
+    return [
+        {
+            "path": step,
+            "sessions": count,
+            "conversion": round(count / counts[0], 4) if counts[0] else 0.0,
+        }
+        for step, count in zip(steps, counts)
+    ]
+
+
+def build_report(frame, funnel: Sequence[str] = (), top: int = 20) -> Dict[str, Any]:
+    ts_ms = frame["timestamp"].to_numpy().astype("datetime64[ms]").astype(np.int64)
+    report: Dict[str, Any] = {"views": len(frame)}
+    if not len(frame):
+        report.update({
+            "visitors": 0,
+            "hourly": [0] * 24,
+            "sessions": {"count": 0, "bounceRate": None, "avgViews": None},
+            "paths": [],
+            "userAgents": [],
+        })
+        if funnel:
+            report["funnel"] = [{"path": step, "sessions": 0, "conversion": 0.0} for step in funnel]
+        return report
+
+    visitor = frame["visitor"].cat.codes.to_numpy()
+    order, session, first, last = _sessions(visitor, ts_ms, SESSION_GAP // timedelta(milliseconds=1))
+    n_sessions = int(session[-1]) + 1
+
+    report["visitors"] = int(len(np.unique(visitor)))
+    report["hourly"] = _hourly(ts_ms)
+    report["sessions"] = {
+        "count": n_sessions,
+        "bounceRate": round(float((first & last).sum() / n_sessions), 4),
+        "avgViews": round(len(frame) / n_sessions, 3),
+    }
+    report["paths"] = _paths(frame, order, first, last, ts_ms, top)
+    report["userAgents"] = _user_agents(frame)
+    if funnel:
+        report["funnel"] = _funnel(frame, order, session, ts_ms, funnel)
+    return report
+
+
+async def window_report(repo, start: datetime, end: datetime, funnel: Sequence[str] = (), top: int = 20):
+    """Cached report for one window; identical queries share a single load"""
+    key = f"report:{start.isoformat()}:{end.isoformat()}:{top}:{','.join(funnel)}"
+
+    async def load():
+        frame, truncated = await load_window(repo, start, end)
+        report = await asyncio.to_thread(build_report, frame, funnel, top)
+        report["truncated"] = truncated
+        return report
+
+    return await report_cache.get_or_load(key, load)
+
+
+report_cache = ContentCache(
+    ttl=float(os.environ.get('REPORT_CACHE_TTL', '60')),
+    max_entries=int(os.environ.get('REPORT_CACHE_MAX_ENTRIES', '64')),
+)
@@ -0,0 +1,156 @@
+"""
+Incremental page view rollups.
+
+Every flushed batch of page views is pre-aggregated into a ``RollupDelta`` and
+folded into the storage backend's rollups, so reading stats never scans the
+raw page views:
+
+- the all-time view count
+- per path: views and a HyperLogLog sketch of unique visitors
+- per minute/hour/day bucket: views for one path, and for all paths combined
+  under ``*``. Minute buckets expire after ``MINUTE_BUCKET_RETENTION_DAYS``.
+
+Backends apply counters as increments and sketches as a per-register max, so
+concurrent writers (several workers, a backfill) never lose updates. See
+``storage.mongo`` for the document layout in MongoDB.
+"""
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from services.sketches import HyperLogLog
+
+HLL_PRECISION = 10
+ALL_PATHS = "*"
+GRANULARITIES = ("minute", "hour", "day")
+BUCKET_SIZES = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+MINUTE_BUCKET_RETENTION = timedelta(days=int(os.environ.get('MINUTE_BUCKET_RETENTION_DAYS', '14')))
+
+
+def visitor_id(pageview: Dict[str, Any]) -> str:
+    """Visitors are approximated by client IP and user agent"""
+    return f"{pageview.get('ip') or ''}|{pageview.get('userAgent') or ''}"
+
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    if granularity == "minute":
+        return timestamp.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+@dataclass
+class RollupDelta:
+    """Everything one batch adds to the rollups"""
+    total: int = 0
+    path_views: Dict[str, int] = field(default_factory=Counter)
+    path_registers: Dict[str, Dict[int, int]] = field(default_factory=lambda: defaultdict(dict))
+    bucket_views: Dict[Tuple[str, str, datetime], int] = field(default_factory=Counter)
+
+
+def aggregate_batch(pageviews: Iterable[Dict[str, Any]]) -> RollupDelta:
+    """Pre-aggregate a batch so each touched rollup is updated once"""
+    delta = RollupDelta()
+    hll = HyperLogLog(HLL_PRECISION)
+
+    for pageview in pageviews:
+        path = pageview["path"]
+        delta.total += 1
+        delta.path_views[path] += 1
+
+        index, rank = hll.position(visitor_id(pageview))
+        registers = delta.path_registers[path]
+        if rank > registers.get(index, 0):
+            registers[index] = rank
+
+        for granularity in GRANULARITIES:
+            start = bucket_start(pageview["timestamp"], granularity)
+            delta.bucket_views[(granularity, ALL_PATHS, start)] += 1
+            delta.bucket_views[(granularity, path, start)] += 1
+    return delta
+
+
+async def apply_rollups(pageviews_repo, pageviews: List[Dict[str, Any]]):
+    delta = aggregate_batch(pageviews)
+    if delta.total:
+        await pageviews_repo.apply_rollups(delta)
+
+
+async def read_stats(pageviews_repo, limit: int = 100) -> Dict[str, Any]:
+    """Assemble stats from rollups only"""
+    path_docs = await pageviews_repo.top_path_rollups(limit)
+
+    today = bucket_start(datetime.utcnow(), "day")
+    day_docs = await pageviews_repo.buckets("day", ALL_PATHS, today - timedelta(days=6), today + timedelta(days=1))
+
+    return {
+        "total_views": await pageviews_repo.total_views(),
+        "unique_paths": await pageviews_repo.count_paths(),
+        "paths": [doc["path"] for doc in path_docs],
+        "path_stats": [
+            {
+                "path": doc["path"],
+                "views": doc["views"],
+                "unique_visitors": HyperLogLog.from_stored(doc.get("hll"), HLL_PRECISION).count(),
+            }
+            for doc in path_docs
+        ],
+        "views_by_day": [{"day": doc["ts"].date().isoformat(), "views": doc["views"]} for doc in day_docs],
+    }
+
+
+async def read_timeseries(
+    pageviews_repo, start: datetime, end: datetime, granularity: str, path: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Views per bucket in ``[start, end)``, zero-filled"""
+    first = bucket_start(start, granularity)
+    docs = await pageviews_repo.buckets(granularity, path or ALL_PATHS, first, end)
+    views = {doc["ts"]: doc["views"] for doc in docs}
+
+    points = []
+    step = BUCKET_SIZES[granularity]
+    ts = first
+    while ts < end:
+        points.append({"ts": ts, "views": views.get(ts, 0)})
+        ts += step
+    return points
+
+
+async def recent_ingest(pageviews_repo, window: timedelta) -> bool:
+    """Whether any page view was stored within the last ``window``"""
+    async for batch in pageviews_repo.iter_range(datetime.utcnow() - window, None, batch_size=1):
+        if batch:
+            return True
+    return False
+
+
+async def backfill(pageviews_repo, batch_size: int = 1000) -> int:
+    """Rebuild all rollups from the raw page views.
+
+    Only safe while no page views are being ingested: a batch flushed during
+    the rebuild is folded into the rollups and may also be counted by the
+    scan, so it would be counted twice (see ``recent_ingest``).
+
+    Views already expired by ``PAGEVIEW_RETENTION_DAYS`` are lost from every
+    rollup, all-time totals included.
+    """
+    await pageviews_repo.clear_rollups()
+    processed = 0
+    batch = []
+    async for pageview in pageviews_repo.iter_pageviews():
+        batch.append(pageview)
+        if len(batch) >= batch_size:
+            await apply_rollups(pageviews_repo, batch)
+            processed += len(batch)
+            batch = []
+    if batch:
+        await apply_rollups(pageviews_repo, batch)
+        processed += len(batch)
+    return processed
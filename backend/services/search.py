@@ -0,0 +1,203 @@
+"""
+In-memory full-text search over projects and skills.
+
+Projects and skill categories are tokenized into an inverted index
+(``term -> {document: weighted term frequency}``) and ranked with BM25. Fields
+carry different weights, so a match in a title or tech stack counts more than
+one in a details bullet. Tech stack entries (and a category's skills) are
+also kept as facets: results can be filtered on them and the response counts
+them across the matches.
+
+The index is synced from the cached portfolio sections. Every document has a
+fingerprint, so after a content change only documents that were added,
+removed or edited are re-indexed.
+"""
+import hashlib
+import json
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Keeps tokens like "c++", "c#" and "node.js" whole
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+# field -> weight (term frequency multiplier)
+PROJECT_FIELDS = {"title": 3, "techStack": 3, "shortDesc": 2, "description": 1, "details": 1, "impact": 1}
+SKILL_FIELDS = {"category": 3, "skills": 3}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    return [token.rstrip(".") for token in TOKEN_RE.findall(text.lower())]
+
+
+def _text(value: Any) -> str:
+    return " ".join(value) if isinstance(value, list) else str(value or "")
+
+
+def _fingerprint(document: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(document, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class SearchIndex:
+    def __init__(self):
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.fingerprints: Dict[str, str] = {}
+        self.lengths: Dict[str, int] = {}
+        self.terms: Dict[str, List[str]] = {}
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.facets: Dict[str, set] = defaultdict(set)
+        self.facet_names: Dict[str, str] = {}
+        self.total_length = 0
+        self.reindexed = 0
+        # The section objects indexed last, kept alive so identity checks stay valid
+        self._source: Optional[Tuple[Sequence[Dict[str, Any]], Dict[str, List[str]]]] = None
+
+    # Indexing
+
+    def _add(self, key: str, document: Dict[str, Any], fields: Dict[str, int], tech: Iterable[str]):
+        frequencies = Counter()
+        for field, weight in fields.items():
+            for token in tokenize(_text(document.get(field))):
+                frequencies[token] += weight
+        for term, frequency in frequencies.items():
+            self.postings[term][key] = frequency
+        self.terms[key] = list(frequencies)
+        length = sum(frequencies.values())
+        self.lengths[key] = length
+        self.total_length += length
+        for name in tech:
+            facet = name.lower()
+            self.facet_names.setdefault(facet, name)
+            self.facets[facet].add(key)
+
+    def _remove(self, key: str):
+        for term in self.terms.pop(key):
+            postings = self.postings[term]
+            del postings[key]
+            if not postings:
+                del self.postings[term]
+        for name in self.documents[key]["tech"]:
+            facet = name.lower()
+            keys = self.facets.get(facet)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.facets[facet]
+                    self.facet_names.pop(facet, None)
+        self.total_length -= self.lengths.pop(key)
+        del self.documents[key]
+        del self.fingerprints[key]
+
+    def update(self, projects: Sequence[Dict[str, Any]], skills: Dict[str, List[str]]) -> int:
+        """Re-index documents that changed; return how many were touched"""
+        incoming = {}
+        for project in projects:
+            incoming[f"project:{project['id']}"] = ("project", project, PROJECT_FIELDS, project.get("techStack") or [])
+        for category, names in skills.items():
+            skill = {"category": category, "skills": names}
+            incoming[f"skill:{category}"] = ("skill", skill, SKILL_FIELDS, names)
+
+        touched = 0
+        for key in [key for key in self.documents if key not in incoming]:
+            self._remove(key)
+            touched += 1
+        for key, (kind, source, fields, tech) in incoming.items():
+            fingerprint = _fingerprint(source)
+            if self.fingerprints.get(key) == fingerprint:
+                continue
+            if key in self.documents:
+                self._remove(key)
+            self._add(key, source, fields, tech)
+            self.documents[key] = {
+                "kind": kind,
+                "source": source,
+                "tech": list(tech),
+            }
+            self.fingerprints[key] = fingerprint
+            touched += 1
+        self.reindexed += touched
+        return touched
+
+    def sync(self, projects: Sequence[Dict[str, Any]], skills: Dict[str, List[str]]) -> int:
+        """``update`` unless these are the very section objects indexed last time"""
+        if self._source is not None and self._source[0] is projects and self._source[1] is skills:
+            return 0
+        touched = self.update(projects, skills)
+        self._source = (projects, skills)
+        return touched
+
+    # Querying
+
+    def _scores(self, terms: List[str]) -> Dict[str, float]:
+        count = len(self.documents)
+        average = self.total_length / count if count else 0.0
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for key, frequency in postings.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[key] / average)
+                scores[key] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+        return scores
+
+    def search(self, query: str = "", tech: Sequence[str] = (), limit: int = 20) -> Dict[str, Any]:
+        terms = tokenize(query)
+        if terms:
+            scores = self._scores(terms)
+        else:
+            scores = dict.fromkeys(self.documents, 0.0)
+
+        # Every requested tech must be present
+        for name in tech:
+            allowed = self.facets.get(name.lower(), set())
+            scores = {key: score for key, score in scores.items() if key in allowed}
+
+        facet_counts = Counter(
+            facet for key in scores for facet in {name.lower() for name in self.documents[key]["tech"]}
+        )
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+        results = []
+        for key, score in ranked:
+            document = self.documents[key]
+            source = document["source"]
+            if document["kind"] == "project":
+                result = {
+                    "type": "project",
+                    "id": source["id"],
+                    "title": source.get("title"),
+                    "shortDesc": source.get("shortDesc"),
+                    "techStack": source.get("techStack", []),
+                }
+            else:
+                result = {"type": "skill", "category": source["category"], "skills": source["skills"]}
+            result["score"] = round(score, 4)
+            results.append(result)
+
+        return {
+            "count": len(scores),
+            "results": results,
+            "facets": {
+                "tech": [
+                    {"value": self.facet_names[facet], "count": count}
+                    for facet, count in sorted(facet_counts.items(), key=lambda item: (-item[1], item[0]))
+                ]
+            },
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self.documents),
+            "terms": len(self.postings),
+            "facets": len(self.facets),
+            "reindexed": self.reindexed,
+        }
+
+
+search_index = SearchIndex()
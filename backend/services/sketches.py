@@ -0,0 +1,116 @@
+"""
+Probabilistic sketches for analytics with bounded memory.
+"""
+import hashlib
+import math
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+def hash64(value: str) -> int:
+    """Stable 64-bit hash (Python's hash() is salted per process)"""
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """HyperLogLog cardinality estimator with sparse registers.
+
+    Registers are kept as ``{index: rank}`` so a sketch over a handful of
+    visitors stays small, and merging two sketches is a per-register max. That
+    also makes it possible to merge into MongoDB with ``$max`` on
+    ``<field>.<index>`` without reading the stored sketch first.
+    """
+
+    def __init__(self, precision: int = 10, registers: Dict[int, int] = None):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers: Dict[int, int] = dict(registers or {})
+
+    def position(self, value: str) -> Tuple[int, int]:
+        """Return the (register index, rank) that ``value`` maps to"""
+        h = hash64(value)
+        bits = 64 - self.precision
+        index = h >> bits
+        rest = h & ((1 << bits) - 1)
+        return index, bits - rest.bit_length() + 1
+
+    def add(self, value: str):
+        index, rank = self.position(value)
+        if rank > self.registers.get(index, 0):
+            self.registers[index] = rank
+
+    def merge(self, registers: Dict[int, int]):
+        for index, rank in registers.items():
+            index = int(index)
+            if rank > self.registers.get(index, 0):
+                self.registers[index] = rank
+
+    @classmethod
+    def from_stored(cls, stored: Dict[str, int], precision: int = 10) -> "HyperLogLog":
+        """Rebuild from a registers mapping read back from MongoDB (string keys)"""
+        return cls(precision, {int(index): rank for index, rank in (stored or {}).items()})
+
+    def to_stored(self) -> Dict[str, int]:
+        return {str(index): rank for index, rank in self.registers.items()}
+
+    def count(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        zeros = m - len(self.registers)
+        harmonic = zeros + sum(2.0 ** -rank for rank in self.registers.values())
+        estimate = alpha * m * m / harmonic
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is far more accurate for small cardinalities
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+def merged_count(sketches: Iterable[Dict[str, int]], precision: int = 10) -> int:
+    """Cardinality of the union of several stored sketches"""
+    hll = HyperLogLog(precision)
+    for stored in sketches:
+        hll.merge(stored or {})
+    return hll.count()
+
+
+class SpaceSaving:
+    """Space-Saving heavy hitters summary over at most ``capacity`` items.
+
+    Counts are upper bounds; ``errors`` holds how much of each count may have
+    been inherited from an evicted item. Any item with true frequency above
+    N / capacity is guaranteed to be tracked.
+    """
+
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+
+    def add(self, item: str, count: int = 1):
+        if item in self.counts:
+            self.counts[item] += count
+            return
+        if len(self.counts) < self.capacity:
+            self.counts[item] = count
+            self.errors[item] = 0
+            return
+        # Replace the minimum; the newcomer inherits its count as error
+        victim = min(self.counts, key=self.counts.get)
+        floor = self.counts.pop(victim)
+        self.errors.pop(victim, None)
+        self.counts[item] = floor + count
+        self.errors[item] = floor
+
+    def merge(self, counts: Dict[str, int], errors: Dict[str, int] = None):
+        """Fold another summary in, keeping the ``capacity`` largest counts"""
+        errors = errors or {}
+        for item, count in counts.items():
+            self.counts[item] = self.counts.get(item, 0) + count
+            self.errors[item] = self.errors.get(item, 0) + errors.get(item, 0)
+        if len(self.counts) > self.capacity:
+            for item in sorted(self.counts, key=self.counts.get)[:len(self.counts) - self.capacity]:
+                del self.counts[item]
+                self.errors.pop(item, None)
+
+    def top(self, n: int = 10) -> List[Dict[str, Any]]:
+        ranked = sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[:n]
+        return [{"path": item, "views": count, "error": self.errors.get(item, 0)} for item, count in ranked]
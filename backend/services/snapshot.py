@@ -0,0 +1,74 @@
+"""
+Immutable, pre-serialized response snapshots.
+
+A snapshot holds the JSON body of a response together with its gzip and
+brotli variants and a strong ETag, all computed once when content is loaded.
+Serving a snapshot is then only content negotiation: no encoding, no
+compression, and a 304 for clients that already hold the current body.
+"""
+import gzip
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from fastapi import Request
+from starlette.responses import Response
+
+from services.json_response import dumps
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Revalidate on every use: content changes are pushed to open pages
+# (content-updated events), and a refetch must not get a stale copy from the
+# browser cache. The ETag keeps revalidation a cheap 304.
+CACHE_CONTROL = "public, no-cache"
+
+
+@dataclass(frozen=True)
+class ResponseSnapshot:
+    body: bytes
+    gzip_body: bytes
+    br_body: Optional[bytes]
+    etag: str
+
+    @classmethod
+    def build(cls, content: Any, fast: bool = False) -> "ResponseSnapshot":
+        """``fast`` trades ratio for build time, for variants that are rarely reused"""
+        body = dumps(content)
+        return cls(
+            body=body,
+            gzip_body=gzip.compress(body, compresslevel=6 if fast else 9, mtime=0),
+            br_body=brotli.compress(body, quality=5 if fast else 11) if brotli else None,
+            etag='"%s"' % hashlib.sha256(body).hexdigest()[:32],
+        )
+
+    def not_modified(self, request: Request) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if not if_none_match:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or self.etag in tags or f"W/{self.etag}" in tags
+
+    def respond(self, request: Request) -> Response:
+        """Build a response for ``request`` from the pre-encoded variants"""
+        headers = {
+            "ETag": self.etag,
+            "Cache-Control": CACHE_CONTROL,
+            "Vary": "Accept-Encoding",
+        }
+        if self.not_modified(request):
+            return Response(status_code=304, headers=headers)
+
+        accept_encoding = request.headers.get("accept-encoding", "")
+        if self.br_body is not None and "br" in accept_encoding:
+            headers["Content-Encoding"] = "br"
+            body = self.br_body
+        elif "gzip" in accept_encoding:
+            headers["Content-Encoding"] = "gzip"
+            body = self.gzip_body
+        else:
+            body = self.body
+        return Response(content=body, media_type="application/json", headers=headers)
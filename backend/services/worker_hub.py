@@ -0,0 +1,227 @@
+"""
+Cross-worker coordination for multi-worker mode (``serve.py``).
+
+The launcher process runs a ``HubServer`` next to the uvicorn workers. It
+owns the storage-facing singletons that must not be duplicated per worker:
+
+- it publishes portfolio content to the shared snapshot file
+  (``storage.shared``) and republishes it when the content version changes
+- it holds the cluster's analytics sketches and is the only process
+  persisting them
+- it keeps the rolling window of live traffic streamed on
+  ``/api/analytics/live``
+
+Workers run a ``HubClient`` that talks to the hub over a Unix socket with
+newline-delimited JSON. Every ``WORKER_SYNC_SECONDS`` a worker sends the
+sketch delta, the per-path live counts and the ingest counters it observed,
+and receives the merged sketches, the live window and the summed counters, so
+``/api/analytics/stats`` and ``/api/analytics/live`` answer the same on every
+worker. Rollups are written by each worker's page view buffer directly
+to the shared database, as in single-process mode.
+
+Both sides are only active when ``WORKER_HUB_SOCKET`` is set.
+"""
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from services.analytics_sketches import AnalyticsSketches, analytics_sketches
+from services.live_analytics import LiveAnalytics, live_analytics
+from services.pageview_buffer import pageview_buffer
+
+logger = logging.getLogger(__name__)
+
+HUB_SOCKET = os.environ.get('WORKER_HUB_SOCKET')
+CONTENT_SNAPSHOT_PATH = os.environ.get('CONTENT_SNAPSHOT_PATH')
+SYNC_SECONDS = float(os.environ.get('WORKER_SYNC_SECONDS', '1'))
+
+INGEST_COUNTERS = ("queued", "accepted", "dropped", "written", "failed", "rollup_failures", "batches")
+
+
+def enabled() -> bool:
+    return bool(HUB_SOCKET)
+
+
+async def _send(writer, message: Dict[str, Any]):
+    writer.write(json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n")
+    await writer.drain()
+
+
+class HubServer:
+    def __init__(self, socket_path: str, snapshot_path: Path, probe_interval: float = 5.0):
+        self.socket_path = socket_path
+        self.snapshot_path = Path(snapshot_path)
+        self.probe_interval = probe_interval
+        # Its own instance: with one worker, uvicorn serves the app in this very
+        # process, and the worker's analytics_sketches must stay separate
+        self.sketches = AnalyticsSketches(analytics_sketches.top_capacity, analytics_sketches.persist_interval)
+        # Ticks the cluster's window; workers publish it, the hub has no subscribers
+        self.live = LiveAnalytics(live_analytics.window, live_analytics.top)
+        self.ingest: Dict[str, Dict[str, Any]] = {}
+        self.version: Optional[int] = None
+        self._refresh = asyncio.Event()
+
+    async def publish(self, storage):
+        version = await storage.content.get_version()
+        if version != self.version:
+            from storage.shared import write_content_snapshot
+            self.version = await write_content_snapshot(storage.content, self.snapshot_path)
+            logger.info("Published content version %s to %s", self.version, self.snapshot_path)
+
+    def _ingest_totals(self) -> Dict[str, Any]:
+        totals = {key: sum(stats.get(key, 0) for stats in self.ingest.values()) for key in INGEST_COUNTERS}
+        totals["capacity"] = sum(stats.get("capacity", 0) for stats in self.ingest.values())
+        totals["workers"] = len(self.ingest)
+        return totals
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                if message["op"] == "sync":
+                    self.sketches.merge_delta(message["delta"])
+                    self.live.merge(message.get("live", {}))
+                    self.ingest[str(message["pid"])] = message["ingest"]
+                    await _send(writer, {
+                        "view": self.sketches.view(), "live": self.live.view(), "ingest": self._ingest_totals()
+                    })
+                elif message["op"] == "refresh":
+                    self._refresh.set()
+                    await _send(writer, {"ok": True})
+        except (ConnectionError, ValueError, KeyError):
+            logger.exception("Dropping worker connection")
+        finally:
+            writer.close()
+
+    async def run(self, ready=None, stop: Optional[asyncio.Event] = None):
+        """Serve until ``stop`` is set; ``ready()`` is called once workers may start"""
+        from storage.factory import create_storage
+
+        stop = stop or asyncio.Event()
+        storage = create_storage()
+        await storage.prepare()
+        await self.sketches.start(storage.pageviews)
+        self.live.start()
+        await self.publish(storage)
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        if ready:
+            ready()
+        try:
+            while not stop.is_set():
+                waiters = [asyncio.ensure_future(stop.wait()), asyncio.ensure_future(self._refresh.wait())]
+                await asyncio.wait(waiters, timeout=self.probe_interval, return_when=asyncio.FIRST_COMPLETED)
+                for waiter in waiters:
+                    waiter.cancel()
+                self._refresh.clear()
+                try:
+                    await self.publish(storage)
+                except Exception:
+                    logger.exception("Failed to publish content snapshot")
+        finally:
+            server.close()
+            await server.wait_closed()
+            await self.live.stop()
+            await self.sketches.stop()
+            storage.close()
+            for path in (self.socket_path, self.snapshot_path):
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+
+
+class HubClient:
+    def __init__(self, socket_path: str, interval: float = SYNC_SECONDS):
+        self.socket_path = socket_path
+        self.interval = interval
+        self.cluster_ingest: Optional[Dict[str, Any]] = None
+        self._reader = None
+        self._writer = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def _request(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        async with self._lock:
+            if self._writer is None:
+                self._reader, self._writer = await asyncio.open_unix_connection(self.socket_path)
+            try:
+                await _send(self._writer, message)
+                line = await self._reader.readline()
+                if not line:
+                    raise ConnectionError("Hub closed the connection")
+                return json.loads(line)
+            except Exception:
+                self._writer.close()
+                self._reader = self._writer = None
+                raise
+
+    async def sync(self):
+        delta = analytics_sketches.drain_delta()
+        live = live_analytics.drain()
+        try:
+            reply = await self._request({
+                "op": "sync", "pid": os.getpid(), "delta": delta, "live": live, "ingest": pageview_buffer.stats()
+            })
+        except Exception:
+            # Keep what was observed for the next attempt
+            analytics_sketches.merge_delta(delta)
+            live_analytics.merge(live)
+            raise
+        analytics_sketches.adopt_view(reply["view"])
+        live_analytics.adopt_view(reply["live"])
+        self.cluster_ingest = reply["ingest"]
+
+    async def refresh_content(self):
+        """Ask the hub to republish content now rather than at its next probe"""
+        await self._request({"op": "refresh"})
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sync()
+            except Exception:
+                logger.warning("Could not sync with the worker hub, retrying", exc_info=True)
+
+    async def start(self):
+        try:
+            await self.sync()
+        except Exception:
+            logger.warning("Worker hub not reachable yet", exc_info=True)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        try:
+            # Hand the last observations over before exiting
+            await self.sync()
+        except Exception:
+            logger.warning("Could not flush sketches to the worker hub", exc_info=True)
+        if self._writer is not None:
+            self._writer.close()
+
+
+hub_client = HubClient(HUB_SOCKET) if HUB_SOCKET else None
+
+
+def ingest_stats() -> Dict[str, Any]:
+    """Ingest counters of the whole cluster when synced, else of this process"""
+    if hub_client and hub_client.cluster_ingest is not None:
+        return hub_client.cluster_ingest
+    return pageview_buffer.stats()
@@ -0,0 +1,163 @@
+"""
+Repository interfaces the routes and services are written against.
+
+A ``Storage`` bundles one repository per concern. Implementations:
+
+- ``storage.mongo.MongoStorage``: MongoDB through Motor (default)
+- ``storage.memory.MemoryStorage``: process-local dicts and lists, seeded with
+  the content from ``seed_db.py``; for CI, edge deployments and benchmarks
+
+Documents are plain dicts shaped like the MongoDB documents, without ``_id``
+unless stated otherwise.
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+
+class ContentRepository(ABC):
+    """Projects, skills, experience and contact info"""
+
+    @abstractmethod
+    async def list_projects(self) -> List[Dict[str, Any]]:
+        """Active projects by ``order``, without timestamps"""
+
+    @abstractmethod
+    async def get_project(self, project_id: int) -> Optional[Dict[str, Any]]:
+        """A single active project, without timestamps"""
+
+    @abstractmethod
+    async def list_skills(self) -> List[Dict[str, Any]]:
+        """Active skill categories by ``order``"""
+
+    @abstractmethod
+    async def list_experience(self) -> List[Dict[str, Any]]:
+        """Active experience items by ``order``"""
+
+    @abstractmethod
+    async def get_contact(self) -> Optional[Dict[str, Any]]:
+        """Active contact info, without ``isActive``"""
+
+    @abstractmethod
+    async def get_version(self) -> int:
+        """Current content version, bumped by every write"""
+
+    @abstractmethod
+    async def bump_version(self) -> int:
+        """Mark content as changed and return the new version"""
+
+    def watch(self) -> AsyncIterator[str]:
+        """Yield the name of each content collection as it changes.
+
+        Raises NotImplementedError when the backend cannot push changes; the
+        content watcher then polls ``get_version`` instead.
+        """
+        raise NotImplementedError
+
+
+class PageViewRepository(ABC):
+    """Raw page views, their rollups and persisted sketches"""
+
+    @abstractmethod
+    async def insert_many(self, pageviews: List[Dict[str, Any]]):
+        """Store raw page views; order does not matter"""
+
+    @abstractmethod
+    def iter_pageviews(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield every raw page view"""
+
+    @abstractmethod
+    def iter_range(
+        self,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        after_id: Optional[str] = None,
+        batch_size: int = 5000,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield batches of page views ordered by ``(timestamp, id)``.
+
+        Rows carry ``id`` (a string) instead of ``_id``. With ``after_id`` the
+        range resumes strictly after that row, which must have
+        ``timestamp == start``. Raises ValueError for a malformed ``after_id``.
+        """
+
+    @abstractmethod
+    async def apply_rollups(self, delta):
+        """Fold a ``services.rollups.RollupDelta`` into the rollups"""
+
+    @abstractmethod
+    async def clear_rollups(self):
+        """Drop every rollup"""
+
+    @abstractmethod
+    async def total_views(self) -> int:
+        """All-time view count"""
+
+    @abstractmethod
+    async def count_paths(self) -> int:
+        """Number of distinct paths seen"""
+
+    @abstractmethod
+    async def top_path_rollups(self, limit: int) -> List[Dict[str, Any]]:
+        """Path rollups ``{path, views, hll}`` by views, descending"""
+
+    @abstractmethod
+    async def buckets(self, granularity: str, path: str, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """Bucket rollups ``{ts, views}`` with ``start <= ts < end``, by ``ts``"""
+
+    @abstractmethod
+    async def load_visitor_registers(self) -> Dict[str, int]:
+        """Persisted global visitor HyperLogLog registers"""
+
+    @abstractmethod
+    async def merge_visitor_registers(self, registers: Dict[int, int]):
+        """Merge registers into the persisted visitor sketch (per-register max)"""
+
+    @abstractmethod
+    async def load_top_paths(self) -> Tuple[List[Dict[str, Any]], int]:
+        """Persisted top-paths summary and its revision (0 if none)"""
+
+    @abstractmethod
+    async def save_top_paths(self, items: List[Dict[str, Any]], rev: int) -> bool:
+        """Store the summary as revision ``rev + 1`` if ``rev`` is still current"""
+
+
+class StatusRepository(ABC):
+    """Status checks"""
+
+    @abstractmethod
+    async def insert(self, check: Dict[str, Any]):
+        """Store one status check"""
+
+    @abstractmethod
+    async def insert_many(self, checks: List[Dict[str, Any]]) -> List[int]:
+        """Store checks unordered; return the positions that failed"""
+
+    @abstractmethod
+    async def page(self, after: Optional[Tuple[Any, str]], limit: int) -> List[Dict[str, Any]]:
+        """Up to ``limit`` checks ordered by ``(timestamp, id)``, strictly after ``after``.
+
+        Checks not yet converted by ``migrate_status_timestamps.py`` still have
+        string timestamps; they sort before every date, as in BSON, and
+        ``after[0]`` is the raw string when paging through them.
+        """
+
+    @abstractmethod
+    def iter_checks(self, after: Optional[Tuple[Any, str]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield every check ordered by ``(timestamp, id)``, strictly after ``after``"""
+
+
+class Storage(ABC):
+    content: ContentRepository
+    pageviews: PageViewRepository
+    status: StatusRepository
+
+    async def prepare(self):
+        """Make the backend ready to serve (indexes, connections, ...)"""
+
+    def close(self):
+        """Release connections"""
+
+    def stats(self) -> Dict[str, Any]:
+        """Backend statistics, e.g. connection pool utilization"""
+        return {}
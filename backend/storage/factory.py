@@ -0,0 +1,24 @@
+"""
+Storage backend selection.
+
+``STORAGE_BACKEND`` picks the implementation: ``mongo`` (default, needs
+``MONGO_URL`` and ``DB_NAME``), ``memory``, or ``snapshot`` (content from the
+file written by ``build_snapshot.py``, ``CONTENT_SNAPSHOT_FILE``).
+"""
+import os
+
+from storage.base import Storage
+
+
+def create_storage(backend: str = None) -> Storage:
+    backend = (backend or os.environ.get('STORAGE_BACKEND', 'mongo')).lower()
+    if backend == "mongo":
+        from storage.mongo import MongoStorage
+        return MongoStorage()
+    if backend == "memory":
+        from storage.memory import MemoryStorage
+        return MemoryStorage()
+    if backend == "snapshot":
+        from storage.shared import SnapshotStorage
+        return SnapshotStorage()
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
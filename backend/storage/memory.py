@@ -0,0 +1,205 @@
+"""
+In-memory storage backend.
+
+Keeps everything in process-local dicts and lists, seeded with the content
+from ``seed_db.py``. Nothing is persisted and nothing is shared between
+processes; it exists to run the API without a database (CI, edge
+deployments) and to measure handler overhead without storage latency.
+"""
+import bisect
+import copy
+import itertools
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from storage.base import ContentRepository, PageViewRepository, StatusRepository, Storage
+
+
+def _active_by_order(docs: List[Dict[str, Any]], drop=("_id",)) -> List[Dict[str, Any]]:
+    active = sorted((doc for doc in docs if doc.get("isActive")), key=lambda doc: doc.get("order", 0))
+    return [{k: v for k, v in doc.items() if k not in drop} for doc in active]
+
+
+class MemoryContentRepository(ContentRepository):
+    def __init__(self, projects=(), skills=(), experience=(), contact=None):
+        self.replace(projects, skills, experience, contact)
+
+    def replace(self, projects=(), skills=(), experience=(), contact=None):
+        """Swap in new content and bump the version"""
+        self.projects = copy.deepcopy(list(projects))
+        self.skills = copy.deepcopy(list(skills))
+        self.experience = copy.deepcopy(list(experience))
+        self.contact = copy.deepcopy(contact)
+        self.version = getattr(self, "version", 0) + 1
+
+    async def list_projects(self):
+        return _active_by_order(self.projects, drop=("_id", "createdAt", "updatedAt"))
+
+    async def get_project(self, project_id):
+        for project in await self.list_projects():
+            if project["id"] == project_id:
+                return project
+        return None
+
+    async def list_skills(self):
+        return _active_by_order(self.skills)
+
+    async def list_experience(self):
+        return _active_by_order(self.experience)
+
+    async def get_contact(self):
+        if not self.contact or not self.contact.get("isActive"):
+            return None
+        return {k: v for k, v in self.contact.items() if k not in ("_id", "isActive")}
+
+    async def get_version(self):
+        return self.version
+
+    async def bump_version(self):
+        self.version += 1
+        return self.version
+
+
+class MemoryPageViewRepository(PageViewRepository):
+    def __init__(self):
+        self.pageviews: List[Dict[str, Any]] = []
+        self._ids = itertools.count(1)
+        self._reset_rollups()
+        self.visitor_registers: Dict[str, int] = {}
+        self.top_paths: Tuple[List[Dict[str, Any]], int] = ([], 0)
+
+    def _reset_rollups(self):
+        self.total = 0
+        self.paths: Dict[str, Dict[str, Any]] = {}
+        # (granularity, path) -> {ts: views}, plus the sorted timestamps for range scans
+        self.bucket_views: Dict[Tuple[str, str], Dict[Any, int]] = defaultdict(dict)
+        self.bucket_keys: Dict[Tuple[str, str], list] = defaultdict(list)
+
+    async def insert_many(self, pageviews):
+        for pageview in pageviews:
+            pageview.setdefault("_id", next(self._ids))
+            self.pageviews.append(dict(pageview))
+
+    async def iter_pageviews(self) -> AsyncIterator[Dict[str, Any]]:
+        for pageview in list(self.pageviews):
+            yield {k: v for k, v in pageview.items() if k != "_id"}
+
+    async def iter_range(self, start, end, after_id=None, batch_size=5000):
+        try:
+            after = (start, int(after_id)) if after_id is not None else None
+        except ValueError as exc:
+            raise ValueError("Malformed after_id") from exc
+        rows = sorted(
+            (
+                pageview for pageview in self.pageviews
+                if (start is None or pageview["timestamp"] >= start)
+                and (end is None or pageview["timestamp"] < end)
+                and (after is None or (pageview["timestamp"], pageview["_id"]) > after)
+            ),
+            key=lambda pageview: (pageview["timestamp"], pageview["_id"]),
+        )
+        for offset in range(0, len(rows), batch_size):
+            yield [
+                {**{k: v for k, v in row.items() if k != "_id"}, "id": str(row["_id"])}
+                for row in rows[offset:offset + batch_size]
+            ]
+
+    async def apply_rollups(self, delta):
+        self.total += delta.total
+        for path, views in delta.path_views.items():
+            rollup = self.paths.setdefault(path, {"path": path, "views": 0, "hll": {}})
+            rollup["views"] += views
+            hll = rollup["hll"]
+            for index, rank in delta.path_registers.get(path, {}).items():
+                if rank > hll.get(str(index), 0):
+                    hll[str(index)] = rank
+        for (granularity, path, start), views in delta.bucket_views.items():
+            series = self.bucket_views[(granularity, path)]
+            if start not in series:
+                series[start] = 0
+                bisect.insort(self.bucket_keys[(granularity, path)], start)
+            series[start] += views
+
+    async def clear_rollups(self):
+        self._reset_rollups()
+
+    async def total_views(self):
+        return self.total
+
+    async def count_paths(self):
+        return len(self.paths)
+
+    async def top_path_rollups(self, limit):
+        ranked = sorted(self.paths.values(), key=lambda rollup: rollup["views"], reverse=True)[:limit]
+        return copy.deepcopy(ranked)
+
+    async def buckets(self, granularity, path, start, end):
+        keys = self.bucket_keys.get((granularity, path), [])
+        series = self.bucket_views.get((granularity, path), {})
+        lo = bisect.bisect_left(keys, start)
+        hi = bisect.bisect_left(keys, end)
+        return [{"ts": ts, "views": series[ts]} for ts in keys[lo:hi]]
+
+    async def load_visitor_registers(self):
+        return dict(self.visitor_registers)
+
+    async def merge_visitor_registers(self, registers):
+        for index, rank in registers.items():
+            if rank > self.visitor_registers.get(str(index), 0):
+                self.visitor_registers[str(index)] = rank
+
+    async def load_top_paths(self):
+        items, rev = self.top_paths
+        return copy.deepcopy(items), rev
+
+    async def save_top_paths(self, items, rev):
+        if rev != self.top_paths[1]:
+            return False
+        self.top_paths = (copy.deepcopy(items), rev + 1)
+        return True
+
+
+def _status_key(timestamp, check_id) -> Tuple[bool, Any, str]:
+    # Like BSON: string timestamps (not yet migrated) sort before every date
+    return (not isinstance(timestamp, str), timestamp, check_id)
+
+
+class MemoryStatusRepository(StatusRepository):
+    def __init__(self):
+        # Kept sorted by (timestamp, id) so pages are a bisect and a slice
+        self.keys: List[Tuple[bool, Any, str]] = []
+        self.checks: Dict[Tuple[bool, Any, str], Dict[str, Any]] = {}
+
+    async def insert(self, check):
+        key = _status_key(check["timestamp"], check["id"])
+        self.checks[key] = dict(check)
+        bisect.insort(self.keys, key)
+
+    async def insert_many(self, checks):
+        for check in checks:
+            await self.insert(check)
+        return []
+
+    def _start(self, after):
+        return bisect.bisect_right(self.keys, _status_key(*after)) if after else 0
+
+    async def page(self, after, limit):
+        start = self._start(after)
+        return [dict(self.checks[key]) for key in self.keys[start:start + limit]]
+
+    async def iter_checks(self, after=None):
+        for key in self.keys[self._start(after):]:
+            yield dict(self.checks[key])
+
+
+class MemoryStorage(Storage):
+    def __init__(self, seed: bool = True):
+        self.content = MemoryContentRepository()
+        if seed:
+            from seed_db import projects_data, skills_data, experience_data, contact_data
+            self.content.replace(projects_data, skills_data, experience_data, contact_data)
+        self.pageviews = MemoryPageViewRepository()
+        self.status = MemoryStatusRepository()
+
+    def stats(self):
+        return {"backend": "memory"}
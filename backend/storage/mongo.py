@@ -0,0 +1,318 @@
+"""
+MongoDB storage backend (Motor).
+
+Rollups live in the ``pageview_rollups`` collection:
+
+- ``{"_id": "total"}``: all-time view count
+- ``{"_id": "path:<path>"}``: views and HLL registers (``hll.<index>``)
+- ``{"_id": "bucket:<granularity>:<path>:<start>"}``: bucket views, indexed on
+  ``(granularity, path, ts)``; minute buckets carry an ``expireAt`` for TTL
+
+Counters are applied with ``$inc`` and registers with ``$max``.
+
+Pool sizing, read preferences and read time limits are configured in
+``storage.mongo_pool``.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.codec_options import CodecOptions
+from bson.errors import InvalidId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+
+from services.indexes import ensure_indexes
+from services.metrics import command_metrics
+from services.rollups import MINUTE_BUCKET_RETENTION
+from storage.base import ContentRepository, PageViewRepository, StatusRepository, Storage
+from storage.mongo_pool import PoolMetrics, ReadProfile, pool_options, read_profiles
+
+logger = logging.getLogger(__name__)
+
+CONTENT_VERSION_ID = "content"
+ROLLUPS = "pageview_rollups"
+SKETCHES = "analytics_sketches"
+VISITORS_ID = "visitors"
+TOP_PATHS_ID = "top_paths"
+
+PROJECT_PROJECTION = {"_id": 0, "createdAt": 0, "updatedAt": 0}
+
+CONTENT_COLLECTIONS = ["projects", "skills", "experience", "contact_info"]
+# "$changeStream is only supported on replica sets"
+CHANGE_STREAMS_UNSUPPORTED = 40573
+
+
+async def read_content_version(db) -> int:
+    """Return the current content version (0 if content was never versioned)"""
+    doc = await db.meta.find_one({"_id": CONTENT_VERSION_ID}, {"version": 1})
+    return doc["version"] if doc else 0
+
+
+async def bump_content_version(db) -> int:
+    """Mark portfolio content as changed and return the new version"""
+    doc = await db.meta.find_one_and_update(
+        {"_id": CONTENT_VERSION_ID},
+        {"$inc": {"version": 1}, "$set": {"updatedAt": datetime.now(timezone.utc)}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return doc["version"]
+
+
+def bucket_id(granularity: str, path: str, start: datetime) -> str:
+    return f"bucket:{granularity}:{path}:{start.isoformat()}"
+
+
+class MongoContentRepository(ContentRepository):
+    def __init__(self, db, profile: ReadProfile):
+        self.db = db
+        self.max_time_ms = profile.max_time_ms
+        self.projects = profile.collection(db, "projects")
+        self.skills = profile.collection(db, "skills")
+        self.experience = profile.collection(db, "experience")
+        self.contact_info = profile.collection(db, "contact_info")
+
+    async def list_projects(self):
+        return await self.projects.find(
+            {"isActive": True}, PROJECT_PROJECTION
+        ).sort("order", 1).max_time_ms(self.max_time_ms).to_list(100)
+
+    async def get_project(self, project_id):
+        return await self.projects.find_one(
+            {"id": project_id, "isActive": True}, PROJECT_PROJECTION, max_time_ms=self.max_time_ms
+        )
+
+    async def list_skills(self):
+        return await self.skills.find(
+            {"isActive": True}, {"_id": 0}
+        ).sort("order", 1).max_time_ms(self.max_time_ms).to_list(100)
+
+    async def list_experience(self):
+        return await self.experience.find(
+            {"isActive": True}, {"_id": 0}
+        ).sort("order", 1).max_time_ms(self.max_time_ms).to_list(100)
+
+    async def get_contact(self):
+        return await self.contact_info.find_one(
+            {"isActive": True}, {"_id": 0, "isActive": 0}, max_time_ms=self.max_time_ms
+        )
+
+    async def get_version(self):
+        return await read_content_version(self.db)
+
+    async def bump_version(self):
+        return await bump_content_version(self.db)
+
+    async def watch(self):
+        # One database-level stream instead of one per collection
+        pipeline = [{"$match": {"ns.coll": {"$in": CONTENT_COLLECTIONS}}}]
+        try:
+            async with self.db.watch(pipeline) as stream:
+                async for change in stream:
+                    yield change["ns"]["coll"]
+        except OperationFailure as exc:
+            if exc.code == CHANGE_STREAMS_UNSUPPORTED:
+                raise NotImplementedError("Change streams need a replica set or sharded cluster") from exc
+            raise
+
+
+class MongoPageViewRepository(PageViewRepository):
+    def __init__(self, db, profile: ReadProfile):
+        self.db = db
+        self.max_time_ms = profile.max_time_ms
+        self.pageviews = profile.collection(db, "pageviews")
+        self.rollups = profile.collection(db, ROLLUPS)
+        self.sketches = profile.collection(db, SKETCHES)
+
+    async def insert_many(self, pageviews):
+        await self.pageviews.insert_many(pageviews, ordered=False)
+
+    # Full scans (backfill, export) stream for as long as they need: no time limit
+
+    async def iter_pageviews(self) -> AsyncIterator[Dict[str, Any]]:
+        async for pageview in self.pageviews.find({}, {"_id": 0}):
+            yield pageview
+
+    async def iter_range(self, start, end, after_id=None, batch_size=5000):
+        timestamp = {}
+        if start is not None:
+            timestamp["$gte"] = start
+        if end is not None:
+            timestamp["$lt"] = end
+        query = {"timestamp": timestamp} if timestamp else {}
+        if after_id is not None:
+            try:
+                after = ObjectId(after_id)
+            except InvalidId as exc:
+                raise ValueError("Malformed after_id") from exc
+            query = {"$and": [query, {"$or": [
+                {"timestamp": {"$gt": start}},
+                {"timestamp": start, "_id": {"$gt": after}},
+            ]}]}
+
+        cursor = self.pageviews.find(query).sort(
+            [("timestamp", ASCENDING), ("_id", ASCENDING)]
+        ).batch_size(batch_size)
+        batch = []
+        async for pageview in cursor:
+            pageview["id"] = str(pageview.pop("_id"))
+            batch.append(pageview)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def apply_rollups(self, delta):
+        ops = [UpdateOne({"_id": "total"}, {"$inc": {"views": delta.total}}, upsert=True)]
+        for path, views in delta.path_views.items():
+            update = {
+                "$inc": {"views": views},
+                "$setOnInsert": {"kind": "path", "path": path},
+            }
+            registers = delta.path_registers.get(path)
+            if registers:
+                update["$max"] = {f"hll.{index}": rank for index, rank in registers.items()}
+            ops.append(UpdateOne({"_id": f"path:{path}"}, update, upsert=True))
+        for (granularity, path, start), views in delta.bucket_views.items():
+            on_insert = {"kind": "bucket", "granularity": granularity, "path": path, "ts": start}
+            if granularity == "minute":
+                on_insert["expireAt"] = start + MINUTE_BUCKET_RETENTION
+            ops.append(UpdateOne(
+                {"_id": bucket_id(granularity, path, start)},
+                {"$inc": {"views": views}, "$setOnInsert": on_insert},
+                upsert=True,
+            ))
+        await self.rollups.bulk_write(ops, ordered=False)
+
+    async def clear_rollups(self):
+        await self.rollups.delete_many({})
+
+    async def total_views(self):
+        doc = await self.rollups.find_one({"_id": "total"}, max_time_ms=self.max_time_ms)
+        return doc["views"] if doc else 0
+
+    async def count_paths(self):
+        return await self.rollups.count_documents({"kind": "path"}, maxTimeMS=self.max_time_ms)
+
+    async def top_path_rollups(self, limit):
+        return await self.rollups.find(
+            {"kind": "path"}, {"_id": 0, "path": 1, "views": 1, "hll": 1}
+        ).sort("views", DESCENDING).max_time_ms(self.max_time_ms).to_list(limit)
+
+    async def buckets(self, granularity, path, start, end):
+        return await self.rollups.find(
+            {
+                "kind": "bucket",
+                "granularity": granularity,
+                "path": path,
+                "ts": {"$gte": start, "$lt": end},
+            },
+            {"_id": 0, "ts": 1, "views": 1},
+        ).sort("ts", ASCENDING).max_time_ms(self.max_time_ms).to_list(None)
+
+    async def load_visitor_registers(self):
+        doc = await self.sketches.find_one({"_id": VISITORS_ID}, max_time_ms=self.max_time_ms)
+        return doc.get("hll", {}) if doc else {}
+
+    async def merge_visitor_registers(self, registers):
+        await self.sketches.update_one(
+            {"_id": VISITORS_ID},
+            {"$max": {f"hll.{index}": rank for index, rank in registers.items()}},
+            upsert=True,
+        )
+
+    async def load_top_paths(self) -> Tuple[List[Dict[str, Any]], int]:
+        doc = await self.sketches.find_one({"_id": TOP_PATHS_ID}, max_time_ms=self.max_time_ms)
+        return (doc["items"], doc["rev"]) if doc else ([], 0)
+
+    async def save_top_paths(self, items, rev):
+        doc = {"items": items, "rev": rev + 1}
+        if not rev:
+            try:
+                await self.sketches.insert_one({"_id": TOP_PATHS_ID, **doc})
+                return True
+            except DuplicateKeyError:
+                return False
+        result = await self.sketches.update_one({"_id": TOP_PATHS_ID, "rev": rev}, {"$set": doc})
+        return bool(result.modified_count)
+
+
+class MongoStatusRepository(StatusRepository):
+    def __init__(self, db, profile: ReadProfile):
+        self.max_time_ms = profile.max_time_ms
+        # Read timestamps back as aware UTC datetimes, exactly as they were written
+        self.collection = profile.collection(
+            db, "status_checks", codec_options=CodecOptions(tz_aware=True, tzinfo=timezone.utc)
+        )
+
+    async def insert(self, check):
+        await self.collection.insert_one(dict(check))
+
+    async def insert_many(self, checks):
+        try:
+            await self.collection.insert_many([dict(check) for check in checks], ordered=False)
+        except BulkWriteError as exc:
+            return [error["index"] for error in exc.details.get("writeErrors", [])]
+        return []
+
+    def _find(self, after):
+        query = {}
+        if after:
+            timestamp, check_id = after
+            query = {"$or": [
+                {"timestamp": {"$gt": timestamp}},
+                {"timestamp": timestamp, "id": {"$gt": check_id}},
+            ]}
+            if isinstance(timestamp, str):
+                # Unmigrated string timestamps sort before every date (BSON type
+                # order) and $gt on a string only matches strings
+                query["$or"].append({"timestamp": {"$type": "date"}})
+        # Exclude MongoDB's _id field from the query results
+        return self.collection.find(query, {"_id": 0}).sort(
+            [("timestamp", ASCENDING), ("id", ASCENDING)]
+        )
+
+    async def page(self, after, limit):
+        return await self._find(after).limit(limit).max_time_ms(self.max_time_ms).to_list(limit)
+
+    async def iter_checks(self, after=None):
+        async for check in self._find(after).batch_size(500):
+            yield check
+
+
+class MongoStorage(Storage):
+    def __init__(self, mongo_url: Optional[str] = None, db_name: Optional[str] = None):
+        options = pool_options()
+        self.pool_metrics = PoolMetrics(options["maxPoolSize"], options["minPoolSize"])
+        self.warmup_pings = int(os.environ.get('MONGO_WARMUP_PINGS', str(options["minPoolSize"])))
+        self.client = AsyncIOMotorClient(
+            mongo_url or os.environ['MONGO_URL'], event_listeners=[self.pool_metrics, command_metrics], **options
+        )
+        self.db = self.client[db_name or os.environ['DB_NAME']]
+        profiles = read_profiles()
+        self.content = MongoContentRepository(self.db, profiles["content"])
+        self.pageviews = MongoPageViewRepository(self.db, profiles["analytics"])
+        self.status = MongoStatusRepository(self.db, profiles["status"])
+
+    async def prepare(self):
+        # Open connections up front so the first requests skip the handshake
+        if self.warmup_pings:
+            started = asyncio.get_running_loop().time()
+            await asyncio.gather(*(self.client.admin.command("ping") for _ in range(self.warmup_pings)))
+            logger.info(
+                "MongoDB pool warmed up: %d connections in %.1f ms",
+                self.pool_metrics.open, (asyncio.get_running_loop().time() - started) * 1000
+            )
+        await ensure_indexes(self.db)
+
+    def stats(self):
+        return {"backend": "mongo", "pool": self.pool_metrics.stats()}
+
+    def close(self):
+        self.client.close()
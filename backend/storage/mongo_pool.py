@@ -0,0 +1,162 @@
+"""
+MongoDB connection pool settings, read profiles and pool metrics.
+
+Pool settings come from the environment (defaults in parentheses):
+
+- ``MONGO_MAX_POOL_SIZE`` (100) and ``MONGO_MIN_POOL_SIZE`` (10): connections
+  per server; the driver keeps at least the minimum open in the background
+- ``MONGO_MAX_IDLE_TIME_MS`` (300000): close connections idle for longer
+- ``MONGO_WAIT_QUEUE_TIMEOUT_MS`` (2000): fail a request that waited this long
+  for a free connection instead of queueing forever
+- ``MONGO_SERVER_SELECTION_TIMEOUT_MS`` (5000), ``MONGO_CONNECT_TIMEOUT_MS`` (5000)
+- ``MONGO_WARMUP_PINGS`` (min pool size): concurrent pings at startup, so the
+  first requests do not pay for connection setup
+
+Each repository reads through a profile with its own read preference and
+server-side time limit (``maxTimeMS``), overridable with
+``MONGO_<PROFILE>_READ_PREFERENCE`` and ``MONGO_<PROFILE>_MAX_TIME_MS``.
+Content stays on the primary by default: the content version is read there,
+and content cached under a new version must not come from a lagging secondary.
+
+``PoolMetrics`` is a driver event listener counting open and checked out
+connections, checkout waits and failures, to size the pool under load.
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict
+
+from pymongo import ReadPreference, monitoring
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+
+@dataclass(frozen=True)
+class ReadProfile:
+    read_preference: str
+    max_time_ms: int
+
+    @classmethod
+    def from_env(cls, name: str, read_preference: str, max_time_ms: int) -> "ReadProfile":
+        prefix = f"MONGO_{name.upper()}_"
+        profile = cls(
+            read_preference=os.environ.get(prefix + "READ_PREFERENCE", read_preference),
+            max_time_ms=int(os.environ.get(prefix + "MAX_TIME_MS", str(max_time_ms))),
+        )
+        if profile.read_preference not in READ_PREFERENCES:
+            raise ValueError(f"Unknown read preference for {name}: {profile.read_preference}")
+        return profile
+
+    def collection(self, db, name: str, **options):
+        return db.get_collection(name, read_preference=READ_PREFERENCES[self.read_preference], **options)
+
+
+def read_profiles() -> Dict[str, ReadProfile]:
+    return {
+        "content": ReadProfile.from_env("content", "primary", 2000),
+        # Rollups, sketches and reports tolerate replication lag
+        "analytics": ReadProfile.from_env("analytics", "secondaryPreferred", 15000),
+        "status": ReadProfile.from_env("status", "primary", 5000),
+    }
+
+
+def pool_options() -> Dict[str, Any]:
+    """Keyword arguments for ``AsyncIOMotorClient``"""
+    return {
+        "maxPoolSize": int(os.environ.get('MONGO_MAX_POOL_SIZE', '100')),
+        "minPoolSize": int(os.environ.get('MONGO_MIN_POOL_SIZE', '10')),
+        "maxIdleTimeMS": int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', '300000')),
+        "waitQueueTimeoutMS": int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '2000')),
+        "serverSelectionTimeoutMS": int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+        "connectTimeoutMS": int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '5000')),
+    }
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool counters; driver callbacks run on executor threads"""
+
+    def __init__(self, max_pool_size: int, min_pool_size: int):
+        self.max_pool_size = max_pool_size
+        self.min_pool_size = min_pool_size
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.open = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.checkout_timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.pool_clears = 0
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open -= 1
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        waited = time.perf_counter() - getattr(self._local, "started", time.perf_counter())
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+            if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+                self.checkout_timeouts += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use -= 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    # Unused pool events
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "maxPoolSize": self.max_pool_size,
+                "minPoolSize": self.min_pool_size,
+                "open": self.open,
+                "inUse": self.in_use,
+                "peakInUse": self.peak_in_use,
+                "utilization": round(self.in_use / self.max_pool_size, 4) if self.max_pool_size else 0.0,
+                "checkouts": self.checkouts,
+                "checkoutFailures": self.checkout_failures,
+                "checkoutTimeouts": self.checkout_timeouts,
+                "avgWaitMs": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "maxWaitMs": round(self.wait_max * 1000, 3),
+                "poolClears": self.pool_clears,
+            }
@@ -0,0 +1,205 @@
+"""
+Portfolio content published as a file that processes map read-only.
+
+The file is a single JSON document, ``{"version": ..., "checksum": ...,
+"projects": [...], "skills": [...], "experience": [...], "contact": {...}}``,
+replaced atomically (write, then rename). ``SharedContentRepository``
+memory-maps it and parses it once per version; a replaced file is picked up on
+the next ``get_version`` call (the content watcher or the cache's version
+probe make one every few seconds).
+
+Two uses:
+
+- multi-worker mode (``serve.py``): one process loads content from the real
+  storage backend and writes it to ``CONTENT_SNAPSHOT_PATH`` (on ``/dev/shm``
+  when available, so it lives in shared memory), and every worker reads it, so
+  N workers cost one database load per content change
+- ``STORAGE_BACKEND=snapshot``: content is served from a build artifact
+  written by ``build_snapshot.py`` (``CONTENT_SNAPSHOT_FILE``), with no
+  database at all. Dropping a new build in place hot-swaps the content.
+"""
+import hashlib
+import logging
+import mmap
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from services.json_response import dumps
+from storage.base import ContentRepository, Storage
+
+logger = logging.getLogger(__name__)
+
+SECTIONS = ("projects", "skills", "experience", "contact")
+
+SNAPSHOT_FILE = os.environ.get(
+    'CONTENT_SNAPSHOT_FILE', str(Path(__file__).parent.parent / 'data' / 'content_snapshot.json')
+)
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # the stdlib parser needs bytes, not a memoryview
+    import json
+
+    def _loads(data):
+        return json.loads(bytes(data))
+
+
+def default_snapshot_path(name: str) -> Path:
+    shm = Path("/dev/shm")
+    return (shm if shm.is_dir() else Path(os.environ.get('TMPDIR', '/tmp'))) / name
+
+
+async def load_content(content: ContentRepository) -> Dict[str, Any]:
+    """Every section from ``content``, with its checksum"""
+    document = {
+        "projects": await content.list_projects(),
+        "skills": await content.list_skills(),
+        "experience": await content.list_experience(),
+        "contact": await content.get_contact(),
+    }
+    document["checksum"] = hashlib.sha256(dumps([document[name] for name in SECTIONS])).hexdigest()
+    return document
+
+
+def write_snapshot(document: Dict[str, Any], path: Path):
+    """Write ``document`` to ``path`` atomically: readers see the old or the new file"""
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as handle:
+        handle.write(dumps(document))
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp, path)
+
+
+def read_snapshot(path: Path) -> Dict[str, Any]:
+    """Map and parse the snapshot at ``path``"""
+    with open(path, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            document = _loads(view)
+        finally:
+            view.release()
+    missing = [key for key in ("version", *SECTIONS) if key not in document]
+    if missing:
+        raise ValueError(f"Content snapshot {path} has no {', '.join(missing)}")
+    return document
+
+
+async def write_content_snapshot(content: ContentRepository, path: Path) -> int:
+    """Load every section from ``content`` and publish it at ``path``"""
+    version = await content.get_version()
+    document = {"version": version, "builtAt": datetime.now(timezone.utc), **await load_content(content)}
+    write_snapshot(document, path)
+    return version
+
+
+class SharedContentRepository(ContentRepository):
+    """Content from a published snapshot file, falling back to ``fallback``.
+
+    Without a fallback the last document read keeps being served if the file
+    disappears or a replacement cannot be parsed.
+    """
+
+    def __init__(self, path: Path, fallback: Optional[ContentRepository] = None):
+        self.path = Path(path)
+        self.fallback = fallback
+        self.swaps = 0
+        self._identity = None
+        self._document: Optional[Dict[str, Any]] = None
+
+    def _refresh(self) -> Optional[Dict[str, Any]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self.fallback is not None:
+                self._identity, self._document = None, None
+            return self._document
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if identity != self._identity:
+            # Remembered even if parsing fails, so a bad file is reported once
+            self._identity = identity
+            try:
+                self._document = read_snapshot(self.path)
+                self.swaps += 1
+            except (OSError, ValueError):
+                if self.fallback is not None or self._document is None:
+                    raise
+                logger.exception("Keeping content version %s, could not read %s", self._document["version"], self.path)
+        return self._document
+
+    def load(self) -> Dict[str, Any]:
+        """Read the snapshot now; raises if there is none or it is invalid"""
+        document = self._refresh()
+        if document is None:
+            raise FileNotFoundError(f"No content snapshot at {self.path}")
+        return document
+
+    async def list_projects(self):
+        document = self._refresh()
+        return document["projects"] if document else await self.fallback.list_projects()
+
+    async def get_project(self, project_id):
+        document = self._refresh()
+        if not document:
+            return await self.fallback.get_project(project_id)
+        return next((project for project in document["projects"] if project["id"] == project_id), None)
+
+    async def list_skills(self):
+        document = self._refresh()
+        return document["skills"] if document else await self.fallback.list_skills()
+
+    async def list_experience(self):
+        document = self._refresh()
+        return document["experience"] if document else await self.fallback.list_experience()
+
+    async def get_contact(self):
+        document = self._refresh()
+        return document["contact"] if document else await self.fallback.get_contact()
+
+    async def get_version(self):
+        document = self._refresh()
+        return document["version"] if document else await self.fallback.get_version()
+
+    async def bump_version(self):
+        # The publisher notices the new version and rewrites the snapshot;
+        # until then the snapshot's own version is the current one
+        if self.fallback is None:
+            # Nothing to bump: a new version is a new build of the file
+            return await self.get_version()
+        await self.fallback.bump_version()
+        return await self.get_version()
+
+
+class SnapshotStorage(Storage):
+    """Content served from a ``build_snapshot.py`` artifact, no database.
+
+    Page views and status checks are kept in memory, as with the memory
+    backend.
+    """
+
+    def __init__(self, path: Path = SNAPSHOT_FILE):
+        from storage.memory import MemoryPageViewRepository, MemoryStatusRepository
+
+        self.content = SharedContentRepository(path)
+        self.pageviews = MemoryPageViewRepository()
+        self.status = MemoryStatusRepository()
+
+    async def prepare(self):
+        # A missing or broken snapshot fails startup rather than the first request
+        document = self.content.load()
+        logger.info("Serving content version %s from %s", document["version"], self.content.path)
+
+    def stats(self):
+        document = self.content._document or {}
+        return {
+            "backend": "snapshot",
+            "path": str(self.content.path),
+            "version": document.get("version"),
+            "checksum": document.get("checksum"),
+            "builtAt": document.get("builtAt"),
+            "swaps": self.content.swaps,
+        }
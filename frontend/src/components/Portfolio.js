@@ -27,20 +27,17 @@ const Portfolio = () => {
     api.logPageView(window.location.pathname);
     
     // Fetch all data
-    const fetchData = async () => {
+    const fetchData = async (initial = true) => {
       try {
-        setLoading(true);
-        const [projectsData, skillsData, experienceData, contactData] = await Promise.all([
-          api.getProjects(),
-          api.getSkills(),
-          api.getExperience(),
-          api.getContact()
-        ]);
+        if (initial) {
+          setLoading(true);
+        }
+        const bundle = await api.getBundle();
         
-        setProjects(projectsData.projects || []);
-        setSkills(skillsData.skills || {});
-        setExperience(experienceData.experience || []);
-        setContactInfo(contactData);
+        setProjects(bundle.projects || []);
+        setSkills(bundle.skills || {});
+        setExperience(bundle.experience || []);
+        setContactInfo(bundle.contact || {});
         setError(null);
       } catch (err) {
         console.error('Error fetching data:', err);
@@ -51,6 +48,10 @@ const Portfolio = () => {
     };
     
     fetchData();
+    
+    // Refetch in place when content is edited while the page is open
+    const unsubscribe = api.subscribeToContentUpdates(() => fetchData(false));
+    return unsubscribe;
   }, []);
 
   const scrollToSection = (id) => {
@@ -13,6 +13,25 @@ const apiClient = axios.create({
 
 // API service
 const api = {
+  // All sections in one request
+  getBundle: async (sections) => {
+    const params = sections ? { sections: sections.join(',') } : undefined;
+    const response = await apiClient.get('/portfolio/bundle', { params });
+    return response.data;
+  },
+
+  // Content updates pushed by the backend (Server-Sent Events)
+  subscribeToContentUpdates: (onUpdate) => {
+    if (typeof EventSource === 'undefined') {
+      return () => {};
+    }
+    const source = new EventSource(`${API}/portfolio/events`);
+    source.addEventListener('content-updated', (event) => {
+      onUpdate(JSON.parse(event.data));
+    });
+    return () => source.close();
+  },
+
   // Projects
   getProjects: async () => {
     const response = await apiClient.get('/portfolio/projects');
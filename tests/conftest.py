@@ -0,0 +1,50 @@
+"""
+Shared fixtures: the API on the in-memory storage backend, driven in-process
+through ``httpx.ASGITransport`` with the app's lifespan running.
+"""
+import os
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Read at import time by the backend modules, so set before any of them load
+os.environ["STORAGE_BACKEND"] = "memory"
+os.environ["ADMIN_TOKEN"] = "test-admin-token"
+os.environ["CONTENT_WATCH"] = "off"
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def app():
+    from server import app
+    from services.cache import content_cache
+    async with app.router.lifespan_context(app):
+        yield app
+    # Cached content outlives the app; the next test gets freshly seeded storage
+    content_cache.invalidate()
+
+
+@pytest.fixture
+async def client(app):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+def admin_headers():
+    return {"X-Admin-Token": os.environ["ADMIN_TOKEN"]}
+
+
+@pytest.fixture
+def storage(app):
+    return app.state.storage
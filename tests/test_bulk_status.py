@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+NDJSON = {"Content-Type": "application/x-ndjson"}
+
+
+def _ndjson(*lines):
+    return "\n".join(lines).encode() + b"\n"
+
+
+async def test_bulk_json_results(client, storage):
+    response = await client.post("/api/status/bulk", json=[{"client_name": "a"}, {"name": "b"}, {"client_name": "c"}])
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["inserted"], body["failed"], body["truncated"]) == (2, 1, False)
+    assert [result["ok"] for result in body["results"]] == [True, False, True]
+    assert body["results"][1]["error"] == "Field required"
+    assert len(storage.status.keys) == 2
+
+
+async def test_bulk_ndjson_results(client, storage):
+    body = _ndjson('{"client_name": "a"}', "{not json", "", '{"client_name": "b"}')
+    response = await client.post("/api/status/bulk", content=body, headers=NDJSON)
+    results = response.json()["results"]
+    assert [(result["index"], result["ok"]) for result in results] == [(0, True), (1, False), (2, True)]
+    assert results[1]["error"] == "Invalid JSON"
+    assert {check["client_name"] for check in storage.status.checks.values()} == {"a", "b"}
+
+
+async def test_bulk_json_rejects_bad_bodies(client):
+    assert (await client.post("/api/status/bulk", content=b"[{", headers={"Content-Type": "application/json"})).status_code == 400
+    assert (await client.post("/api/status/bulk", json={"client_name": "a"})).status_code == 400
+
+
+async def test_bulk_json_over_item_limit_inserts_nothing(client, storage, monkeypatch):
+    monkeypatch.setattr(server, "BULK_MAX_ITEMS", 3)
+    response = await client.post("/api/status/bulk", json=[{"client_name": str(i)} for i in range(4)])
+    assert response.status_code == 413
+    assert storage.status.keys == []
+
+
+async def test_bulk_ndjson_stops_at_item_limit(client, storage, monkeypatch):
+    monkeypatch.setattr(server, "BULK_MAX_ITEMS", 2)
+    sent = 0
+
+    async def lines():
+        nonlocal sent
+        for i in range(1000):
+            sent += 1
+            yield json.dumps({"client_name": str(i)}).encode() + b"\n"
+
+    body = (await client.post("/api/status/bulk", content=lines(), headers=NDJSON)).json()
+    assert (body["inserted"], body["failed"], body["truncated"]) == (2, 0, True)
+    assert len(body["results"]) == 2
+    assert len(storage.status.keys) == 2
+    # The rest of the body is left unread
+    assert sent < 1000
+
+
+async def test_bulk_lists_only_the_first_failures(client, storage, monkeypatch):
+    monkeypatch.setattr(server, "BULK_MAX_ERRORS", 3)
+    body = _ndjson(*(["1"] * 50 + ['{"client_name": "a"}']))
+    result = (await client.post("/api/status/bulk", content=body, headers=NDJSON)).json()
+    assert (result["inserted"], result["failed"]) == (1, 50)
+    assert [item["index"] for item in result["results"]] == [0, 1, 2, 50]
+    assert result["results"][-1]["ok"] is True
+
+
+async def test_bulk_ndjson_line_too_long(client, monkeypatch):
+    monkeypatch.setattr(server, "BULK_MAX_LINE_BYTES", 64)
+    long_line = json.dumps({"client_name": "x" * 200})
+    body = _ndjson('{"client_name": "a"}', long_line, '{"client_name": "b"}')
+    results = (await client.post("/api/status/bulk", content=body, headers=NDJSON)).json()["results"]
+    assert [result["ok"] for result in results] == [True, False, True]
+    assert results[1]["error"] == "Line exceeds 64 bytes"
+
+
+async def test_bulk_body_too_large(client, monkeypatch):
+    monkeypatch.setattr(server, "BULK_MAX_BYTES", 32)
+    response = await client.post("/api/status/bulk", json=[{"client_name": "x" * 40}])
+    assert response.status_code == 413
+
+
+async def test_bulk_ndjson_stream_too_large_is_truncated(client, storage, monkeypatch):
+    monkeypatch.setattr(server, "BULK_MAX_BYTES", 48)
+
+    async def chunks():
+        # Streamed without a Content-Length, so only the running total can catch it
+        for i in range(5):
+            yield json.dumps({"client_name": str(i)}).encode() + b"\n"
+
+    body = (await client.post("/api/status/bulk", content=chunks(), headers=NDJSON)).json()
+    assert body["truncated"] is True
+    assert body["inserted"] == len(storage.status.keys) == 2
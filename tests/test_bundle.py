@@ -0,0 +1,41 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_bundle_has_every_section(client):
+    bundle = (await client.get("/api/portfolio/bundle")).json()
+    assert set(bundle) == {"projects", "skills", "experience", "contact"}
+    projects = (await client.get("/api/portfolio/projects")).json()["projects"]
+    assert bundle["projects"] == projects
+
+
+@pytest.mark.parametrize("sections, expected", [
+    ("projects,", {"projects"}),
+    ("projects, skills", {"projects", "skills"}),
+    (" skills ,projects,,", {"projects", "skills"}),
+])
+async def test_sections_are_trimmed(client, sections, expected):
+    response = await client.get("/api/portfolio/bundle", params={"sections": sections})
+    assert response.status_code == 200
+    assert set(response.json()) == expected
+
+
+async def test_unknown_section(client):
+    response = await client.get("/api/portfolio/bundle", params={"sections": "projects,blog"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown sections: blog"
+
+
+async def test_field_selectors(client):
+    params = {"sections": "projects,contact", "fields": "projects.id, projects.title,contact.email,"}
+    bundle = (await client.get("/api/portfolio/bundle", params=params)).json()
+    assert all(set(project) == {"id", "title"} for project in bundle["projects"])
+    assert set(bundle["contact"]) == {"email"}
+
+
+@pytest.mark.parametrize("fields", ["projects.nope", "skills.category", "experience.company", "projects"])
+async def test_invalid_field_selectors(client, fields):
+    # experience is not among the requested sections
+    response = await client.get("/api/portfolio/bundle", params={"sections": "projects,skills", "fields": fields})
+    assert response.status_code == 400
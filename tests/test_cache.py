@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from services import cache as cache_module
+from services.cache import ContentCache
+
+pytestmark = pytest.mark.anyio
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    return clock
+
+
+def _loader(calls, value):
+    async def load():
+        calls.append(value)
+        return value
+    return load
+
+
+async def test_read_through(clock):
+    cache, calls = ContentCache(), []
+    assert await cache.get_or_load("projects", _loader(calls, 1)) == 1
+    assert await cache.get_or_load("projects", _loader(calls, 2)) == 1
+    assert calls == [1]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+async def test_concurrent_misses_share_one_load(clock):
+    cache, calls = ContentCache(), []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    assert await asyncio.gather(*(cache.get_or_load("key", slow) for _ in range(5))) == ["value"] * 5
+    assert calls == [1]
+
+
+def test_ttl(clock):
+    cache = ContentCache(ttl=10)
+    cache.set("a", 1)
+    clock.now += 9
+    assert cache.get("a") == 1
+    clock.now += 2
+    assert cache.get("a") is None
+    # No TTL: entries stay until invalidated
+    cache.ttl = 0
+    cache.set("b", 2)
+    clock.now += 10 ** 6
+    assert cache.get("b") == 2
+
+
+def test_lru_eviction_spares_pinned_entries(clock):
+    cache = ContentCache(max_entries=2)
+    cache.set("projects", "pinned", pinned=True)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # b is now the least recently used
+    cache.set("c", 3)
+    assert [cache.get(key) for key in ("a", "b", "c")] == [1, None, 3]
+    for key in "defgh":
+        cache.set(key, key)
+    assert cache.get("projects") == "pinned"
+    assert cache.stats()["entries"] == 3
+
+
+def test_invalidate_and_discard(clock):
+    cache = ContentCache()
+    cache.set("projects", 1, pinned=True)
+    cache.set("bundle:projects,skills:", 2)
+    cache.set("skills", 3, pinned=True)
+    assert cache.discard(lambda key: "projects" in key) == 2
+    assert cache.get("skills") == 3
+    cache.invalidate(7)
+    assert cache.get("skills") is None
+    assert cache.version == 7
+
+
+async def test_load_racing_an_invalidation_is_not_stored(clock):
+    cache = ContentCache()
+
+    async def load():
+        cache.invalidate()
+        return "stale"
+
+    assert await cache.get_or_load("key", load) == "stale"
+    assert cache.get("key") is None
+
+
+async def test_version_probe(clock):
+    cache, version = ContentCache(probe_interval=5), 1
+
+    async def probe():
+        return version
+
+    cache.set_version_probe(probe)
+    await cache.get_or_load("key", _loader([], "old"))
+    version = 2
+    # Probed at most every probe_interval
+    assert await cache.get_or_load("key", _loader([], "new")) == "old"
+    clock.now += 5
+    assert await cache.get_or_load("key", _loader([], "new")) == "new"
+    assert cache.version == 2
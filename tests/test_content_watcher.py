@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+import pytest
+
+from routes import portfolio
+from services.cache import content_cache
+from services.content_watcher import ContentWatcher, content_events
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def watcher(storage):
+    watcher = ContentWatcher(mode="poll", poll_interval=0.02, debounce=0.01)
+    await watcher.start(storage.content, lambda sections: portfolio.refresh_sections(storage, sections))
+    subscription = content_events.subscribe()
+    yield watcher, subscription
+    content_events.unsubscribe(subscription)
+    await watcher.stop()
+
+
+def _rename_first_project(content, title):
+    projects = [dict(project) for project in content.projects]
+    projects[0]["title"] = title
+    content.replace(projects, content.skills, content.experience, content.contact)
+
+
+async def _until(condition):
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("timed out")
+
+
+async def test_cache_has_no_ttl_while_watching(watcher):
+    assert content_cache.ttl == 0
+    assert watcher[0].stats()["source"] == "polling"
+
+
+async def test_change_is_pushed_and_revalidated(client, storage, watcher):
+    watcher, subscription = watcher
+    etag = (await client.get("/api/portfolio/projects")).headers["ETag"]
+
+    _rename_first_project(storage.content, "Renamed")
+    message = await asyncio.wait_for(subscription.queue.get(), 5)
+    event, data = message.decode().strip().split("\n")
+    assert event == "event: content-updated"
+    assert json.loads(data[len("data: "):]) == {"sections": ["projects"], "version": storage.content.version}
+    assert content_cache.version == storage.content.version
+
+    # The page refetches with the ETag it holds, and gets the new body
+    response = await client.get("/api/portfolio/projects", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["projects"][0]["title"] == "Renamed"
+
+
+async def test_version_bump_without_changes_is_not_announced(storage, watcher):
+    watcher, subscription = watcher
+    await portfolio.get_section("projects", storage)
+    await storage.content.bump_version()
+    await _until(lambda: watcher.refreshes == 1)
+    assert subscription.queue.empty()
+    assert watcher.version == storage.content.version
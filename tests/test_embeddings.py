@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from services.embeddings import EmbeddingIndex, embed_text, write_index
+
+PROJECTS = [
+    {"id": "p1", "title": "Document summarizer", "description": "Summaries of long reports", "details": ["LLM"]},
+    {"id": "p2", "title": "Trading dashboard", "description": "Realtime market charts", "details": ["WebSockets"]},
+    {"id": "p3", "title": "Recipe planner", "description": "Weekly meal plans", "details": []},
+]
+
+
+def test_embeddings_are_normalized_and_deterministic():
+    vector = embed_text("realtime market charts")
+    assert vector.dtype == np.float32
+    assert np.isclose(np.linalg.norm(vector), 1.0)
+    assert np.array_equal(vector, embed_text("realtime market charts"))
+    assert not embed_text("").any()
+
+
+def test_word_forms_land_close():
+    summary = embed_text("summary")
+    assert float(summary @ embed_text("summaries")) > float(summary @ embed_text("dashboard")) + 0.2
+
+
+def test_search_ranks_the_closest_project_first():
+    index = EmbeddingIndex()
+    index.sync(PROJECTS)
+    results = index.search("summary of a report", k=2)
+    assert [result["id"] for result in results][0] == "p1"
+    assert len(results) == 2
+    assert results[0]["score"] >= results[1]["score"]
+    assert index.search("   ") == []
+
+
+def test_file_is_used_only_when_it_matches(tmp_path):
+    path = write_index(PROJECTS, tmp_path / "embeddings.npy")
+    index = EmbeddingIndex(path)
+    index.sync(PROJECTS)
+    assert index.source == "mmap"
+    assert [result["id"] for result in index.search("meal plans", k=1)] == ["p3"]
+
+    changed = [dict(project) for project in PROJECTS]
+    changed[2]["title"] = "Workout planner"
+    index.sync(changed)
+    assert index.source == "memory"
+
+
+def test_sync_skips_the_list_indexed_last(tmp_path):
+    index = EmbeddingIndex(tmp_path / "missing.npy")
+    index.sync(PROJECTS)
+    matrix = index.matrix
+    index.sync(PROJECTS)
+    assert index.matrix is matrix
+    assert index._synced is PROJECTS
+    index.sync(list(PROJECTS))
+    assert index.matrix is not matrix
+
+
+@pytest.mark.anyio
+async def test_semantic_search_endpoint(client):
+    response = await client.get("/api/portfolio/semantic-search", params={"q": "machine learning", "k": 2})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == len(body["results"]) == 2
+    assert (await client.get("/api/portfolio/semantic-search", params={"q": ""})).status_code == 422
@@ -0,0 +1,71 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+START = datetime(2026, 4, 1, 8, 0)
+
+
+@pytest.fixture
+async def views(storage):
+    # Two views share a timestamp, so resuming must go by id as well
+    offsets = [0, 1, 1, 2, 3]
+    await storage.pageviews.insert_many([
+        {"path": f"/p{i}", "ip": "10.0.0.1", "userAgent": "test", "timestamp": START + timedelta(minutes=minutes)}
+        for i, minutes in enumerate(offsets)
+    ])
+    return len(offsets)
+
+
+async def _ndjson(client, headers, **params):
+    response = await client.get("/api/analytics/export", params=params, headers=headers)
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+async def test_export_resumes_after_the_last_row(client, admin_headers, views):
+    rows = []
+    params = {"limit": 2}
+    while True:
+        page = await _ndjson(client, admin_headers, **params)
+        if not page:
+            break
+        rows.extend(page)
+        params = {"limit": 2, "from": page[-1]["timestamp"], "after_id": page[-1]["id"]}
+    assert [row["path"] for row in rows] == [f"/p{i}" for i in range(views)]
+    assert set(rows[0]) == {"id", "timestamp", "path", "userAgent", "ip"}
+
+
+async def test_export_window(client, admin_headers, views):
+    rows = await _ndjson(client, admin_headers, **{"from": "2026-04-01T08:01:00", "to": "2026-04-01T08:03:00"})
+    assert [row["path"] for row in rows] == ["/p1", "/p2", "/p3"]
+
+
+async def test_export_csv(client, admin_headers, views):
+    text = (await client.get("/api/analytics/export", params={"format": "csv"}, headers=admin_headers)).text
+    records = list(csv.DictReader(io.StringIO(text)))
+    assert len(records) == views
+    assert records[0]["timestamp"] == START.isoformat()
+
+
+async def test_export_columnar(client, admin_headers, views):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    parquet = await client.get("/api/analytics/export", params={"format": "parquet"}, headers=admin_headers)
+    assert pq.read_table(io.BytesIO(parquet.content)).num_rows == views
+    arrow = await client.get("/api/analytics/export", params={"format": "arrow"}, headers=admin_headers)
+    assert pa.ipc.open_stream(arrow.content).read_all().column("path").to_pylist()[-1] == "/p4"
+
+
+async def test_export_errors(client, admin_headers):
+    assert (await client.get("/api/analytics/export")).status_code == 403
+    no_start = await client.get("/api/analytics/export", params={"after_id": "3"}, headers=admin_headers)
+    assert no_start.status_code == 400
+    bad_id = await client.get(
+        "/api/analytics/export", params={"from": "2026-04-01T08:00:00", "after_id": "x"}, headers=admin_headers
+    )
+    assert bad_id.status_code == 400
@@ -0,0 +1,77 @@
+import pytest
+from pymongo import ASCENDING
+
+from services.indexes import INDEXES, IndexSpec, ensure_indexes
+
+pytestmark = pytest.mark.anyio
+
+TTL = IndexSpec("pageviews", (("timestamp", ASCENDING),), "timestamp_ttl", {"expireAfterSeconds": 86400})
+PATH = IndexSpec("pageviews", (("path", ASCENDING),), "path")
+
+
+class FakeCollection:
+    def __init__(self, indexes):
+        self.indexes = indexes
+
+    async def index_information(self):
+        return dict(self.indexes)
+
+    async def create_indexes(self, models):
+        for model in models:
+            document = dict(model.document)
+            self.indexes[document.pop("name")] = {**document, "key": list(document["key"].items())}
+
+
+class FakeDatabase:
+    def __init__(self, **collections):
+        self.collections = {name: FakeCollection(indexes) for name, indexes in collections.items()}
+        self.commands = []
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, FakeCollection({}))
+
+    async def command(self, name, collection, **options):
+        self.commands.append((name, collection, options))
+        index = self.collections[collection].indexes[options["index"]["name"]]
+        index["expireAfterSeconds"] = options["index"]["expireAfterSeconds"]
+
+
+def test_no_ttl_index_without_retention():
+    assert "timestamp_ttl" not in {spec.name for spec in INDEXES if spec.collection == "pageviews"}
+
+
+async def test_creates_missing_indexes():
+    db = FakeDatabase()
+    report = await ensure_indexes(db, [TTL, PATH])
+    assert report["created"] == ["pageviews.timestamp_ttl", "pageviews.path"]
+    assert db["pageviews"].indexes["timestamp_ttl"]["expireAfterSeconds"] == 86400
+    assert (await ensure_indexes(db, [TTL, PATH]))["created"] == []
+
+
+async def test_changed_retention_is_applied_in_place():
+    db = FakeDatabase(pageviews={
+        "_id_": {"key": [("_id", 1)]},
+        "timestamp_ttl": {"key": [("timestamp", 1)], "expireAfterSeconds": 7 * 86400},
+    })
+    report = await ensure_indexes(db, [TTL])
+    assert report["modified"] == ["pageviews.timestamp_ttl"]
+    assert report["drifted"] == []
+    assert db.commands == [("collMod", "pageviews", {"index": {"name": "timestamp_ttl", "expireAfterSeconds": 86400}})]
+    assert db["pageviews"].indexes["timestamp_ttl"]["expireAfterSeconds"] == 86400
+
+
+async def test_retention_added_to_a_plain_index():
+    db = FakeDatabase(pageviews={"timestamp_ttl": {"key": [("timestamp", 1)]}})
+    assert (await ensure_indexes(db, [TTL]))["modified"] == ["pageviews.timestamp_ttl"]
+
+
+async def test_key_drift_and_undeclared_are_reported():
+    db = FakeDatabase(pageviews={
+        "timestamp_ttl": {"key": [("timestamp", -1)], "expireAfterSeconds": 86400},
+        "legacy": {"key": [("ip", 1)]},
+    })
+    db.collections["pageviews"].aggregate = None  # $indexStats unavailable
+    report = await ensure_indexes(db, [TTL])
+    assert report["drifted"] == ["pageviews.timestamp_ttl"]
+    assert report["undeclared"] == ["pageviews.legacy"]
+    assert db.commands == []
@@ -0,0 +1,47 @@
+import json
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+from services import json_response
+from services.json_response import FastJSONResponse, dumps
+
+WHEN = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+
+
+class Item(BaseModel):
+    name: str
+    when: datetime
+
+
+def test_dumps_extra_types():
+    key = uuid.UUID(int=1)
+    decoded = json.loads(dumps({"when": WHEN, "id": key, "count": np.int64(3), "tags": {"a"}, "é": "ü"}))
+    assert decoded == {"when": "2026-01-02T03:04:05+00:00", "id": str(key), "count": 3, "tags": ["a"], "é": "ü"}
+
+
+def test_dumps_utc_z():
+    assert dumps({"when": WHEN}, utc_z=True) == b'{"when":"2026-01-02T03:04:05Z"}'
+
+
+def test_models_render_like_pydantic():
+    item = Item(name="a", when=WHEN)
+    assert FastJSONResponse(item).body == item.model_dump_json().encode()
+    assert json.loads(FastJSONResponse([item]).body) == [{"name": "a", "when": "2026-01-02T03:04:05Z"}]
+
+
+def test_stdlib_mode_is_the_previous_path(monkeypatch):
+    monkeypatch.setattr(json_response, "ENCODER", "stdlib")
+    content = {"items": [Item(name="a", when=WHEN)], "when": WHEN, "id": uuid.UUID(int=2), "text": "ü"}
+    assert FastJSONResponse(content).body == JSONResponse(jsonable_encoder(content)).body
+
+
+def test_encoders_agree_on_plain_content(monkeypatch):
+    content = {"when": WHEN, "views": [1, 2], "path": "/ü", "ok": True, "none": None}
+    fast = FastJSONResponse(content).body
+    monkeypatch.setattr(json_response, "ENCODER", "stdlib")
+    assert FastJSONResponse(content).body == fast
@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import pytest
+
+from services.live_analytics import LiveAnalytics
+from services.pubsub import Broadcaster
+
+pytestmark = pytest.mark.anyio
+
+
+def _observe(live, *paths):
+    for path in paths:
+        live.observe({"path": path})
+
+
+def _event(message: bytes):
+    event, data = message.decode().strip().split("\n")
+    return event[len("event: "):], json.loads(data[len("data: "):])
+
+
+def test_window_slides():
+    live = LiveAnalytics(window=3, top=2)
+    _observe(live, "/a", "/a", "/b")
+    assert live._close_second(100) == 3
+    _observe(live, "/c")
+    live._close_second(101)
+    live._close_second(102)
+    assert live.frame(102, 0)["windowViews"] == 4
+    assert live.frame(102, 0)["topPaths"] == [{"path": "/a", "views": 2}, {"path": "/b", "views": 1}]
+    # Second 100 leaves the window
+    live._close_second(103)
+    assert live.frame(103, 0) == {"ts": 103, "views": 0, "windowSeconds": 3, "windowViews": 1,
+                                  "topPaths": [{"path": "/c", "views": 1}]}
+
+
+def test_snapshot_event():
+    live = LiveAnalytics(window=60)
+    _observe(live, "/a")
+    live._close_second(100)
+    live._close_second(101)
+    event, data = _event(live.snapshot())
+    assert event == "snapshot"
+    assert data["seconds"] == [{"ts": 100, "views": 1}, {"ts": 101, "views": 0}]
+
+
+async def test_ticker_publishes_frames_only_with_subscribers():
+    events = Broadcaster()
+    live = LiveAnalytics(events=events)
+    live.start()
+    try:
+        await asyncio.sleep(1.1)
+        assert events.published == 0
+        subscription = events.subscribe()
+        _observe(live, "/a")
+        event, frame = _event(await asyncio.wait_for(subscription.queue.get(), 2))
+        assert event == "pageviews"
+        assert frame["views"] in (0, 1)
+    finally:
+        await live.stop()
+
+
+def test_worker_relays_the_hub_window():
+    hub = LiveAnalytics(window=60)
+    events = Broadcaster()
+    worker = LiveAnalytics(window=60, events=events)
+    subscription = events.subscribe()
+
+    _observe(worker, "/a", "/a")
+    hub.merge(worker.drain())
+    assert worker.drain() == {}
+    hub.merge({"/b": 1})  # from another worker
+    hub._close_second(100)
+
+    # The first view is history: served in snapshots, not published
+    worker.adopt_view(hub.view())
+    assert subscription.queue.empty()
+    assert _event(worker.snapshot())[1]["seconds"] == [{"ts": 100, "views": 3}]
+
+    hub.merge({"/b": 2})
+    hub._close_second(101)
+    hub._close_second(102)
+    worker.adopt_view(hub.view())
+    worker.adopt_view(hub.view())  # nothing new
+    frames = [_event(subscription.queue.get_nowait())[1] for _ in range(subscription.queue.qsize())]
+    assert [(frame["ts"], frame["views"]) for frame in frames] == [(101, 2), (102, 0)]
+    assert frames[-1]["windowViews"] == 5
+    assert frames[-1]["topPaths"][0] == {"path": "/b", "views": 3}
+
+
+def test_failed_sync_hands_counts_back():
+    live = LiveAnalytics()
+    _observe(live, "/a")
+    drained = live.drain()
+    _observe(live, "/a")
+    live.merge(drained)
+    assert live.drain() == {"/a": 2}
@@ -0,0 +1,56 @@
+import re
+
+import pytest
+
+from services.metrics import Counter, Histogram, Registry
+
+pytestmark = pytest.mark.anyio
+
+
+def test_counter_labels_are_escaped():
+    counter = Counter("requests_total", "Requests", ("route",))
+    counter.inc('/a"b')
+    counter.inc('/a"b', amount=2)
+    assert list(counter.render()) == ['requests_total{route="/a\\"b"} 3']
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "/")
+    assert list(histogram.render()) == [
+        'latency_seconds_bucket{route="/",le="0.1"} 2',
+        'latency_seconds_bucket{route="/",le="1.0"} 3',
+        'latency_seconds_bucket{route="/",le="+Inf"} 4',
+        'latency_seconds_sum{route="/"} 3.65',
+        'latency_seconds_count{route="/"} 4',
+    ]
+
+
+def test_collected_families_stay_contiguous():
+    registry = Registry()
+    registry.collect(lambda: [("a_total", "counter", "A", {"x": "1"}, 1), ("b", "gauge", "B", {}, 2)])
+    registry.collect(lambda: [("a_total", "counter", "A", {"x": "2"}, 3)])
+    assert registry.render().splitlines() == [
+        "# HELP a_total A", "# TYPE a_total counter", 'a_total{x="1"} 1', 'a_total{x="2"} 3',
+        "# HELP b B", "# TYPE b gauge", "b 2",
+    ]
+
+
+def _sample(text, pattern):
+    match = re.search(rf"^{pattern} (\S+)$", text, re.M)
+    return float(match.group(1)) if match else 0.0
+
+
+async def test_requests_are_recorded_by_route_template(client):
+    project_id = (await client.get("/api/portfolio/projects")).json()["projects"][0]["id"]
+    route = 'http_requests_total{method="GET",route="/api/portfolio/projects/{project_id}",status="200"}'
+    before = _sample((await client.get("/metrics")).text, re.escape(route))
+    assert (await client.get(f"/api/portfolio/projects/{project_id}")).status_code == 200
+    text = (await client.get("/metrics")).text
+    assert _sample(text, re.escape(route)) == before + 1
+    assert "http_requests_in_flight 0" in text
+    assert re.search(r'^cache_entries\{cache="content"\} \d+$', text, re.M)
+    assert re.search(r"^pageview_buffer_capacity \d+$", text, re.M)
+    # The scrape endpoint does not count itself
+    assert 'route="/metrics"' not in text
@@ -0,0 +1,68 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from services.pageview_buffer import PageViewBuffer, pageview_buffer
+from storage.memory import MemoryPageViewRepository
+
+pytestmark = pytest.mark.anyio
+
+
+def _view(i):
+    return {"path": f"/p{i % 2}", "ip": "1.1.1.1", "userAgent": "test", "timestamp": datetime(2026, 1, 1)}
+
+
+async def test_flushes_full_batches_then_the_rest_on_stop():
+    repo = MemoryPageViewRepository()
+    buffer = PageViewBuffer(batch_size=3, flush_interval=10)
+    buffer.start(repo)
+    assert all(buffer.offer(_view(i)) for i in range(7))
+    await asyncio.sleep(0.05)
+    assert (buffer.written, buffer.batches) == (6, 2)
+
+    await buffer.stop()
+    assert (buffer.written, buffer.batches) == (7, 3)
+    assert len(repo.pageviews) == 7
+    assert repo.total == 7
+
+
+async def test_flushes_a_partial_batch_after_the_interval():
+    repo = MemoryPageViewRepository()
+    buffer = PageViewBuffer(batch_size=100, flush_interval=0.05)
+    buffer.start(repo)
+    buffer.offer(_view(0))
+    buffer.offer(_view(1))
+    await asyncio.sleep(0.2)
+    assert buffer.written == 2
+    await buffer.stop()
+
+
+async def test_full_queue_drops():
+    buffer = PageViewBuffer(max_size=2)
+    assert not buffer.offer(_view(0))  # not started
+    buffer.start(MemoryPageViewRepository())
+    assert [buffer.offer(_view(i)) for i in range(3)] == [True, True, False]
+    assert buffer.stats()["dropped"] == 2
+    await buffer.stop()
+    assert buffer.written == 2
+
+
+async def test_failed_writes_are_counted():
+    class Failing(MemoryPageViewRepository):
+        async def insert_many(self, pageviews):
+            raise RuntimeError("database down")
+
+    buffer = PageViewBuffer(batch_size=2)
+    buffer.start(Failing())
+    buffer.offer(_view(0))
+    await buffer.stop()
+    assert (buffer.written, buffer.failed) == (0, 1)
+
+
+async def test_endpoint_pushes_back_when_full(client, monkeypatch):
+    assert (await client.post("/api/analytics/pageview", json={"path": "/"})).status_code == 200
+    monkeypatch.setattr(pageview_buffer, "offer", lambda doc: False)
+    response = await client.post("/api/analytics/pageview", json={"path": "/"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
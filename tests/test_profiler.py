@@ -0,0 +1,65 @@
+import cProfile
+import marshal
+
+import pytest
+
+from services import profiler
+from services.profiler import RequestProfiles, render_folded
+
+pytestmark = pytest.mark.anyio
+
+
+def test_render_folded_orders_by_samples():
+    assert render_folded({"main;a": 1, "main;b": 3}) == "main;b 3\nmain;a 1\n"
+
+
+def test_only_the_last_profiles_are_kept():
+    profiles = RequestProfiles(keep=2)
+    for i in range(3):
+        profile = cProfile.Profile()
+        profile.enable()
+        profile.disable()
+        profiles.add(str(i), profile, "GET", f"/{i}", 0.1)
+    assert [entry["id"] for entry in profiles.list()] == ["2", "1"]
+    assert profiles.get("0") is None
+
+
+async def test_stack_sampling(client, admin_headers):
+    response = await client.get(
+        "/api/profile/stacks", params={"seconds": 0.2, "interval": 0.01, "format": "json"}, headers=admin_headers
+    )
+    body = response.json()
+    assert body["samples"] == sum(body["stacks"].values()) > 0
+    # Folded frames look like "name (file.py:line)"
+    assert all(".py:" in stack for stack in body["stacks"])
+
+
+async def test_one_capture_at_a_time(client, admin_headers):
+    assert profiler._sampling.acquire(blocking=False)
+    try:
+        response = await client.get("/api/profile/stacks", params={"seconds": 0.1}, headers=admin_headers)
+    finally:
+        profiler._sampling.release()
+    assert response.status_code == 409
+
+
+async def test_profiled_request(client, admin_headers):
+    response = await client.get("/api/portfolio/projects", headers={**admin_headers, "X-Profile": "1"})
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+
+    listed = (await client.get("/api/profile/requests", headers=admin_headers)).json()["profiles"]
+    assert listed[0]["id"] == profile_id
+    assert listed[0]["path"] == "/api/portfolio/projects"
+
+    text = await client.get(f"/api/profile/requests/{profile_id}", headers=admin_headers)
+    assert "function calls" in text.text
+    prof = await client.get(f"/api/profile/requests/{profile_id}", params={"format": "pstats"}, headers=admin_headers)
+    assert isinstance(marshal.loads(prof.content), dict)
+
+
+async def test_profiling_needs_the_admin_token(client):
+    response = await client.get("/api/portfolio/projects", headers={"X-Profile": "1", "X-Admin-Token": "wrong"})
+    assert "X-Profile-Id" not in response.headers
+    assert (await client.get("/api/profile/requests")).status_code == 403
+    assert (await client.get("/api/profile/requests/nope", headers={"X-Admin-Token": "wrong"})).status_code == 403
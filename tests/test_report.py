@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.report import build_report, load_window, ua_family
+from storage.memory import MemoryPageViewRepository
+
+pytestmark = pytest.mark.anyio
+
+START = datetime(2026, 3, 2, 9, 0)
+CHROME = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 Chrome/120.0 Safari/537.36"
+FIREFOX = "Mozilla/5.0 (X11; Linux x86_64; rv:121.0) Gecko/20100101 Firefox/121.0"
+
+
+def _view(minutes, path, ip, agent=CHROME):
+    return {"path": path, "ip": ip, "userAgent": agent, "timestamp": START + timedelta(minutes=minutes)}
+
+
+VIEWS = [
+    # Visitor 1: one session through the whole funnel, then a bounce after the 30 minute gap
+    _view(0, "/", "10.0.0.1"),
+    _view(2, "/projects", "10.0.0.1"),
+    _view(5, "/contact", "10.0.0.1"),
+    _view(90, "/", "10.0.0.1"),
+    # Visitor 2: reaches /projects only after /contact, so stops at step two
+    _view(1, "/", "10.0.0.2", FIREFOX),
+    _view(3, "/contact", "10.0.0.2", FIREFOX),
+    _view(4, "/projects", "10.0.0.2", FIREFOX),
+    # Visitor 3: enters on /projects and bounces
+    _view(10, "/projects", "10.0.0.3", "curl/8.0"),
+]
+
+
+async def _report(views, funnel=()):
+    repo = MemoryPageViewRepository()
+    await repo.insert_many([dict(view) for view in views])
+    frame, truncated = await load_window(repo, START, START + timedelta(hours=3))
+    assert not truncated
+    return build_report(frame, funnel)
+
+
+async def test_sessions():
+    report = await _report(VIEWS)
+    assert report["views"] == 8
+    assert report["visitors"] == 3
+    assert report["sessions"] == {"count": 4, "bounceRate": 0.5, "avgViews": 2.0}
+    assert report["hourly"][9] == 7
+    assert report["hourly"][10] == 1
+
+
+async def test_paths():
+    paths = {row["path"]: row for row in (await _report(VIEWS))["paths"]}
+    assert paths["/"]["views"] == 3
+    assert paths["/"]["visitors"] == 2
+    assert paths["/"]["entries"] == 3
+    # Of the three sessions entering on /, only the last one bounced
+    assert paths["/"]["bounceRate"] == round(1 / 3, 4)
+    assert paths["/projects"]["entries"] == 1
+    assert paths["/projects"]["bounceRate"] == 1.0
+    # /contact is followed by /projects a minute later in visitor 2's session
+    assert paths["/contact"]["dwellSeconds"]["p50"] == 60.0
+
+
+async def test_funnel():
+    funnel = (await _report(VIEWS, ["/", "/projects", "/contact"]))["funnel"]
+    assert funnel == [
+        {"path": "/", "sessions": 3, "conversion": 1.0},
+        {"path": "/projects", "sessions": 2, "conversion": 0.6667},
+        {"path": "/contact", "sessions": 1, "conversion": 0.3333},
+    ]
+
+
+async def test_funnel_unknown_step():
+    funnel = (await _report(VIEWS, ["/", "/missing", "/contact"]))["funnel"]
+    assert [step["sessions"] for step in funnel] == [3, 0, 0]
+
+
+async def test_empty_window():
+    report = await _report([], ["/"])
+    assert report["sessions"]["count"] == 0
+    assert report["funnel"] == [{"path": "/", "sessions": 0, "conversion": 0.0}]
+
+
+async def test_load_window_truncates():
+    repo = MemoryPageViewRepository()
+    await repo.insert_many([dict(view) for view in VIEWS])
+    frame, truncated = await load_window(repo, START, START + timedelta(hours=3), max_rows=5)
+    assert truncated
+    assert len(frame) == 5
+
+
+def test_ua_family():
+    assert [ua_family(agent) for agent in (CHROME, FIREFOX, "curl/8.0", "", "Lynx")] == [
+        "chrome", "firefox", "bot", "unknown", "other"
+    ]
+
+
+async def test_report_endpoint(client, storage, admin_headers):
+    await storage.pageviews.insert_many([dict(view) for view in VIEWS])
+    params = {"from": "2026-03-02T09:00:00Z", "to": "2026-03-02T12:00:00Z", "funnel": "/,/projects"}
+    assert (await client.get("/api/analytics/report", params=params)).status_code == 403
+
+    response = await client.get("/api/analytics/report", params=params, headers=admin_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["views"] == 8
+    assert body["truncated"] is False
+    assert [step["sessions"] for step in body["funnel"]] == [3, 2]
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.rollups import aggregate_batch, apply_rollups, backfill, read_stats, read_timeseries, recent_ingest
+from storage.memory import MemoryPageViewRepository
+
+pytestmark = pytest.mark.anyio
+
+TODAY = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+
+
+def _views():
+    return [
+        {"path": "/", "ip": "1.1.1.1", "userAgent": "a", "timestamp": TODAY},
+        {"path": "/", "ip": "1.1.1.1", "userAgent": "a", "timestamp": TODAY + timedelta(seconds=30)},
+        {"path": "/", "ip": "2.2.2.2", "userAgent": "b", "timestamp": TODAY + timedelta(minutes=1)},
+        {"path": "/projects", "ip": "2.2.2.2", "userAgent": "b", "timestamp": TODAY - timedelta(days=1)},
+    ]
+
+
+def test_aggregate_batch():
+    delta = aggregate_batch(_views())
+    assert delta.total == 4
+    assert delta.path_views == {"/": 3, "/projects": 1}
+    assert delta.bucket_views[("minute", "/", TODAY)] == 2
+    assert delta.bucket_views[("minute", "*", TODAY + timedelta(minutes=1))] == 1
+    assert delta.bucket_views[("day", "*", TODAY.replace(hour=0))] == 3
+    assert len(delta.path_registers["/"]) <= 2
+
+
+async def test_rollups_are_incremented():
+    repo = MemoryPageViewRepository()
+    await apply_rollups(repo, _views())
+    await apply_rollups(repo, _views()[:1])
+
+    stats = await read_stats(repo)
+    assert stats["total_views"] == 5
+    assert stats["unique_paths"] == 2
+    assert stats["path_stats"][0] == {"path": "/", "views": 4, "unique_visitors": 2}
+    assert stats["views_by_day"][-2:] == [
+        {"day": (TODAY - timedelta(days=1)).date().isoformat(), "views": 1},
+        {"day": TODAY.date().isoformat(), "views": 4},
+    ]
+
+
+async def test_backfill_rebuilds_from_raw_views():
+    repo = MemoryPageViewRepository()
+    await repo.insert_many(_views())
+    await apply_rollups(repo, _views() * 2)  # rollups out of step with the raw views
+
+    assert await backfill(repo, batch_size=3) == 4
+    assert (await read_stats(repo))["total_views"] == 4
+
+
+async def test_recent_ingest():
+    repo = MemoryPageViewRepository()
+    await repo.insert_many([{"path": "/", "timestamp": datetime.utcnow() - timedelta(hours=1)}])
+    assert not await recent_ingest(repo, timedelta(minutes=5))
+    await repo.insert_many([{"path": "/", "timestamp": datetime.utcnow()}])
+    assert await recent_ingest(repo, timedelta(minutes=5))
+
+
+async def test_timeseries_zero_fills_buckets():
+    repo = MemoryPageViewRepository()
+    await apply_rollups(repo, _views())
+    points = await read_timeseries(repo, TODAY - timedelta(minutes=1), TODAY + timedelta(minutes=3), "minute")
+    assert [point["views"] for point in points] == [0, 2, 1, 0]
+    assert points[0]["ts"] == TODAY - timedelta(minutes=1)
+
+    hours = await read_timeseries(repo, TODAY - timedelta(minutes=30), TODAY + timedelta(hours=1), "hour", "/projects")
+    assert [point["views"] for point in hours] == [0, 0]
+    # The start is floored to its bucket
+    assert hours[0]["ts"] == TODAY - timedelta(hours=1)
+
+
+async def test_timeseries_endpoint(client, storage):
+    await apply_rollups(storage.pageviews, _views())
+    day = TODAY.replace(hour=0)
+    params = {"from": f"{(day - timedelta(days=1)).isoformat()}Z", "to": f"{(day + timedelta(days=1)).isoformat()}Z", "bucket": "day"}
+    body = (await client.get("/api/analytics/timeseries", params=params)).json()
+    assert [point["views"] for point in body["points"]] == [1, 3]
+    assert body["total"] == 4
+
+    only_root = (await client.get("/api/analytics/timeseries", params={**params, "path": "/"})).json()
+    assert only_root["total"] == 3
+
+    too_many = {"from": "2020-01-01T00:00:00Z", "to": "2026-01-01T00:00:00Z", "bucket": "minute"}
+    assert (await client.get("/api/analytics/timeseries", params=too_many)).status_code == 400
+    backwards = {**params, "from": params["to"], "to": params["from"]}
+    assert (await client.get("/api/analytics/timeseries", params=backwards)).status_code == 400
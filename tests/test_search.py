@@ -0,0 +1,85 @@
+from services.search import SearchIndex
+
+PROJECTS = [
+    {"id": "p1", "title": "Realtime dashboard", "shortDesc": "Streaming charts", "techStack": ["React", "FastAPI"]},
+    {"id": "p2", "title": "Search service", "shortDesc": "BM25 ranking", "techStack": ["Python", "MongoDB"]},
+    {"id": "p3", "title": "Mobile app", "shortDesc": "Offline first", "techStack": ["React Native"]},
+]
+SKILLS = {"Backend": ["Python", "FastAPI"], "Frontend": ["React"]}
+
+
+def _copy(projects):
+    return [dict(project) for project in projects]
+
+
+def test_initial_sync_indexes_everything():
+    index = SearchIndex()
+    assert index.sync(PROJECTS, SKILLS) == 5
+    assert index.stats()["documents"] == 5
+
+
+def test_sync_skips_the_same_objects():
+    index = SearchIndex()
+    index.sync(PROJECTS, SKILLS)
+    assert index.sync(PROJECTS, SKILLS) == 0
+    # Equal content in new objects is compared and left alone
+    assert index.sync(_copy(PROJECTS), dict(SKILLS)) == 0
+    assert index.stats()["reindexed"] == 5
+
+
+def test_sync_reindexes_only_changed_documents():
+    index = SearchIndex()
+    index.sync(PROJECTS, SKILLS)
+    projects = _copy(PROJECTS)
+    projects[0]["title"] = "Realtime telemetry"
+    assert index.sync(projects, SKILLS) == 1
+
+    assert [result["id"] for result in index.search("telemetry")["results"]] == ["p1"]
+    assert index.search("dashboard")["count"] == 0
+
+
+def test_sync_removes_deleted_documents():
+    index = SearchIndex()
+    index.sync(PROJECTS, SKILLS)
+    assert index.sync(PROJECTS[:2], {"Backend": SKILLS["Backend"]}) == 2
+    assert index.search("offline")["count"] == 0
+    # The React Native facet went with the only project using it
+    facets = {facet["value"] for facet in index.search()["facets"]["tech"]}
+    assert "React Native" not in facets
+    assert index.stats()["documents"] == 3
+
+
+def test_incremental_matches_a_fresh_index():
+    index = SearchIndex()
+    index.sync(PROJECTS, SKILLS)
+    projects = _copy(PROJECTS[1:]) + [{"id": "p4", "title": "React dashboard", "techStack": ["React"]}]
+    index.sync(projects, SKILLS)
+
+    fresh = SearchIndex()
+    fresh.sync(projects, SKILLS)
+    for query in ("react", "dashboard python", "bm25"):
+        assert index.search(query) == fresh.search(query)
+    assert index.total_length == fresh.total_length
+
+
+def test_search_ranks_and_filters():
+    index = SearchIndex()
+    index.sync(PROJECTS, SKILLS)
+    results = index.search("react")["results"]
+    assert {(result["type"], result.get("id")) for result in results} == {
+        ("project", "p1"), ("project", "p3"), ("skill", None)
+    }
+    filtered = index.search("", ["react", "fastapi"])
+    assert [result["id"] for result in filtered["results"]] == ["p1"]
+
+
+
+def test_sync_keeps_the_indexed_objects():
+    index = SearchIndex()
+    projects, skills = _copy(PROJECTS), dict(SKILLS)
+    index.sync(projects, skills)
+    # Held, so their addresses cannot be reused by the next section objects
+    assert index._source[0] is projects and index._source[1] is skills
+    assert index.sync(projects, skills) == 0
+    assert index.sync(projects, dict(SKILLS)) == 0
+    assert index._source[1] is not skills
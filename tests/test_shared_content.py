@@ -0,0 +1,87 @@
+import os
+from functools import partial
+
+import pytest
+
+import build_snapshot
+from services.embeddings import write_index
+from storage.memory import MemoryStorage
+from storage.shared import SharedContentRepository, SnapshotStorage, read_snapshot, write_content_snapshot, write_snapshot
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def build(tmp_path, monkeypatch):
+    """``build_snapshot`` from the seed data, into a temporary directory"""
+    monkeypatch.setattr(build_snapshot, "write_index", partial(write_index, path=tmp_path / "embeddings.npy"))
+    return partial(build_snapshot.build_snapshot, "seed", tmp_path / "content.json")
+
+
+def _replace(path, document, version):
+    write_snapshot({**document, "version": version}, path)
+    # The swap is noticed by inode, mtime and size; don't depend on mtime resolution
+    os.utime(path, ns=(0, version))
+
+
+async def test_build_is_versioned_by_checksum(build, tmp_path):
+    assert await build() == 1
+    mtime = os.stat(tmp_path / "content.json").st_mtime_ns
+    assert await build() == 1
+    assert os.stat(tmp_path / "content.json").st_mtime_ns == mtime
+    assert await build(version=7) == 7
+    assert (tmp_path / "embeddings.npy").exists()
+
+
+async def test_snapshot_storage_serves_the_build(build, tmp_path):
+    await build()
+    storage = SnapshotStorage(tmp_path / "content.json")
+    await storage.prepare()
+    seeded = MemoryStorage().content
+    assert await storage.content.list_projects() == await seeded.list_projects()
+    assert await storage.content.get_contact() == await seeded.get_contact()
+    project_id = (await seeded.list_projects())[0]["id"]
+    assert (await storage.content.get_project(project_id))["id"] == project_id
+    assert await storage.content.get_project("missing") is None
+    assert await storage.content.get_version() == await storage.content.bump_version() == 1
+
+
+async def test_replaced_file_is_hot_swapped(build, tmp_path):
+    path = tmp_path / "content.json"
+    await build()
+    content = SharedContentRepository(path)
+    document = content.load()
+
+    _replace(path, {**document, "projects": document["projects"][:1]}, 2)
+    assert await content.get_version() == 2
+    assert len(await content.list_projects()) == 1
+    assert content.swaps == 2
+
+    # A broken or missing replacement keeps the last good content
+    path.write_text("{not json")
+    assert await content.get_version() == 2
+    path.unlink()
+    assert len(await content.list_projects()) == 1
+
+
+async def test_missing_snapshot_fails_startup(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        await SnapshotStorage(tmp_path / "missing.json").prepare()
+
+    write_snapshot({"version": 1, "projects": []}, tmp_path / "partial.json")
+    with pytest.raises(ValueError, match="skills, experience, contact"):
+        read_snapshot(tmp_path / "partial.json")
+
+
+async def test_published_content_falls_back_to_the_database(tmp_path):
+    database = MemoryStorage().content
+    content = SharedContentRepository(tmp_path / "content.json", fallback=database)
+    assert await content.get_version() == database.version
+
+    assert await write_content_snapshot(database, content.path) == database.version
+    assert await content.list_skills() == await database.list_skills()
+    # The database moves on; the snapshot is current until it is republished
+    assert await content.bump_version() == database.version - 1
+
+    content.path.unlink()
+    assert await content.get_version() == database.version
@@ -0,0 +1,86 @@
+from services.sketches import HyperLogLog, SpaceSaving, merged_count
+
+
+def test_hyperloglog_small_counts_are_exact():
+    hll = HyperLogLog()
+    for i in range(50):
+        hll.add(f"visitor-{i % 10}")
+    assert hll.count() == 10
+
+
+def test_hyperloglog_estimate_within_error():
+    hll = HyperLogLog()
+    for i in range(20000):
+        hll.add(f"visitor-{i}")
+    # Standard error is about 1.04 / sqrt(1024), ~3.3%
+    assert abs(hll.count() - 20000) / 20000 < 0.1
+
+
+def test_hyperloglog_merge_counts_the_union():
+    left, right, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    for i in range(3000):
+        left.add(f"v{i}")
+        union.add(f"v{i}")
+    for i in range(2000, 5000):
+        right.add(f"v{i}")
+        union.add(f"v{i}")
+
+    assert merged_count([left.to_stored(), right.to_stored()]) == union.count()
+    left.merge(right.registers)
+    assert left.registers == union.registers
+
+
+def test_hyperloglog_stored_round_trip():
+    hll = HyperLogLog()
+    for i in range(500):
+        hll.add(str(i))
+    stored = hll.to_stored()
+    assert all(isinstance(index, str) for index in stored)
+    assert HyperLogLog.from_stored(stored).registers == hll.registers
+
+
+def test_hyperloglog_position_is_stable():
+    index, rank = HyperLogLog().position("visitor")
+    assert (index, rank) == HyperLogLog().position("visitor")
+    assert 0 <= index < 1024
+    assert rank >= 1
+
+
+def test_space_saving_exact_under_capacity():
+    summary = SpaceSaving(capacity=10)
+    for path, views in {"/": 5, "/projects": 3, "/contact": 1}.items():
+        summary.add(path, views)
+    assert summary.top(2) == [
+        {"path": "/", "views": 5, "error": 0},
+        {"path": "/projects", "views": 3, "error": 0},
+    ]
+
+
+def test_space_saving_keeps_heavy_hitters():
+    summary = SpaceSaving(capacity=5)
+    for i in range(1000):
+        summary.add("/hot")
+        summary.add(f"/cold-{i}")
+    assert len(summary.counts) == 5
+    top = summary.top(1)[0]
+    assert top["path"] == "/hot"
+    # Counts are upper bounds, and the error bounds the overcount
+    assert top["views"] - top["error"] <= 1000 <= top["views"]
+
+
+def test_space_saving_newcomer_inherits_the_minimum():
+    summary = SpaceSaving(capacity=2)
+    summary.add("/a", 3)
+    summary.add("/b", 1)
+    summary.add("/c")
+    assert summary.counts == {"/a": 3, "/c": 2}
+    assert summary.errors["/c"] == 1
+
+
+def test_space_saving_merge_trims_to_capacity():
+    summary = SpaceSaving(capacity=3)
+    summary.add("/a", 4)
+    summary.add("/b", 2)
+    summary.merge({"/b": 5, "/c": 1, "/d": 3}, {"/d": 1})
+    assert summary.counts == {"/a": 4, "/b": 7, "/d": 3}
+    assert summary.errors == {"/a": 0, "/b": 0, "/d": 1}
@@ -0,0 +1,65 @@
+import gzip
+
+import pytest
+
+from routes import portfolio
+from services.snapshot import CACHE_CONTROL, ResponseSnapshot
+
+pytestmark = pytest.mark.anyio
+
+
+def test_snapshot_variants():
+    snapshot = ResponseSnapshot.build({"projects": [], "count": 0})
+    assert gzip.decompress(snapshot.gzip_body) == snapshot.body
+    assert snapshot.etag == ResponseSnapshot.build({"projects": [], "count": 0}).etag
+    assert snapshot.etag != ResponseSnapshot.build({"projects": [], "count": 1}).etag
+
+
+async def test_etag_and_not_modified(client):
+    response = await client.get("/api/portfolio/projects")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == CACHE_CONTROL
+    etag = response.headers["ETag"]
+
+    for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        cached = await client.get("/api/portfolio/projects", headers={"If-None-Match": if_none_match})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["ETag"] == etag
+
+    stale = await client.get("/api/portfolio/projects", headers={"If-None-Match": '"other"'})
+    assert stale.status_code == 200
+
+
+async def test_content_encoding(client):
+    plain = await client.get("/api/portfolio/projects", headers={"Accept-Encoding": "identity"})
+    compressed = await client.get("/api/portfolio/projects", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in plain.headers
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    # httpx decodes the body; both variants share one ETag
+    assert compressed.content == plain.content
+    assert compressed.headers["ETag"] == plain.headers["ETag"]
+    assert compressed.headers["Vary"] == "Accept-Encoding"
+
+
+async def test_etag_changes_with_content(client, storage):
+    etag = (await client.get("/api/portfolio/projects")).headers["ETag"]
+    content = storage.content
+    projects = [dict(project) for project in content.projects]
+    projects[0]["title"] = "Renamed"
+    content.replace(projects, content.skills, content.experience, content.contact)
+    assert await portfolio.refresh_sections(storage, ["projects", "skills"]) == ["projects"]
+
+    response = await client.get("/api/portfolio/projects", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["projects"][0]["title"] == "Renamed"
+
+
+async def test_bundle_etag(client):
+    response = await client.get("/api/portfolio/bundle", params={"sections": "projects,skills"})
+    assert response.status_code == 200
+    cached = await client.get(
+        "/api/portfolio/bundle", params={"sections": "projects,skills"}, headers={"If-None-Match": response.headers["ETag"]}
+    )
+    assert cached.status_code == 304
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from services.cursors import decode_cursor, encode_cursor
+
+pytestmark = pytest.mark.anyio
+
+BASE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def test_cursor_round_trip():
+    token = encode_cursor("2026-01-01T00:00:00+00:00", "abc")
+    assert "=" not in token
+    assert decode_cursor(token, 2) == ["2026-01-01T00:00:00+00:00", "abc"]
+
+
+@pytest.mark.parametrize("token", ["not base64!", encode_cursor("only-one"), encode_cursor(1, 2, 3)])
+def test_malformed_cursor(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token, 2)
+
+
+async def _seed(storage, count):
+    for i in range(count):
+        await storage.status.insert({"id": f"check-{i}", "client_name": f"client-{i}", "timestamp": BASE + timedelta(minutes=i)})
+
+
+async def _all_pages(client, limit):
+    ids, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = await client.get("/api/status", params=params)
+        assert response.status_code == 200
+        ids.extend(check["id"] for check in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return ids
+
+
+async def test_status_paging(client, storage):
+    await _seed(storage, 5)
+    response = await client.get("/api/status", params={"limit": 2})
+    assert [check["id"] for check in response.json()] == ["check-0", "check-1"]
+    assert response.json()[0]["timestamp"] == "2026-01-01T00:00:00Z"
+    assert 'rel="next"' in response.headers["Link"]
+
+    assert await _all_pages(client, 2) == [f"check-{i}" for i in range(5)]
+
+
+async def test_status_paging_with_unmigrated_timestamps(client, storage):
+    await _seed(storage, 3)
+    # Written before timestamps were stored as dates; these sort first
+    await storage.status.insert({"id": "legacy-b", "client_name": "old", "timestamp": "2025-06-01T00:00:00"})
+    await storage.status.insert({"id": "legacy-a", "client_name": "old", "timestamp": "2025-06-01T00:00:00"})
+
+    assert await _all_pages(client, 1) == ["legacy-a", "legacy-b", "check-0", "check-1", "check-2"]
+
+    rows = (await client.get("/api/status")).json()
+    assert [row["timestamp"] for row in rows[:3]] == ["2025-06-01T00:00:00Z"] * 2 + ["2026-01-01T00:00:00Z"]
+    lines = (await client.get("/api/status", params={"format": "ndjson"})).text.splitlines()
+    assert '"timestamp":"2025-06-01T00:00:00Z"' in lines[0]
+
+
+async def test_status_ndjson_from_cursor(client, storage):
+    await _seed(storage, 3)
+    first = await client.get("/api/status", params={"limit": 1})
+    response = await client.get("/api/status", params={"format": "ndjson", "cursor": first.headers["X-Next-Cursor"]})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = response.text.splitlines()
+    assert len(lines) == 2
+    assert lines[0].startswith('{"id":"check-1"')
+
+
+@pytest.mark.parametrize("cursor", [
+    "garbage",
+    encode_cursor("2026-01-01T00:00:00", "check-0"),
+    encode_cursor("2026-01-01T00:00:00+00:00", 5),
+    encode_cursor(12, "check-0"),
+    encode_cursor({"raw": 12}, "check-0"),
+    encode_cursor("yesterday", "check-0"),
+])
+async def test_invalid_status_cursor(client, cursor):
+    response = await client.get("/api/status", params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
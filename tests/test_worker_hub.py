@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+import pytest
+
+from services import worker_hub
+from services.analytics_sketches import AnalyticsSketches
+from services.live_analytics import LiveAnalytics
+from services.pageview_buffer import PageViewBuffer
+from services.worker_hub import HubClient, HubServer
+from storage.shared import read_snapshot
+
+pytestmark = pytest.mark.anyio
+
+
+def _view(path, ip):
+    return {"path": path, "ip": ip, "userAgent": "test"}
+
+
+@pytest.fixture
+async def hub(tmp_path, monkeypatch):
+    # This process plays one worker; its singletons are swapped for fresh ones
+    monkeypatch.setattr(worker_hub, "analytics_sketches", AnalyticsSketches())
+    monkeypatch.setattr(worker_hub, "live_analytics", LiveAnalytics())
+    monkeypatch.setattr(worker_hub, "pageview_buffer", PageViewBuffer())
+
+    server = HubServer(str(tmp_path / "hub.sock"), tmp_path / "content.snapshot")
+    ready, stop = asyncio.Event(), asyncio.Event()
+    task = asyncio.create_task(server.run(ready.set, stop))
+    await asyncio.wait_for(ready.wait(), 10)
+    yield server
+    stop.set()
+    await task
+
+
+async def _sync_as(socket_path, pid, delta, live=None, accepted=0):
+    """One sync from another worker process"""
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    message = {"op": "sync", "pid": pid, "delta": delta, "live": live or {}, "ingest": {"accepted": accepted}}
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+    reply = json.loads(await reader.readline())
+    writer.close()
+    return reply
+
+
+async def test_sketches_and_ingest_are_merged_across_workers(hub):
+    other = AnalyticsSketches()
+    other.observe(_view("/a", "10.0.0.3"))
+    await _sync_as(hub.socket_path, 999, other.drain_delta(), accepted=5)
+
+    sketches = worker_hub.analytics_sketches
+    for view in (_view("/a", "10.0.0.1"), _view("/a", "10.0.0.2"), _view("/b", "10.0.0.1")):
+        sketches.observe(view)
+    client = HubClient(hub.socket_path)
+    await client.sync()
+
+    stats = sketches.stats()
+    assert stats["unique_visitors"] == 3
+    assert stats["top_paths"][0] == {"path": "/a", "views": 3, "error": 0}
+    assert client.cluster_ingest["workers"] == 2
+    assert client.cluster_ingest["accepted"] == 5
+    # Nothing is counted twice on the next sync
+    await client.sync()
+    assert sketches.stats()["top_paths"][0]["views"] == 3
+    assert hub.sketches.stats()["top_paths"][0]["views"] == 3
+
+
+async def test_failed_sync_keeps_observations(hub, tmp_path):
+    sketches = worker_hub.analytics_sketches
+    sketches.observe(_view("/a", "10.0.0.1"))
+    client = HubClient(str(tmp_path / "missing.sock"))
+    with pytest.raises(OSError):
+        await client.sync()
+    client.socket_path = hub.socket_path
+    await client.sync()
+    assert hub.sketches.stats()["top_paths"] == [{"path": "/a", "views": 1, "error": 0}]
+
+
+async def test_hub_publishes_the_content_snapshot(hub):
+    snapshot = read_snapshot(hub.snapshot_path)
+    assert snapshot["version"] == hub.version
+    assert snapshot["projects"]
+
+
+async def test_live_window_spans_workers(hub):
+    await _sync_as(hub.socket_path, 999, AnalyticsSketches().drain_delta(), live={"/a": 2})
+    worker_hub.live_analytics.observe({"path": "/b"})
+    client = HubClient(hub.socket_path)
+    await client.sync()
+    # The hub closes each second on its own ticker
+    await asyncio.sleep(1.2)
+    await client.sync()
+
+    view = hub.live.view()
+    assert view["windowViews"] == 3
+    assert {row["path"]: row["views"] for row in view["topPaths"]} == {"/a": 2, "/b": 1}
+    # This worker now streams the cluster-wide window
+    snapshot = json.loads(worker_hub.live_analytics.snapshot().split(b"data: ")[1])
+    assert sum(second["views"] for second in snapshot["seconds"]) == 3
+    assert snapshot["topPaths"] == view["topPaths"]